@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: canonicalize_url on the per-link hot path
+
+Simulates a crawl where every page repeats the same navigation/footer links
+and adds a few unique ones, which is what the memoization is for. Compares
+against the previous ``scheme://netloc/path`` f-string, and reports how many
+distinct frontier URLs each approach produces.
+
+Usage:
+    python benchmarks/bench_canonicalize.py [--pages 2000] [--nav 80] [--unique 20] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from canonicalize import canonicalize_url
+
+
+def make_hrefs(pages: int, nav: int, unique: int):
+    """Per-page link lists with case, port, slash, fragment and tracking variants"""
+    rng = random.Random(42)
+    variants = [
+        "https://example.com/section/{i}",
+        "https://Example.com/section/{i}/",
+        "https://example.com:443/section/{i}#top",
+        "https://example.com/section/{i}?utm_source=nav&utm_medium=web",
+    ]
+    nav_links = [rng.choice(variants).format(i=i) for i in range(nav)]
+    for p in range(pages):
+        links = list(nav_links)
+        for u in range(unique):
+            n = p * unique + u
+            links.append(f"https://example.com/items/{n}?page={n % 7}&sort=asc")
+            links.append(f"https://example.com/items/{n}?sort=asc&page={n % 7}&fbclid=abc{n}")
+        yield links
+
+
+def legacy_normalize(url: str):
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+
+
+def run(fn, pages):
+    seen = set()
+    for links in pages:
+        for url in links:
+            seen.add(fn(url))
+    return seen
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--nav", type=int, default=80)
+    parser.add_argument("--unique", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = list(make_hrefs(args.pages, args.nav, args.unique))
+    total = sum(len(links) for links in pages)
+    print(f"{args.pages} pages, {total} hrefs")
+
+    legacy = timed(lambda: run(legacy_normalize, pages), args.repeat)
+    legacy_urls = run(legacy_normalize, pages)
+    print(f"{'f-string (previous)':<28} {legacy * 1000:8.1f} ms  {total / legacy / 1e6:5.2f} M links/s  "
+          f"{len(legacy_urls)} distinct URLs (query strings dropped)")
+
+    def cold():
+        canonicalize_url.cache_clear()
+        run(canonicalize_url, pages)
+
+    uncached = timed(lambda: [canonicalize_url.__wrapped__(u) for links in pages for u in links], args.repeat)
+    print(f"{'canonicalize (no cache)':<28} {uncached * 1000:8.1f} ms  {total / uncached / 1e6:5.2f} M links/s")
+
+    memoized = timed(cold, args.repeat)
+    canonical_urls = run(canonicalize_url, pages)
+    info = canonicalize_url.cache_info()
+    print(f"{'canonicalize (memoized)':<28} {memoized * 1000:8.1f} ms  {total / memoized / 1e6:5.2f} M links/s  "
+          f"{len(canonical_urls)} distinct URLs, hit rate {info.hits / (info.hits + info.misses):.0%}")
+
+    raw_urls = {u for links in pages for u in links}
+    print(f"raw distinct hrefs: {len(raw_urls)}; duplicates collapsed by canonicalization: "
+          f"{len(raw_urls) - len(canonical_urls)}")
+
+
+if __name__ == "__main__":
+    main()
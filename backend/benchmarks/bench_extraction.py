@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: single-pass extraction vs the previous BeautifulSoup path
+
+The previous path parsed each page twice with BeautifulSoup (once for
+``<a href>`` links, once in extract_content_urls) and walked the tree with
+four find_all calls. extract_page makes one streaming pass.
+
+Usage:
+    python benchmarks/bench_extraction.py [--links 5000] [--images 2000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from extraction import LXML_AVAILABLE, extract_page
+
+BASE_URL = "https://example.com/section/page.html"
+
+
+def make_page(links: int, images: int) -> str:
+    parts = ["<html><head><title>Large page</title></head><body>"]
+    for i in range(links):
+        parts.append(f'<div class="row"><p>Paragraph {i} with some filler text to pad the document.</p>'
+                     f'<a href="/articles/{i}?ref=list" class="link">Article {i}</a></div>')
+        if i < images:
+            parts.append(f'<img src="/static/img/{i}.jpg" alt="image {i}">')
+        if i % 250 == 0:
+            parts.append(f'<video controls><source src="/media/clip{i}.mp4"></video>'
+                         f'<audio><source src="/media/track{i}.mp3"></audio>'
+                         f'<a href="/files/report{i}.pdf">Report</a>')
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def beautifulsoup_path(html: str):
+    """What scrape_website + extract_content_urls used to do per page"""
+    soup = BeautifulSoup(html, "html.parser")
+    links = [urljoin(BASE_URL, a["href"]) for a in soup.find_all("a", href=True)]
+
+    soup = BeautifulSoup(html, "html.parser")
+    media = []
+    for img in soup.find_all("img", src=True):
+        media.append(urljoin(BASE_URL, img["src"]))
+    for a in soup.find_all("a", href=True):
+        media.append(urljoin(BASE_URL, a["href"]))
+    for tag in soup.find_all(["video", "source"], src=True):
+        media.append(urljoin(BASE_URL, tag["src"]))
+    for tag in soup.find_all(["audio", "source"], src=True):
+        media.append(urljoin(BASE_URL, tag["src"]))
+    return links, set(media)
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--links", type=int, default=5000)
+    parser.add_argument("--images", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    html = make_page(args.links, args.images)
+    print(f"page size: {len(html) / 1024 / 1024:.2f} MB, {args.links} links, {args.images} images")
+
+    old_links, old_media = beautifulsoup_path(html)
+    new = extract_page(html, BASE_URL)
+    assert old_links == new.links or set(old_links) == set(new.links)
+    assert old_media == set(new.candidate_content_urls())
+
+    baseline = timed(lambda: beautifulsoup_path(html), args.repeat)
+    print(f"{'beautifulsoup x2 + find_all':<30} {baseline * 1000:8.1f} ms")
+
+    stdlib = timed(lambda: extract_page(html, BASE_URL, use_lxml=False), args.repeat)
+    print(f"{'extract_page (html.parser)':<30} {stdlib * 1000:8.1f} ms  ({baseline / stdlib:.1f}x)")
+
+    if LXML_AVAILABLE:
+        fast = timed(lambda: extract_page(html, BASE_URL, use_lxml=True), args.repeat)
+        print(f"{'extract_page (lxml)':<30} {fast * 1000:8.1f} ms  ({baseline / fast:.1f}x)")
+    else:
+        print("lxml not installed; skipping the lxml backend")
+
+
+if __name__ == "__main__":
+    main()
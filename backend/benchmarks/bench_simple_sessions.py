@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark: aggregate pages/sec of the simple backend with concurrent sessions
+
+Serves a synthetic site from a local aiohttp server (with configurable
+per-response latency) and runs 1, 10 and 50 SimpleWebScraperManager sessions
+at once. With --legacy it also runs the previous blocking requests.get loop
+for comparison.
+
+Usage:
+    python benchmarks/bench_simple_sessions.py [--pages 20] [--latency 0.05] [--legacy]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+
+import main_simple
+from main_simple import ScrapeRequest, SimpleWebScraperManager
+from http_client import SharedHttpClient
+
+HOST = "127.0.0.1"
+PORT = 8799
+
+
+def make_site(latency: float) -> web.Application:
+    async def page(request):
+        n = int(request.match_info["n"])
+        await asyncio.sleep(latency)
+        links = "".join(f'<a href="/s{request.match_info["s"]}/{(n * 7 + i) % 500}">page</a>' for i in range(1, 6))
+        body = f"<html><body><h1>Page {n}</h1><p>{'content ' * 200}</p>{links}</body></html>"
+        return web.Response(text=body, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/s{s}/{n}", page)
+    return app
+
+
+def serve_in_thread(latency: float) -> threading.Event:
+    """Run the site on its own loop so a blocking client cannot stall the server"""
+    ready = threading.Event()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        runner = web.AppRunner(make_site(latency), access_log=None)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, HOST, PORT).start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return ready
+
+
+async def run_sessions(sessions: int, pages: int) -> float:
+    async def one(i: int):
+        request = ScrapeRequest(url=f"http://{HOST}:{PORT}/s{i}/1", max_pages=pages, delay=0,
+                                scrape_whole_site=True)
+        async with SimpleWebScraperManager() as manager:
+            result = await manager.scrape_website(f"bench-{i}", request)
+        return result.statistics["total_pages_scraped"]
+
+    start = time.perf_counter()
+    total = sum(await asyncio.gather(*[one(i) for i in range(sessions)]))
+    return total / (time.perf_counter() - start)
+
+
+async def run_legacy_sessions(sessions: int, pages: int) -> float:
+    """The pre-async loop: a blocking requests.get inside a coroutine"""
+    import requests
+    from bs4 import BeautifulSoup
+    from urllib.parse import urljoin
+
+    async def one(i: int):
+        to_crawl, seen, done = [f"http://{HOST}:{PORT}/s{i}/1"], set(), 0
+        while to_crawl and done < pages:
+            url = to_crawl.pop(0)
+            if url in seen:
+                continue
+            seen.add(url)
+            response = requests.get(url, timeout=10)
+            soup = BeautifulSoup(response.content, "html.parser")
+            to_crawl.extend(urljoin(url, a["href"]) for a in soup.find_all("a", href=True))
+            done += 1
+            await asyncio.sleep(0)
+        return done
+
+    start = time.perf_counter()
+    total = sum(await asyncio.gather(*[one(i) for i in range(sessions)]))
+    return total / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20, help="pages per session")
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency per page (seconds)")
+    parser.add_argument("--legacy", action="store_true", help="also benchmark the blocking requests.get loop")
+    args = parser.parse_args()
+
+    serve_in_thread(args.latency)
+
+    client = SharedHttpClient(limit=200, limit_per_host=100)
+    await client.start()
+    main_simple.http_client = client
+
+    print(f"{'sessions':>8} {'async pages/s':>14}" + (f" {'legacy pages/s':>15}" if args.legacy else ""))
+    try:
+        for sessions in (1, 10, 50):
+            rate = await run_sessions(sessions, args.pages)
+            line = f"{sessions:>8} {rate:>14.1f}"
+            if args.legacy:
+                legacy = await run_legacy_sessions(sessions, args.pages)
+                line += f" {legacy:>15.1f}"
+            print(line)
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,188 @@
+"""
+Pool of warm Crawl4AI browsers shared across scrape sessions
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PooledBrowser:
+    """A started AsyncWebCrawler plus the bookkeeping used for recycling"""
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.created_at = time.monotonic()
+        self.active_leases = 0
+        self.total_leases = 0
+        self.retiring = False
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+    def is_healthy(self) -> bool:
+        """True while the underlying Chromium process is still connected"""
+        strategy = getattr(self.crawler, "crawler_strategy", None)
+        manager = getattr(strategy, "browser_manager", None)
+        browser = getattr(manager, "browser", None)
+        if browser is not None and hasattr(browser, "is_connected"):
+            try:
+                return browser.is_connected()
+            except Exception:
+                return False
+        return getattr(self.crawler, "ready", True)
+
+
+class BrowserPool:
+    """Keeps up to ``size`` browsers running for the lifetime of the app.
+
+    Sessions lease the least-loaded healthy browser; each browser serves at
+    most ``sessions_per_browser`` sessions at once, and Crawl4AI opens a
+    fresh page per request inside it, so a session no longer pays for a
+    Chromium cold start. Browsers are recycled after ``max_leases`` sessions
+    or ``max_age`` seconds, and replaced as soon as a health check fails.
+    """
+
+    def __init__(self, crawler_factory: Callable[[], Any], size: int = 2,
+                 sessions_per_browser: int = 4, max_leases: int = 50,
+                 max_age: float = 3600, health_check_interval: float = 30):
+        self.crawler_factory = crawler_factory
+        self.size = max(1, size)
+        self.sessions_per_browser = max(1, sessions_per_browser)
+        self.max_leases = max_leases
+        self.max_age = max_age
+        self.health_check_interval = health_check_interval
+
+        self._browsers: List[PooledBrowser] = []
+        self._available = asyncio.Condition()
+        self._health_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self.browsers_started = 0
+        self.browsers_recycled = 0
+        self.health_failures = 0
+        self.lease_waits = 0
+
+    async def _launch(self) -> PooledBrowser:
+        crawler = self.crawler_factory()
+        await crawler.start()
+        self.browsers_started += 1
+        return PooledBrowser(crawler)
+
+    async def _close_browser(self, entry: PooledBrowser):
+        try:
+            await entry.crawler.close()
+        except Exception as e:
+            logger.warning(f"Error closing pooled browser: {e}")
+
+    async def start(self):
+        """Warm up the pool; called from the FastAPI lifespan"""
+        self._browsers = list(await asyncio.gather(*[self._launch() for _ in range(self.size)]))
+        self._health_task = asyncio.create_task(self._health_loop())
+        logger.info(f"Browser pool started with {len(self._browsers)} browser(s)")
+
+    async def close(self):
+        self._closed = True
+        if self._health_task:
+            self._health_task.cancel()
+        browsers, self._browsers = self._browsers, []
+        await asyncio.gather(*[self._close_browser(b) for b in browsers])
+
+    def _needs_recycling(self, entry: PooledBrowser) -> bool:
+        return (entry.total_leases >= self.max_leases or
+                entry.age >= self.max_age or
+                not entry.is_healthy())
+
+    async def _replace(self, entry: PooledBrowser):
+        """Swap a retiring browser for a fresh one once it has no active leases"""
+        if entry not in self._browsers:
+            return  # Already replaced by a concurrent release or the health check
+        self._browsers.remove(entry)
+        await self._close_browser(entry)
+        self.browsers_recycled += 1
+        if self._closed:
+            return
+        try:
+            fresh = await self._launch()
+        except Exception as e:
+            logger.error(f"Failed to launch replacement browser: {e}")
+            return
+        async with self._available:
+            self._browsers.append(fresh)
+            self._available.notify_all()
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                for entry in list(self._browsers):
+                    if not entry.retiring and not entry.is_healthy():
+                        self.health_failures += 1
+                        entry.retiring = True
+                        logger.warning("Pooled browser failed health check, recycling")
+                    if entry.retiring and entry.active_leases == 0:
+                        await self._replace(entry)
+                # Top the pool back up if a previous launch failed
+                while not self._closed and len(self._browsers) < self.size:
+                    fresh = await self._launch()
+                    async with self._available:
+                        self._browsers.append(fresh)
+                        self._available.notify_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in browser pool health check: {e}")
+
+    def _pick(self) -> Optional[PooledBrowser]:
+        candidates = [
+            b for b in self._browsers
+            if not b.retiring and b.active_leases < self.sessions_per_browser
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda b: b.active_leases)
+
+    @asynccontextmanager
+    async def lease(self):
+        """Lease a warm crawler for the duration of a session"""
+        async with self._available:
+            entry = self._pick()
+            if entry is None:
+                self.lease_waits += 1
+                while entry is None:
+                    if not self._browsers:
+                        raise RuntimeError("Browser pool has no running browsers")
+                    await self._available.wait()
+                    entry = self._pick()
+            entry.active_leases += 1
+            entry.total_leases += 1
+
+        try:
+            yield entry.crawler
+        finally:
+            async with self._available:
+                entry.active_leases -= 1
+                if self._needs_recycling(entry):
+                    entry.retiring = True
+                self._available.notify_all()
+            if entry.retiring and entry.active_leases == 0:
+                if not entry.is_healthy():
+                    self.health_failures += 1
+                await self._replace(entry)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "browsers": len(self._browsers),
+            "active_leases": sum(b.active_leases for b in self._browsers),
+            "sessions_per_browser": self.sessions_per_browser,
+            "browsers_started": self.browsers_started,
+            "browsers_recycled": self.browsers_recycled,
+            "health_failures": self.health_failures,
+            "lease_waits": self.lease_waits,
+        }
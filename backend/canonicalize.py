@@ -0,0 +1,174 @@
+"""
+URL canonicalization for frontier deduplication
+"""
+
+import re
+from functools import lru_cache
+from typing import FrozenSet, Iterable, NamedTuple, Optional, Tuple
+from urllib.parse import quote, unquote_plus, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Tracking and session parameters that never change the page content
+DEFAULT_DENIED_PARAMS: FrozenSet[str] = frozenset({
+    "gclid", "dclid", "fbclid", "msclkid", "yclid", "mc_cid", "mc_eid", "_ga", "_gl",
+    "igshid", "ref_src", "sessionid", "session_id", "sid", "jsessionid", "phpsessid",
+    "cfid", "cftoken",
+})
+DEFAULT_DENIED_PREFIXES: Tuple[str, ...] = ("utm_", "pk_", "hsa_")
+
+# RFC 3986 unreserved characters, which must not be percent-encoded
+_UNRESERVED = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+# Left alone when re-quoting: reserved characters and existing escapes
+_PATH_SAFE = "/%:@!$&'()*+,;=-._~"
+_QUERY_COMPONENT_SAFE = "%:@!$'()*+,;/?-._~"
+_PERCENT_ESCAPE = re.compile(r"%([0-9A-Fa-f]{2})")
+_BARE_PERCENT = re.compile(r"%(?![0-9A-F]{2})")
+# Components made only of these need no quoting at all (the common case)
+_PLAIN_PATH = re.compile(r"[A-Za-z0-9/\-._~:@!$&'()*+,;=]*\Z")
+_PLAIN_QUERY_COMPONENT = re.compile(r"[A-Za-z0-9\-._~:@!$'()*+,;/?]*\Z")
+
+
+class QueryPolicy(NamedTuple):
+    """Which query parameters survive canonicalization.
+
+    With ``allow`` set only those parameters are kept; otherwise everything
+    except ``deny`` and the ``deny_prefixes`` families is kept. Hashable, so
+    it can be part of the memoization key and cross process boundaries.
+    """
+    allow: FrozenSet[str] = frozenset()
+    deny: FrozenSet[str] = DEFAULT_DENIED_PARAMS
+    deny_prefixes: Tuple[str, ...] = DEFAULT_DENIED_PREFIXES
+    strip_trailing_slash: bool = True
+
+    def keeps(self, name: str) -> bool:
+        key = name.lower()
+        if self.allow:
+            return key in self.allow
+        return key not in self.deny and not key.startswith(self.deny_prefixes)
+
+
+DEFAULT_POLICY = QueryPolicy()
+
+
+def build_query_policy(allow: Iterable[str] = (), deny: Iterable[str] = (),
+                       strip_trailing_slash: bool = True) -> QueryPolicy:
+    """Policy from user-supplied parameter names; ``deny`` extends the defaults"""
+    return QueryPolicy(
+        allow=frozenset(p.strip().lower() for p in allow if p.strip()),
+        deny=DEFAULT_DENIED_PARAMS | frozenset(p.strip().lower() for p in deny if p.strip()),
+        strip_trailing_slash=strip_trailing_slash,
+    )
+
+
+def _normalize_escape(match) -> str:
+    char = chr(int(match.group(1), 16))
+    return char if char in _UNRESERVED else "%" + match.group(1).upper()
+
+
+def _normalize_encoding(value: str, plain, safe: str) -> str:
+    """Uppercase escapes, decode escaped unreserved characters, encode unsafe ones"""
+    if "%" in value:
+        value = _BARE_PERCENT.sub("%25", _PERCENT_ESCAPE.sub(_normalize_escape, value))
+    if plain.match(value):
+        return value
+    return quote(value, safe=safe)
+
+
+def _normalize_path(path: str, strip_trailing_slash: bool) -> str:
+    path = _normalize_encoding(path, _PLAIN_PATH, _PATH_SAFE)
+    if "/." in path:
+        segments = []
+        for segment in path.split("/"):
+            if segment == "..":
+                if len(segments) > 1:
+                    segments.pop()
+            elif segment != ".":
+                segments.append(segment)
+        # "/a/." and "/a/.." refer to directories
+        if path.endswith(("/.", "/..")):
+            segments.append("")
+        path = "/".join(segments)
+    if not path:
+        return "/"
+    if strip_trailing_slash and len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/") or "/"
+    return path
+
+
+def _normalize_query(query: str, policy: QueryPolicy) -> str:
+    """Filter and sort ``name=value`` pairs, keeping their (normalized) encoding"""
+    if not query:
+        return ""
+    params = []
+    for pair in query.split("&"):
+        if not pair:
+            continue
+        name, sep, value = pair.partition("=")
+        key = unquote_plus(name) if "%" in name or "+" in name else name
+        if not policy.keeps(key):
+            continue
+        params.append((
+            _normalize_encoding(name, _PLAIN_QUERY_COMPONENT, _QUERY_COMPONENT_SAFE),
+            _normalize_encoding(value, _PLAIN_QUERY_COMPONENT, _QUERY_COMPONENT_SAFE) if sep else "",
+            sep,
+        ))
+    params.sort()
+    return "&".join(name + sep + value for name, value, sep in params)
+
+
+def _split_netloc(netloc: str) -> Tuple[str, Optional[int]]:
+    """Lowercased host and port of a netloc; raises ValueError on a bad port"""
+    if "@" in netloc:
+        netloc = netloc.rpartition("@")[2]
+    if netloc.startswith("["):
+        host, _, rest = netloc[1:].partition("]")
+        port = rest[1:] if rest.startswith(":") else ""
+        host = f"[{host.lower()}]"
+    else:
+        host, _, port = netloc.partition(":")
+        host = host.lower().rstrip(".")
+    if not port:
+        return host, None
+    if not port.isdigit() or int(port) > 65535:
+        raise ValueError(f"Invalid port {port!r}")
+    return host, int(port)
+
+
+@lru_cache(maxsize=65536)
+def canonicalize_url(url: str, policy: QueryPolicy = DEFAULT_POLICY) -> Optional[str]:
+    """Canonical form of an absolute URL; None for non-HTTP or malformed URLs.
+
+    Lowercases scheme and host, drops default ports, fragments and denied
+    query parameters, sorts the remaining parameters, normalizes percent
+    escapes and dot segments, and strips trailing slashes from non-root
+    paths. Memoized because the same hrefs repeat across nearly every page
+    of a site (navigation, footers).
+    """
+    try:
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        if scheme not in DEFAULT_PORTS:
+            return None
+        host, port = _split_netloc(parts.netloc)
+    except ValueError:
+        return None
+    if not host or host == "[]":
+        return None
+
+    # Credentials are dropped along with default ports
+    netloc = host if port is None or port == DEFAULT_PORTS[scheme] else f"{host}:{port}"
+
+    return urlunsplit((
+        scheme,
+        netloc,
+        _normalize_path(parts.path, policy.strip_trailing_slash),
+        _normalize_query(parts.query, policy),
+        "",
+    ))
+
+
+def canonical_host(url: str) -> str:
+    """Canonical ``host[:port]`` of a URL, as used for same-site checks"""
+    canonical = canonicalize_url(url)
+    return urlsplit(canonical).netloc if canonical else urlsplit(url).netloc.lower()
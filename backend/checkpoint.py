@@ -0,0 +1,244 @@
+"""
+SQLite-backed checkpoints so crawl sessions can be resumed after a restart
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_sessions (
+    session_id TEXT PRIMARY KEY,
+    request TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    status TEXT NOT NULL,
+    pages_scraped INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS crawl_frontier (
+    session_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    crawled INTEGER NOT NULL DEFAULT 0,
+    seq INTEGER NOT NULL,
+    PRIMARY KEY (session_id, url)
+);
+CREATE TABLE IF NOT EXISTS crawl_discovered (
+    session_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    external INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (session_id, url)
+);
+"""
+
+
+class CrawlCheckpoint:
+    """Everything needed to resume a session from its last flushed state"""
+
+    def __init__(self, session_id: str, request: Dict[str, Any], domain: str, status: str,
+                 pages_scraped: int, queued: List[str], crawled: List[str],
+                 found: List[str], external: List[str], updated_at: str):
+        self.session_id = session_id
+        self.request = request
+        self.domain = domain
+        self.status = status
+        self.pages_scraped = pages_scraped
+        self.queued = queued
+        self.crawled = crawled
+        self.found = found
+        self.external = external
+        self.updated_at = updated_at
+
+
+class CheckpointStore:
+    """Persists crawl frontiers and visited sets with batched writes.
+
+    Workers record events in memory; they are written in a single transaction
+    once ``batch_size`` events are pending or ``flush_interval`` seconds have
+    passed, so the database never sits on the per-link hot path.
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 500, flush_interval: float = 5.0):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._db: Optional[aiosqlite.Connection] = None
+        self._lock = asyncio.Lock()
+        self._seq = 0
+        self._queued: List[tuple] = []
+        self._crawled: List[tuple] = []
+        self._discovered: List[tuple] = []
+        self._last_flush = time.monotonic()
+
+    async def open(self):
+        self._db = await aiosqlite.connect(self.db_path)
+        await self._db.execute("PRAGMA journal_mode=WAL")
+        await self._db.execute("PRAGMA synchronous=NORMAL")
+        await self._db.executescript(SCHEMA)
+        async with self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM crawl_frontier") as cursor:
+            row = await cursor.fetchone()
+            self._seq = row[0]
+        await self._db.commit()
+        logger.info(f"Checkpoint store opened at {self.db_path}")
+
+    async def close(self):
+        if self._db:
+            await self.flush()
+            await self._db.close()
+            self._db = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._queued) + len(self._crawled) + len(self._discovered)
+
+    # Buffered event recording (no I/O)
+
+    def record_queued(self, session_id: str, urls: Iterable[str]):
+        for url in urls:
+            self._seq += 1
+            self._queued.append((session_id, url, self._seq))
+
+    def record_crawled(self, session_id: str, url: str):
+        self._seq += 1
+        self._crawled.append((session_id, url, self._seq))
+
+    def record_discovered(self, session_id: str, urls: Iterable[str], external: bool = False):
+        flag = 1 if external else 0
+        self._discovered.extend((session_id, url, flag) for url in urls)
+
+    async def maybe_flush(self):
+        """Flush if the batch is full or the flush interval has elapsed"""
+        if (self.pending >= self.batch_size or
+                (self.pending and time.monotonic() - self._last_flush >= self.flush_interval)):
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            if not self._db or not self.pending:
+                self._last_flush = time.monotonic()
+                return
+
+            queued, self._queued = self._queued, []
+            crawled, self._crawled = self._crawled, []
+            discovered, self._discovered = self._discovered, []
+
+            await self._db.executemany(
+                "INSERT OR IGNORE INTO crawl_frontier (session_id, url, crawled, seq) VALUES (?, ?, 0, ?)",
+                queued
+            )
+            await self._db.executemany(
+                "INSERT INTO crawl_frontier (session_id, url, crawled, seq) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT(session_id, url) DO UPDATE SET crawled = 1",
+                crawled
+            )
+            await self._db.executemany(
+                "INSERT OR IGNORE INTO crawl_discovered (session_id, url, external) VALUES (?, ?, ?)",
+                discovered
+            )
+            await self._db.commit()
+            self._last_flush = time.monotonic()
+
+    # Session bookkeeping
+
+    async def save_session(self, session_id: str, request: Dict[str, Any], domain: str,
+                           status: str, pages_scraped: int = 0):
+        if not self._db:
+            return
+        now = datetime.now().isoformat()
+        async with self._lock:
+            await self._db.execute(
+                "INSERT INTO crawl_sessions (session_id, request, domain, status, pages_scraped, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET status = excluded.status, "
+                "pages_scraped = excluded.pages_scraped, updated_at = excluded.updated_at",
+                (session_id, json.dumps(request, default=str), domain, status, pages_scraped, now, now)
+            )
+            await self._db.commit()
+
+    async def list_sessions(self) -> List[Dict[str, Any]]:
+        if not self._db:
+            return []
+        async with self._db.execute(
+            "SELECT session_id, domain, status, pages_scraped, created_at, updated_at "
+            "FROM crawl_sessions ORDER BY updated_at DESC"
+        ) as cursor:
+            rows = await cursor.fetchall()
+        return [
+            {
+                "session_id": row[0],
+                "domain": row[1],
+                "status": row[2],
+                "pages_scraped": row[3],
+                "created_at": row[4],
+                "updated_at": row[5],
+            }
+            for row in rows
+        ]
+
+    async def load(self, session_id: str) -> Optional[CrawlCheckpoint]:
+        if not self._db:
+            return None
+        await self.flush()
+
+        async with self._db.execute(
+            "SELECT request, domain, status, pages_scraped, updated_at FROM crawl_sessions WHERE session_id = ?",
+            (session_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+        if not row:
+            return None
+
+        async with self._db.execute(
+            "SELECT url, crawled FROM crawl_frontier WHERE session_id = ? ORDER BY seq",
+            (session_id,)
+        ) as cursor:
+            frontier = await cursor.fetchall()
+        async with self._db.execute(
+            "SELECT url, external FROM crawl_discovered WHERE session_id = ?",
+            (session_id,)
+        ) as cursor:
+            discovered = await cursor.fetchall()
+
+        return CrawlCheckpoint(
+            session_id=session_id,
+            request=json.loads(row[0]),
+            domain=row[1],
+            status=row[2],
+            pages_scraped=row[3],
+            queued=[url for url, crawled in frontier if not crawled],
+            crawled=[url for url, crawled in frontier if crawled],
+            found=[url for url, external in discovered if not external],
+            external=[url for url, external in discovered if external],
+            updated_at=row[4],
+        )
+
+    async def delete(self, session_id: str):
+        if not self._db:
+            return
+        # Drop buffered events too, or the next flush would write the session back
+        self._queued = [event for event in self._queued if event[0] != session_id]
+        self._crawled = [event for event in self._crawled if event[0] != session_id]
+        self._discovered = [event for event in self._discovered if event[0] != session_id]
+        async with self._lock:
+            for table in ("crawl_frontier", "crawl_discovered", "crawl_sessions"):
+                await self._db.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+            await self._db.commit()
+
+    async def delete_older_than(self, cutoff: datetime, keep: Iterable[str] = ()) -> List[str]:
+        """Delete sessions not updated since ``cutoff`` (except ``keep``); returns their ids"""
+        if not self._db:
+            return []
+        async with self._db.execute(
+            "SELECT session_id FROM crawl_sessions WHERE updated_at < ?", (cutoff.isoformat(),)
+        ) as cursor:
+            session_ids = [row[0] for row in await cursor.fetchall() if row[0] not in keep]
+        for session_id in session_ids:
+            await self.delete(session_id)
+        return session_ids
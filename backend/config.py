@@ -35,6 +35,108 @@ class Config:
     DEFAULT_DELAY = float(os.getenv("DEFAULT_DELAY", 1.0))
     DEFAULT_TIMEOUT = int(os.getenv("DEFAULT_TIMEOUT", 30))
     MAX_PAGES_DEFAULT = int(os.getenv("MAX_PAGES_DEFAULT", 1000))
+    MAX_CRAWL_CONCURRENCY = int(os.getenv("MAX_CRAWL_CONCURRENCY", 16))  # Upper bound for ScrapeRequest.concurrency
+    
+    # Hybrid fetching: plain HTTP first, browser only for JavaScript-dependent pages
+    HYBRID_MIN_TEXT_CHARS = int(os.getenv("HYBRID_MIN_TEXT_CHARS", 200))
+    HYBRID_MIN_LINKS = int(os.getenv("HYBRID_MIN_LINKS", 3))
+    
+    # Shared HTTP client (downloads and plain page fetches)
+    HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", 100))
+    HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", 8))
+    HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", 300))  # seconds
+    HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", 30))  # seconds
+    
+    # Warm browser pool shared across sessions (0 disables pooling)
+    BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", 2))
+    BROWSER_POOL_SESSIONS_PER_BROWSER = int(os.getenv("BROWSER_POOL_SESSIONS_PER_BROWSER", 4))
+    BROWSER_POOL_MAX_LEASES = int(os.getenv("BROWSER_POOL_MAX_LEASES", 50))  # Recycle after this many sessions
+    BROWSER_POOL_MAX_AGE = int(os.getenv("BROWSER_POOL_MAX_AGE", 3600))  # seconds
+    BROWSER_POOL_HEALTH_INTERVAL = int(os.getenv("BROWSER_POOL_HEALTH_INTERVAL", 30))  # seconds
+    
+    # Batched multi-tab rendering (render_mode="batch")
+    BATCH_MEMORY_THRESHOLD_PERCENT = float(os.getenv("BATCH_MEMORY_THRESHOLD_PERCENT", 85.0))
+    
+    # Off-loop HTML parsing (0 processes parses inline on the event loop)
+    EXTRACTION_PROCESSES = int(os.getenv("EXTRACTION_PROCESSES", 0))
+    EXTRACTION_OFFLOAD_MIN_BYTES = int(os.getenv("EXTRACTION_OFFLOAD_MIN_BYTES", 256 * 1024))
+    EXTRACTION_CPU_SAMPLE_EVERY = int(os.getenv("EXTRACTION_CPU_SAMPLE_EVERY", 20))  # Also parse every Nth crawler-extracted page to estimate CPU saved
+    
+    # URL canonicalization (comma-separated query parameter names)
+    CANONICAL_ALLOWED_QUERY_PARAMS = [p for p in os.getenv("CANONICAL_ALLOWED_QUERY_PARAMS", "").split(",") if p]
+    CANONICAL_DENIED_QUERY_PARAMS = [p for p in os.getenv("CANONICAL_DENIED_QUERY_PARAMS", "").split(",") if p]
+    CANONICAL_STRIP_TRAILING_SLASH = os.getenv("CANONICAL_STRIP_TRAILING_SLASH", "true").lower() == "true"
+    
+    # Compact URL sets (ScrapeRequest.compact_url_sets)
+    URL_SET_CAPACITY = int(os.getenv("URL_SET_CAPACITY", 100_000))  # Initial Bloom filter capacity; grows as needed
+    URL_SET_ERROR_RATE = float(os.getenv("URL_SET_ERROR_RATE", 0.001))  # Bloom filter false-positive rate
+    URL_SET_HLL_PRECISION = int(os.getenv("URL_SET_HLL_PRECISION", 14))  # 2^p HyperLogLog registers
+    URL_SPILL_DIR = os.getenv("URL_SPILL_DIR", "url_spill")
+    
+    # robots.txt (cache shared by all sessions)
+    ROBOTS_USER_AGENT = os.getenv("ROBOTS_USER_AGENT", "webscraper")  # Matched against User-agent lines when no user_agent is set
+    ROBOTS_CACHE_DB_PATH = os.getenv("ROBOTS_CACHE_DB_PATH", "robots_cache.db")
+    ROBOTS_CACHE_TTL = int(os.getenv("ROBOTS_CACHE_TTL", 86400))  # seconds
+    ROBOTS_ERROR_TTL = int(os.getenv("ROBOTS_ERROR_TTL", 600))  # seconds to treat an unreachable robots.txt as disallow-all
+    ROBOTS_FETCH_TIMEOUT = int(os.getenv("ROBOTS_FETCH_TIMEOUT", 10))  # seconds
+    ROBOTS_MAX_CRAWL_DELAY = float(os.getenv("ROBOTS_MAX_CRAWL_DELAY", 30.0))  # Cap on honored Crawl-delay values
+    
+    # Sitemap seeding (ScrapeRequest.use_sitemaps)
+    SITEMAP_MAX_FILES = int(os.getenv("SITEMAP_MAX_FILES", 50))  # Sitemaps and sitemap indexes read per session
+    SITEMAP_MAX_URLS = int(os.getenv("SITEMAP_MAX_URLS", 1_000_000))  # Stop counting site pages after this many
+    SITEMAP_FETCH_TIMEOUT = int(os.getenv("SITEMAP_FETCH_TIMEOUT", 60))  # seconds per sitemap
+    
+    # Adaptive per-host concurrency (ScrapeRequest.adaptive_concurrency); ScrapeRequest.concurrency is the initial window
+    ADAPTIVE_MAX_CONCURRENCY_PER_HOST = float(os.getenv("ADAPTIVE_MAX_CONCURRENCY_PER_HOST", 16))  # Also sizes the page worker pool (up to MAX_CRAWL_CONCURRENCY)
+    ADAPTIVE_LATENCY_TARGET = float(os.getenv("ADAPTIVE_LATENCY_TARGET", 2.0))  # p95 seconds above which a host stops growing
+    ADAPTIVE_ERROR_THRESHOLD = float(os.getenv("ADAPTIVE_ERROR_THRESHOLD", 0.05))  # Error rate above which a host stops growing
+    ADAPTIVE_BACKOFF_FACTOR = float(os.getenv("ADAPTIVE_BACKOFF_FACTOR", 0.5))  # Limit multiplier on 429/5xx/timeouts
+    ADAPTIVE_MAX_RETRY_AFTER = float(os.getenv("ADAPTIVE_MAX_RETRY_AFTER", 120))  # Cap on honored Retry-After seconds
+    
+    # Crawl-trap heuristics (ScrapeRequest.trap_detection; 0 disables a rule)
+    TRAP_MAX_URL_LENGTH = int(os.getenv("TRAP_MAX_URL_LENGTH", 1024))
+    TRAP_MAX_PATH_DEPTH = int(os.getenv("TRAP_MAX_PATH_DEPTH", 12))  # Path segments
+    TRAP_MAX_SEGMENT_REPEATS = int(os.getenv("TRAP_MAX_SEGMENT_REPEATS", 3))  # Occurrences of one segment in a path
+    TRAP_MAX_QUERY_PARAMS = int(os.getenv("TRAP_MAX_QUERY_PARAMS", 6))  # After canonicalization
+    TRAP_DEFAULT_PREFIX_BUDGET = int(os.getenv("TRAP_DEFAULT_PREFIX_BUDGET", 0))  # URLs per first-level directory
+    
+    # Duplicate page detection (ScrapeRequest.duplicate_page_links)
+    SIMHASH_MAX_DISTANCE = int(os.getenv("SIMHASH_MAX_DISTANCE", 3))  # Differing bits out of 64 for a near duplicate
+    SIMHASH_MIN_WORDS = int(os.getenv("SIMHASH_MIN_WORDS", 20))  # Shorter pages are never called duplicates
+    
+    # Memory governor: throttle page dispatch at memory watermarks (0 disables a watermark)
+    MEMORY_SOFT_RSS_MB = float(os.getenv("MEMORY_SOFT_RSS_MB", 0))  # API process plus child browsers
+    MEMORY_HARD_RSS_MB = float(os.getenv("MEMORY_HARD_RSS_MB", 0))
+    MEMORY_SOFT_SYSTEM_PERCENT = float(os.getenv("MEMORY_SOFT_SYSTEM_PERCENT", 80.0))
+    MEMORY_HARD_SYSTEM_PERCENT = float(os.getenv("MEMORY_HARD_SYSTEM_PERCENT", 90.0))
+    MEMORY_SAMPLE_INTERVAL = float(os.getenv("MEMORY_SAMPLE_INTERVAL", 1.0))  # seconds
+    MEMORY_THROTTLE_COOLDOWN = float(os.getenv("MEMORY_THROTTLE_COOLDOWN", 10.0))  # seconds between concurrency cuts
+    MEMORY_MAX_PAUSE = float(os.getenv("MEMORY_MAX_PAUSE", 60.0))  # seconds before a paused crawl resumes one page at a time
+    
+    # Conditional recrawls: ETag / Last-Modified / content hash per URL, shared by all sessions
+    VALIDATOR_DB_PATH = os.getenv("VALIDATOR_DB_PATH", "validators.db")
+    VALIDATOR_BATCH_SIZE = int(os.getenv("VALIDATOR_BATCH_SIZE", 200))  # Validators written per transaction
+    VALIDATOR_FLUSH_INTERVAL = float(os.getenv("VALIDATOR_FLUSH_INTERVAL", 5.0))  # seconds
+    
+    # Downloads are streamed to disk in chunks of this size instead of being read whole
+    DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", 64 * 1024))  # bytes
+    # Download stage: per-session workers (ScrapeRequest.download_concurrency) and a limit across sessions
+    DOWNLOAD_MAX_SESSION_CONCURRENCY = int(os.getenv("DOWNLOAD_MAX_SESSION_CONCURRENCY", 8))  # Upper bound per session
+    DOWNLOAD_GLOBAL_CONCURRENCY = int(os.getenv("DOWNLOAD_GLOBAL_CONCURRENCY", 16))  # All sessions together, 0 = unlimited
+    DOWNLOAD_QUEUE_SIZE = int(os.getenv("DOWNLOAD_QUEUE_SIZE", 200))  # Queued URLs before page workers wait
+    DOWNLOAD_STATUS_INTERVAL = float(os.getenv("DOWNLOAD_STATUS_INTERVAL", 1.0))  # seconds between updates while draining
+    
+    # Local response cache (ScrapeRequest.cache_mode): zlib-compressed bodies on disk, LRU-evicted
+    RESPONSE_CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR", "response_cache")
+    RESPONSE_CACHE_MAX_MB = int(os.getenv("RESPONSE_CACHE_MAX_MB", 1024))  # Total size on disk before eviction
+    RESPONSE_CACHE_MAX_ENTRY_MB = int(os.getenv("RESPONSE_CACHE_MAX_ENTRY_MB", 20))  # Larger responses are not cached
+    RESPONSE_CACHE_COMPRESSION_LEVEL = int(os.getenv("RESPONSE_CACHE_COMPRESSION_LEVEL", 6))  # zlib level 1-9
+    
+    # Crawl checkpointing (resumable sessions)
+    CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", "crawl_state.db")
+    CHECKPOINT_BATCH_SIZE = int(os.getenv("CHECKPOINT_BATCH_SIZE", 500))
+    CHECKPOINT_FLUSH_INTERVAL = float(os.getenv("CHECKPOINT_FLUSH_INTERVAL", 5.0))  # seconds
+    CHECKPOINT_RETENTION_HOURS = float(os.getenv("CHECKPOINT_RETENTION_HOURS", 72))  # Stopped/failed sessions stay resumable this long
     
     # Security settings
     ALLOWED_URL_SCHEMES = ["http", "https"]
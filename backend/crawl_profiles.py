@@ -0,0 +1,223 @@
+"""
+Browser resource-blocking profiles and page-load metrics
+"""
+
+import contextvars
+import heapq
+import logging
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Third-party hosts that never contribute links to the DOM
+TRACKER_DOMAINS: Tuple[str, ...] = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "googlesyndication.com", "googleadservices.com", "facebook.net",
+    "connect.facebook.net", "hotjar.com", "segment.io", "segment.com",
+    "mixpanel.com", "newrelic.com", "nr-data.net", "optimizely.com",
+    "scorecardresearch.com", "quantserve.com", "taboola.com", "outbrain.com",
+    "criteo.com", "adsrvr.org", "amazon-adsystem.com", "clarity.ms",
+)
+
+# Typical transfer sizes used to estimate what a blocked request would have cost
+ESTIMATED_RESOURCE_BYTES: Dict[str, int] = {
+    "image": 40 * 1024,
+    "media": 500 * 1024,
+    "font": 30 * 1024,
+    "stylesheet": 20 * 1024,
+    "script": 25 * 1024,
+    "other": 10 * 1024,
+}
+
+
+class CrawlProfile:
+    """Which Playwright resource types and third-party hosts to block"""
+
+    def __init__(self, name: str, blocked_resource_types: FrozenSet[str] = frozenset(),
+                 block_trackers: bool = False, block_third_party: bool = False):
+        self.name = name
+        self.blocked_resource_types = blocked_resource_types
+        self.block_trackers = block_trackers
+        self.block_third_party = block_third_party
+
+    @property
+    def blocks_anything(self) -> bool:
+        return bool(self.blocked_resource_types or self.block_trackers or self.block_third_party)
+
+
+CRAWL_PROFILES: Dict[str, CrawlProfile] = {
+    # Load everything, as a normal browser would
+    "full": CrawlProfile("full"),
+    # Skip heavy assets and trackers but keep CSS and first/third-party scripts
+    "balanced": CrawlProfile(
+        "balanced",
+        blocked_resource_types=frozenset({"image", "media", "font"}),
+        block_trackers=True,
+    ),
+    # Only the document and first-party scripts/XHR needed to build the DOM
+    "fast": CrawlProfile(
+        "fast",
+        blocked_resource_types=frozenset({"image", "media", "font", "stylesheet"}),
+        block_trackers=True,
+        block_third_party=True,
+    ),
+}
+
+
+def get_profile(name: Optional[str]) -> CrawlProfile:
+    return CRAWL_PROFILES.get((name or "full").lower(), CRAWL_PROFILES["full"])
+
+
+def _base_domain(host: str) -> str:
+    host = host.split(":")[0].lower()
+    parts = host.split(".")
+    return ".".join(parts[-2:]) if len(parts) > 2 else host
+
+
+def _host_matches(host: str, domains: Tuple[str, ...]) -> bool:
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+SLOWEST_PAGES = 10  # Pages listed individually in the summary, by time-to-DOM
+
+
+class PageLoadStats:
+    """Per-session totals of blocked requests, bytes and time-to-DOM.
+
+    Pages are aggregated as they are recorded; only the ``SLOWEST_PAGES``
+    slowest are kept individually, so the summary stays the same size on
+    any crawl.
+    """
+
+    def __init__(self, profile: CrawlProfile, domain: str):
+        self.profile = profile
+        self.base_domain = _base_domain(domain)
+        self.pages_measured = 0
+        self.blocked: Dict[str, int] = {}
+        self.bytes_saved = 0
+        self.bytes_loaded = 0
+        self.timed_pages = 0
+        self.time_to_dom_total = 0.0
+        self._slowest: List[Tuple[float, str, Dict[str, Any]]] = []  # Min-heap on time-to-DOM
+
+    def block_reason(self, url: str, resource_type: str) -> Optional[str]:
+        """Why a request should be aborted under this profile, or None to allow it"""
+        profile = self.profile
+        if resource_type in profile.blocked_resource_types:
+            return resource_type
+        if resource_type == "document":
+            return None
+        host = (urlsplit(url).hostname or "").lower()
+        if profile.block_trackers and _host_matches(host, TRACKER_DOMAINS):
+            return "tracker"
+        if profile.block_third_party and host and not _host_matches(host, (self.base_domain,)):
+            return "third_party"
+        return None
+
+    def record(self, url: str, blocked: Dict[str, int], bytes_saved: int,
+               bytes_loaded: int, time_to_dom_ms: Optional[float]):
+        self.pages_measured += 1
+        for reason, count in blocked.items():
+            self.blocked[reason] = self.blocked.get(reason, 0) + count
+        self.bytes_saved += bytes_saved
+        self.bytes_loaded += bytes_loaded
+        if time_to_dom_ms is None:
+            return
+        self.timed_pages += 1
+        self.time_to_dom_total += time_to_dom_ms
+        page = {
+            "url": url,
+            "blocked_requests": dict(blocked),
+            "bytes_saved_estimate": bytes_saved,
+            "bytes_loaded": bytes_loaded,
+            "time_to_dom_ms": time_to_dom_ms,
+        }
+        if len(self._slowest) < SLOWEST_PAGES:
+            heapq.heappush(self._slowest, (time_to_dom_ms, url, page))
+        elif time_to_dom_ms > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, (time_to_dom_ms, url, page))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "profile": self.profile.name,
+            "pages_measured": self.pages_measured,
+            "blocked_requests": dict(self.blocked),
+            "bytes_saved_estimate": self.bytes_saved,
+            "bytes_loaded": self.bytes_loaded,
+            "avg_time_to_dom_ms": round(self.time_to_dom_total / self.timed_pages, 1) if self.timed_pages else None,
+            "slowest_pages": [page for _, _, page in sorted(self._slowest, reverse=True)],
+        }
+
+
+# Set by each page worker so the (crawler-wide) hooks know which session a page belongs to
+current_page_load_stats: contextvars.ContextVar[Optional[PageLoadStats]] = contextvars.ContextVar(
+    "current_page_load_stats", default=None
+)
+
+_TIME_TO_DOM_JS = """() => {
+    const nav = performance.getEntriesByType('navigation')[0];
+    return nav ? nav.domContentLoadedEventEnd : null;
+}"""
+
+
+async def _on_page_context_created(page, context=None, **kwargs):
+    stats = current_page_load_stats.get()
+    if stats is None:
+        return page
+
+    blocked: Dict[str, int] = {}
+    counters = {"bytes_saved": 0, "bytes_loaded": 0}
+    page._scraper_page_load = (stats, blocked, counters)
+
+    if stats.profile.blocks_anything:
+        async def route_handler(route):
+            request = route.request
+            reason = stats.block_reason(request.url, request.resource_type)
+            if reason is None:
+                await route.continue_()
+                return
+            blocked[reason] = blocked.get(reason, 0) + 1
+            counters["bytes_saved"] += ESTIMATED_RESOURCE_BYTES.get(
+                request.resource_type, ESTIMATED_RESOURCE_BYTES["other"]
+            )
+            await route.abort()
+
+        await page.route("**/*", route_handler)
+
+    def on_response(response):
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            counters["bytes_loaded"] += int(length)
+
+    page.on("response", on_response)
+    return page
+
+
+async def _before_return_html(page, html=None, context=None, **kwargs):
+    state = getattr(page, "_scraper_page_load", None)
+    if state is None:
+        return page
+    stats, blocked, counters = state
+    try:
+        time_to_dom = await page.evaluate(_TIME_TO_DOM_JS)
+    except Exception:
+        time_to_dom = None
+    stats.record(
+        page.url, blocked, counters["bytes_saved"], counters["bytes_loaded"],
+        round(time_to_dom, 1) if time_to_dom is not None else None
+    )
+    return page
+
+
+def install_profile_hooks(crawler):
+    """Attach the blocking/measurement hooks to a crawler (idempotent)"""
+    if getattr(crawler, "_scraper_profile_hooks", False):
+        return
+    strategy = getattr(crawler, "crawler_strategy", None)
+    if strategy is None or not hasattr(strategy, "set_hook"):
+        logger.warning("Crawler does not support hooks; crawl profiles will not block resources")
+        return
+    strategy.set_hook("on_page_context_created", _on_page_context_created)
+    strategy.set_hook("before_return_html", _before_return_html)
+    crawler._scraper_profile_hooks = True
@@ -0,0 +1,99 @@
+"""
+Crawl-trap heuristics and per-path-prefix page budgets for frontier admission
+"""
+
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+RULES = ("url_length", "path_depth", "repeated_segment", "query_params", "prefix_budget")
+
+
+class TrapFilter:
+    """Decides whether a discovered URL may enter the frontier.
+
+    Heuristics (0 disables one):
+      * ``url_length``: longer than ``max_url_length`` characters
+      * ``path_depth``: more than ``max_depth`` path segments
+      * ``repeated_segment``: one segment occurring more than
+        ``max_segment_repeats`` times, e.g. /a/b/a/b/a/b/ loops from relative links
+      * ``query_params``: more than ``max_query_params`` parameters (faceted navigation)
+
+    ``prefix_budgets`` maps path prefixes to the number of URLs admitted
+    under them (the longest matching prefix applies), e.g.
+    ``{"/calendar/": 50}``; ``default_budget`` applies to every first-level
+    directory without an explicit budget. Budgets are charged only when a
+    URL actually enters the frontier, after the heuristics and robots.txt.
+    """
+
+    def __init__(self, max_depth: int = 12, max_segment_repeats: int = 3, max_url_length: int = 1024,
+                 max_query_params: int = 6, prefix_budgets: Optional[Dict[str, int]] = None,
+                 default_budget: int = 0):
+        self.max_depth = max_depth
+        self.max_segment_repeats = max_segment_repeats
+        self.max_url_length = max_url_length
+        self.max_query_params = max_query_params
+        # Longest first, so the most specific prefix is found first
+        self.prefix_budgets = sorted((prefix_budgets or {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self.default_budget = default_budget
+
+        self.admitted: Counter = Counter()
+        self.rejected: Counter = Counter()
+
+    def _prefix(self, path: str) -> Optional[str]:
+        for prefix, _ in self.prefix_budgets:
+            if path.startswith(prefix):
+                return prefix
+        if self.default_budget:
+            first = path.split("/", 2)[1] if path.count("/") >= 2 else ""
+            return f"/{first}/" if first else None
+        return None
+
+    def _budget(self, prefix: str) -> int:
+        for candidate, budget in self.prefix_budgets:
+            if candidate == prefix:
+                return budget
+        return self.default_budget
+
+    def check(self, url: str) -> Optional[str]:
+        """The heuristic that flags ``url`` as a likely trap, or None"""
+        rule = self._trap_rule(url)
+        if rule:
+            self.rejected[rule] += 1
+        return rule
+
+    def take_budget(self, url: str) -> bool:
+        """Count ``url`` against its prefix budget; False once the budget is spent"""
+        prefix = self._prefix(urlsplit(url).path or "/")
+        if prefix is None:
+            return True
+        if self.admitted[prefix] >= self._budget(prefix):
+            self.rejected["prefix_budget"] += 1
+            return False
+        self.admitted[prefix] += 1
+        return True
+
+    def _trap_rule(self, url: str) -> Optional[str]:
+        if self.max_url_length and len(url) > self.max_url_length:
+            return "url_length"
+        parts = urlsplit(url)
+        segments = [segment for segment in parts.path.split("/") if segment]
+        if self.max_depth and len(segments) > self.max_depth:
+            return "path_depth"
+        if self.max_segment_repeats and segments:
+            if Counter(segments).most_common(1)[0][1] > self.max_segment_repeats:
+                return "repeated_segment"
+        if self.max_query_params and parts.query and parts.query.count("&") + 1 > self.max_query_params:
+            return "query_params"
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        budgets: List[Dict[str, Any]] = [
+            {"prefix": prefix, "budget": self._budget(prefix), "admitted": count}
+            for prefix, count in self.admitted.most_common(20)
+        ]
+        return {
+            "rejected": {rule: self.rejected.get(rule, 0) for rule in RULES},
+            "rejected_total": sum(self.rejected.values()),
+            "prefix_budgets": budgets,
+        }
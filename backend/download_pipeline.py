@@ -0,0 +1,181 @@
+"""
+Download stage of a crawl session: bounded queue, own workers, session and global limits
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+THROUGHPUT_WINDOW = 10.0  # seconds of completed downloads behind the "recent" rates
+
+
+class DownloadSlots:
+    """Concurrent downloads allowed across all sessions (0 = unlimited)"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit) if limit > 0 else None
+        self.in_use = 0
+        self.waits = 0
+
+    async def __aenter__(self):
+        if self._semaphore:
+            if self._semaphore.locked():
+                self.waits += 1
+            await self._semaphore.acquire()
+        self.in_use += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.in_use -= 1
+        if self._semaphore:
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"limit": self.limit or None, "in_use": self.in_use, "waits": self.waits}
+
+
+class DownloadPipeline:
+    """Content URLs handed over by page workers, downloaded by ``workers`` tasks.
+
+    ``submit`` returns as soon as the URL is queued, so crawling continues
+    while files download; it only waits when ``queue_size`` URLs are already
+    pending, which keeps the queue bounded. ``workers`` caps the session's
+    concurrent downloads and ``global_slots`` (shared by every session) the
+    total. URLs still queued once ``should_run`` turns False (the session was
+    stopped) are dropped instead of downloaded.
+    """
+
+    def __init__(self, download: Callable[[str], Awaitable[Any]], on_result: Callable[[Any], Awaitable[None]],
+                 workers: int = 4, queue_size: int = 200, global_slots: Optional[DownloadSlots] = None,
+                 should_run: Callable[[], bool] = lambda: True):
+        self.download = download
+        self.on_result = on_result
+        self.workers = workers
+        self.global_slots = global_slots
+        self.should_run = should_run
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue(queue_size)
+        self._tasks: List[asyncio.Task] = []
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+        self._recent: Deque[Tuple[float, int]] = deque()  # (finished at, bytes) of recent downloads
+
+        self.in_flight = 0
+        self._unfinished = 0  # Submitted and not yet handled, wherever it is (queue, slot wait, download)
+        self.peak_queue_depth = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.bytes = 0
+        self.queue_waits = 0
+
+    def start(self):
+        self._started = time.monotonic()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, url: str):
+        if self._queue.full():
+            self.queue_waits += 1
+        await self._queue.put(url)
+        self._unfinished += 1
+        self.submitted += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, self._queue.qsize())
+
+    @property
+    def idle(self) -> bool:
+        """True once every submitted URL is handled, including ones dequeued but still waiting for a slot"""
+        return self._unfinished == 0
+
+    async def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued URL is handled; False if ``timeout`` passed first"""
+        try:
+            await asyncio.wait_for(asyncio.shield(self._queue.join()), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._finished is None:
+            self._finished = time.monotonic()
+
+    async def _worker(self):
+        while True:
+            url = await self._queue.get()
+            try:
+                if not self.should_run():
+                    self.dropped += 1
+                elif self.global_slots:
+                    async with self.global_slots:
+                        await self._download(url)
+                else:
+                    await self._download(url)
+            finally:
+                self._unfinished -= 1
+                self._queue.task_done()
+
+    async def _download(self, url: str):
+        self.in_flight += 1
+        try:
+            result = await self.download(url)
+        except Exception as e:
+            logger.error(f"Download of {url} failed: {e!r}")
+            result = None
+        finally:
+            self.in_flight -= 1
+
+        if result is None or not getattr(result, "success", False):
+            self.failed += 1
+            return
+        size = getattr(result, "file_size", None) or 0
+        self.completed += 1
+        self.bytes += size
+        self._recent.append((time.monotonic(), size))
+        try:
+            await self.on_result(result)
+        except Exception as e:
+            logger.error(f"Handling download of {url} failed: {e!r}")
+
+    def _rates(self) -> Tuple[float, float]:
+        """(files, bytes) per second over the last THROUGHPUT_WINDOW seconds"""
+        now = time.monotonic()
+        while self._recent and now - self._recent[0][0] > THROUGHPUT_WINDOW:
+            self._recent.popleft()
+        window = min(THROUGHPUT_WINDOW, now - self._started) if self._started else 0
+        if window <= 0:
+            return 0.0, 0.0
+        return len(self._recent) / window, sum(size for _, size in self._recent) / window
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Queue depth and throughput for status updates"""
+        files_per_second, bytes_per_second = self._rates()
+        return {
+            "queue_depth": self._queue.qsize(),
+            "in_flight": self.in_flight,
+            "workers": self.workers,
+            "completed": self.completed,
+            "failed": self.failed,
+            "files_per_second": round(files_per_second, 2),
+            "bytes_per_second": round(bytes_per_second),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = ((self._finished or time.monotonic()) - self._started) if self._started else 0
+        return {
+            **self.snapshot(),
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "bytes": self.bytes,
+            "peak_queue_depth": self.peak_queue_depth,
+            "queue_full_waits": self.queue_waits,
+            "average_files_per_second": round(self.completed / elapsed, 2) if elapsed else 0.0,
+            "average_bytes_per_second": round(self.bytes / elapsed) if elapsed else 0,
+        }
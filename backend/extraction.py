@@ -0,0 +1,326 @@
+"""
+Single-pass link and media extraction shared by both backends
+"""
+
+from html.parser import HTMLParser
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from canonicalize import DEFAULT_POLICY, QueryPolicy, canonicalize_url
+
+# lxml ships with Crawl4AI; the stdlib parser is the fallback
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Tags whose src attribute points at downloadable media
+MEDIA_SRC_TAGS = frozenset({"img", "video", "audio", "source"})
+
+# Frontend content type IDs mapped to the types returned by classify_content
+CONTENT_TYPE_IDS = {
+    'images': 'image',
+    'pdfs': 'pdf',
+    'videos': 'video',
+    'audio': 'audio',
+    'documents': 'document'
+}
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.bmp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm')
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.flac', '.ogg')
+DOCUMENT_EXTENSIONS = ('.doc', '.docx', '.txt', '.rtf', '.odt')
+DOCUMENT_MIME_TYPES = ('application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document')
+
+
+def classify_content(url: str, mime_type: Optional[str] = None) -> str:
+    """Determine content type based on URL and MIME type"""
+    if mime_type:
+        if mime_type.startswith('image/'):
+            return 'image'
+        elif mime_type == 'application/pdf':
+            return 'pdf'
+        elif mime_type.startswith('video/'):
+            return 'video'
+        elif mime_type.startswith('audio/'):
+            return 'audio'
+        elif mime_type in DOCUMENT_MIME_TYPES:
+            return 'document'
+
+    # Fallback to extension-based detection
+    url_lower = url.lower()
+    if any(ext in url_lower for ext in IMAGE_EXTENSIONS):
+        return 'image'
+    elif url_lower.endswith('.pdf'):
+        return 'pdf'
+    elif any(ext in url_lower for ext in VIDEO_EXTENSIONS):
+        return 'video'
+    elif any(ext in url_lower for ext in AUDIO_EXTENSIONS):
+        return 'audio'
+    elif any(ext in url_lower for ext in DOCUMENT_EXTENSIONS):
+        return 'document'
+
+    return 'other'
+
+
+def wanted_content_types(enabled_ids: Iterable[str]) -> FrozenSet[str]:
+    """Map enabled frontend content type IDs to classify_content types"""
+    return frozenset(CONTENT_TYPE_IDS[i] for i in enabled_ids if i in CONTENT_TYPE_IDS)
+
+
+class PageExtraction:
+    """Absolute link and media URLs found on a page, in document order, deduplicated"""
+
+    def __init__(self, links: List[str], media: List[str]):
+        self.links = links
+        self.media = media
+
+    def candidate_content_urls(self) -> List[str]:
+        """Media sources followed by links, the set content downloads are chosen from"""
+        seen = set()
+        ordered = []
+        for url in self.media + self.links:
+            if url not in seen:
+                seen.add(url)
+                ordered.append(url)
+        return ordered
+
+
+class _Collector:
+    """Receives start-tag events from either parser backend"""
+
+    def __init__(self):
+        self.base_href: Optional[str] = None
+        self.hrefs: List[str] = []
+        self.srcs: List[str] = []
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]):
+        if tag == "a":
+            href = attrs.get("href")
+            if href:
+                self.hrefs.append(href)
+        elif tag in MEDIA_SRC_TAGS:
+            src = attrs.get("src")
+            if src:
+                self.srcs.append(src)
+        elif tag == "base" and self.base_href is None:
+            self.base_href = attrs.get("href")
+
+    # lxml target interface
+    def end(self, tag):
+        pass
+
+    def data(self, data):
+        pass
+
+    def close(self):
+        return self
+
+
+class _StdlibParser(HTMLParser):
+    def __init__(self, collector: _Collector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+
+
+def _absolute(values: List[str], base_url: str) -> List[str]:
+    seen = set()
+    urls = []
+    for value in values:
+        value = value.strip()
+        if not value or value in seen:
+            continue
+        seen.add(value)
+        try:
+            url = urljoin(base_url, value)
+        except ValueError:
+            continue
+        urls.append(url)
+    # Different raw values can resolve to the same URL
+    return list(dict.fromkeys(urls))
+
+
+def extract_page(html: str, base_url: str, use_lxml: bool = LXML_AVAILABLE) -> PageExtraction:
+    """Collect page links and media URLs in one streaming pass over the HTML.
+
+    No tree is built: the parser reports start tags to a collector which only
+    looks at ``a[href]``, ``img/video/audio/source[src]`` and ``base[href]``.
+    """
+    collector = _Collector()
+    if html:
+        parsed = False
+        if use_lxml:
+            try:
+                parser = etree.HTMLParser(target=collector)
+                parser.feed(html)
+                parser.close()
+                parsed = True
+            except (ValueError, etree.LxmlError):
+                # e.g. str input carrying an XML encoding declaration
+                collector = _Collector()
+        if not parsed:
+            parser = _StdlibParser(collector)
+            parser.feed(html)
+            parser.close()
+
+    if collector.base_href:
+        base_url = urljoin(base_url, collector.base_href.strip())
+
+    return PageExtraction(
+        links=_absolute(collector.hrefs, base_url),
+        media=_absolute(collector.srcs, base_url),
+    )
+
+
+class PageAnalysis:
+    """Normalized frontier links and classified downloads for one page.
+
+    ``source_links`` / ``source_candidates`` are the absolute URLs it was
+    built from, kept so a revalidated page can be re-analyzed without its HTML.
+    ``fingerprint`` is the page's ``fingerprint.page_fingerprint`` when it was
+    asked for alongside the parse.
+    """
+
+    def __init__(self, internal_links: List[str], external_links: List[str], content_urls: List[str],
+                 source_links: Optional[List[str]] = None, source_candidates: Optional[List[str]] = None):
+        self.internal_links = internal_links
+        self.external_links = external_links
+        self.content_urls = content_urls
+        self.source_links = source_links or []
+        self.source_candidates = source_candidates or []
+        self.fingerprint: Optional[Tuple[int, bytes, int]] = None
+
+
+def analyze_urls(links: List[str], candidate_urls: List[str], domain: str,
+                 include_external: bool, wanted_types: FrozenSet[str] = frozenset(),
+                 policy: QueryPolicy = DEFAULT_POLICY) -> PageAnalysis:
+    """Normalize and classify already-extracted absolute URLs"""
+    internal: Dict[str, None] = {}
+    external: Dict[str, None] = {}
+    for url in links:
+        clean_url = canonicalize_url(url, policy)
+        if clean_url is None:
+            continue
+        if urlsplit(clean_url).netloc == domain:
+            internal[clean_url] = None
+        elif include_external:
+            external[clean_url] = None
+
+    content_urls = []
+    if wanted_types:
+        content_urls = [url for url in candidate_urls if classify_content(url) in wanted_types]
+
+    return PageAnalysis(list(internal), list(external), content_urls, links, candidate_urls)
+
+
+def analyze_page(html: str, page_url: str, domain: str, include_external: bool,
+                 wanted_types: FrozenSet[str] = frozenset(),
+                 policy: QueryPolicy = DEFAULT_POLICY) -> PageAnalysis:
+    """Parse, normalize and classify a page in one call.
+
+    Everything here is plain Python with picklable inputs and outputs, so it
+    can run in a worker process (see extraction_pool.py) as well as inline.
+    ``domain`` is the canonical host (see canonicalize.canonical_host).
+    """
+    extraction = extract_page(html, page_url)
+    return analyze_urls(extraction.links, extraction.candidate_content_urls(),
+                         domain, include_external, wanted_types, policy)
+
+
+def analyze_crawler_result(links: Any, media: Any, page_url: str, domain: str, include_external: bool,
+                           wanted_types: FrozenSet[str] = frozenset(),
+                           policy: QueryPolicy = DEFAULT_POLICY) -> Optional[PageAnalysis]:
+    """Build a PageAnalysis from the links/media Crawl4AI already extracted.
+
+    Returns None when the result carries no link data (plain HTTP fetches,
+    older Crawl4AI versions), in which case the caller should parse the HTML.
+    """
+    if not isinstance(links, dict) or not ("internal" in links or "external" in links):
+        return None
+
+    def hrefs(items, key):
+        for item in items or ():
+            value = item.get(key) if isinstance(item, dict) else item
+            if value:
+                try:
+                    yield urljoin(page_url, value.strip())
+                except ValueError:
+                    continue
+
+    page_links = list(dict.fromkeys(
+        url for group in ("internal", "external") for url in hrefs(links.get(group), "href")
+    ))
+    media_urls = []
+    if isinstance(media, dict):
+        for group in ("images", "videos", "audios"):
+            media_urls.extend(hrefs(media.get(group), "src"))
+
+    candidates = list(dict.fromkeys(media_urls + page_links))
+    return analyze_urls(page_links, candidates, domain, include_external, wanted_types, policy)
+
+
+class ExtractionStats:
+    """CPU time spent extracting links, per source, for the session statistics.
+
+    Crawler-sourced pages are occasionally also run through the parser so the
+    parser's cost per byte is known, which gives the estimated CPU saved.
+    """
+
+    def __init__(self, mode: str, sample_every: int = 20):
+        self.mode = mode
+        self.sample_every = max(1, sample_every)
+        self.crawler_pages = 0
+        self.crawler_cpu = 0.0
+        self.parser_pages = 0
+        self.parser_samples = 0
+        self.parser_cpu = 0.0
+        self.parser_bytes = 0
+        self.fallbacks = 0
+        self.saved_cpu = 0.0
+        self._pending_bytes = 0  # crawler-sourced bytes whose parser cost is not yet known
+
+    def record_crawler(self, cpu: float, html_bytes: int):
+        self.crawler_pages += 1
+        self.crawler_cpu += cpu
+        self.saved_cpu -= cpu
+        self._pending_bytes += html_bytes
+        self._settle()
+
+    def should_sample(self) -> bool:
+        return self.parser_bytes == 0 or self.crawler_pages % self.sample_every == 0
+
+    def record_parser(self, cpu: float, html_bytes: int, sampled: bool = False):
+        if sampled:
+            self.parser_samples += 1
+        else:
+            self.parser_pages += 1
+        self.parser_cpu += cpu
+        self.parser_bytes += html_bytes
+        self._settle()
+
+    def _settle(self):
+        if self.parser_bytes and self._pending_bytes:
+            self.saved_cpu += self._pending_bytes * (self.parser_cpu / self.parser_bytes)
+            self._pending_bytes = 0
+
+    def summary(self) -> Dict[str, Any]:
+        parsed = self.parser_pages + self.parser_samples
+        return {
+            "mode": self.mode,
+            "pages_from_crawler": self.crawler_pages,
+            "pages_from_parser": self.parser_pages,
+            "parser_cost_samples": self.parser_samples,
+            "crawler_fallbacks": self.fallbacks,
+            "crawler_cpu_ms": round(self.crawler_cpu * 1000, 2),
+            "parser_cpu_ms": round(self.parser_cpu * 1000, 2),
+            "avg_crawler_cpu_ms_per_page": round(self.crawler_cpu * 1000 / self.crawler_pages, 3) if self.crawler_pages else None,
+            "avg_parser_cpu_ms_per_page": round(self.parser_cpu * 1000 / parsed, 3) if parsed else None,
+            "estimated_cpu_ms_saved": round(self.saved_cpu * 1000, 2),
+        }
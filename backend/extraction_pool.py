@@ -0,0 +1,141 @@
+"""
+Process pool that runs HTML parsing and link analysis off the event loop
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+from canonicalize import DEFAULT_POLICY, QueryPolicy
+from extraction import PageAnalysis, analyze_page
+from fingerprint import page_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+def _read_shared(shm_name: str, size: int) -> str:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        return bytes(shm.buf[:size]).decode('utf-8', errors='replace')
+    finally:
+        shm.close()
+
+
+def _analyze_shared(shm_name: str, size: int, page_url: str, domain: str,
+                    include_external: bool, wanted_types: FrozenSet[str],
+                    policy: QueryPolicy, with_fingerprint: bool) -> Tuple[PageAnalysis, float]:
+    """Worker-side entry point: read the HTML out of shared memory, analyze it, report the CPU time"""
+    started = time.thread_time()
+    html = _read_shared(shm_name, size)
+    analysis = analyze_page(html, page_url, domain, include_external, wanted_types, policy)
+    cpu = time.thread_time() - started
+    if with_fingerprint:
+        # Outside the timed part, which feeds the parser's cost estimate
+        analysis.fingerprint = page_fingerprint(html)
+    return analysis, cpu
+
+
+def _fingerprint_shared(shm_name: str, size: int) -> Tuple[int, bytes, int]:
+    return page_fingerprint(_read_shared(shm_name, size))
+
+
+def _warm_up():
+    return True
+
+
+class ExtractionPool:
+    """Hands large pages to worker processes for parsing.
+
+    The HTML is written once into a shared memory block and only the block's
+    name crosses the process boundary, instead of pickling a multi-megabyte
+    string through the executor's pipe. Pages below ``min_bytes`` are analyzed
+    inline because the hand-off would cost more than the parse.
+    """
+
+    def __init__(self, processes: int, min_bytes: int = 256 * 1024):
+        self.processes = processes
+        self.min_bytes = min_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        self.offloaded = 0
+        self.inline = 0
+        self.offloaded_bytes = 0
+
+    async def start(self):
+        # spawn: forking a process that is running an event loop and threads is unsafe
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[
+            loop.run_in_executor(self._executor, _warm_up) for _ in range(self.processes)
+        ])
+        logger.info(f"Extraction pool started with {self.processes} process(es)")
+
+    async def close(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def analyze(self, html: str, page_url: str, domain: str, include_external: bool,
+                      wanted_types: FrozenSet[str] = frozenset(),
+                      policy: QueryPolicy = DEFAULT_POLICY) -> PageAnalysis:
+        analysis, _ = await self.analyze_timed(html, page_url, domain, include_external, wanted_types, policy)
+        return analysis
+
+    async def analyze_timed(self, html: str, page_url: str, domain: str, include_external: bool,
+                            wanted_types: FrozenSet[str] = frozenset(),
+                            policy: QueryPolicy = DEFAULT_POLICY,
+                            with_fingerprint: bool = False) -> Tuple[PageAnalysis, float]:
+        """Like ``analyze``, plus the parser's CPU seconds wherever it ran.
+
+        With ``with_fingerprint`` the page's duplicate-detection fingerprint is
+        computed in the same task and set on the analysis.
+        """
+        if self._executor is None or len(html) < self.min_bytes:
+            self.inline += 1
+            started = time.thread_time()
+            analysis = analyze_page(html, page_url, domain, include_external, wanted_types, policy)
+            cpu = time.thread_time() - started
+            if with_fingerprint:
+                analysis.fingerprint = page_fingerprint(html)
+            return analysis, cpu
+        return await self._run_shared(
+            html, _analyze_shared, page_url, domain, include_external, wanted_types, policy, with_fingerprint
+        )
+
+    async def fingerprint(self, html: str) -> Tuple[int, bytes, int]:
+        """``fingerprint.page_fingerprint`` for pages whose links came from elsewhere"""
+        if self._executor is None or len(html) < self.min_bytes:
+            self.inline += 1
+            return page_fingerprint(html)
+        return await self._run_shared(html, _fingerprint_shared)
+
+    async def _run_shared(self, html: str, function: Callable, *args):
+        data = html.encode('utf-8', errors='replace')
+        shm = shared_memory.SharedMemory(create=True, size=len(data))
+        try:
+            shm.buf[:len(data)] = data
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, function, shm.name, len(data), *args)
+        finally:
+            shm.close()
+            shm.unlink()
+
+        self.offloaded += 1
+        self.offloaded_bytes += len(data)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "processes": self.processes,
+            "min_bytes": self.min_bytes,
+            "pages_offloaded": self.offloaded,
+            "pages_inline": self.inline,
+            "bytes_offloaded": self.offloaded_bytes,
+        }
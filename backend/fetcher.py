@@ -0,0 +1,95 @@
+"""
+Plain HTTP page fetching and the heuristic that decides when a browser is needed
+"""
+
+import asyncio
+import re
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+
+_SCRIPT_STYLE_RE = re.compile(r"<(script|style|noscript|template)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+_WHITESPACE_RE = re.compile(r"\s+")
+_LINK_RE = re.compile(r"<a\s[^>]*href\s*=", re.IGNORECASE)
+_NOSCRIPT_RE = re.compile(r"<noscript\b", re.IGNORECASE)
+_APP_ROOT_RE = re.compile(
+    r"<div[^>]+id\s*=\s*[\"'](root|app|__next|__nuxt|svelte)[\"'][^>]*>\s*</div>",
+    re.IGNORECASE
+)
+
+
+class FetchedPage:
+    """Result of a plain HTTP fetch, shaped like the Crawl4AI result fields we use"""
+
+    def __init__(self, url: str, html: Optional[str] = None, success: bool = True,
+                 status_code: Optional[int] = None, error_message: Optional[str] = None,
+                 response_headers: Optional[Dict[str, str]] = None):
+        self.url = url
+        self.html = html
+        self.success = success
+        self.status_code = status_code
+        self.error_message = error_message
+        self.response_headers = response_headers or {}
+        # Crawl4AI results carry pre-extracted links/media; plain fetches do not
+        self.links = None
+        self.media = None
+        # Served from the local response cache instead of the network
+        self.from_cache = False
+
+
+def visible_text_length(html: str) -> int:
+    text = _SCRIPT_STYLE_RE.sub(" ", html)
+    text = _TAG_RE.sub(" ", text)
+    return len(_WHITESPACE_RE.sub(" ", text).strip())
+
+
+def needs_javascript(html: Optional[str], min_text_chars: int = 200, min_links: int = 3) -> Tuple[bool, str]:
+    """Guess whether a server response is an unrendered JavaScript app shell.
+
+    Returns ``(needs_browser, reason)``. The checks are regex based so they
+    cost far less than the browser render they are trying to avoid.
+    """
+    if not html:
+        return True, "empty_body"
+
+    if _APP_ROOT_RE.search(html):
+        return True, "app_shell"
+
+    text_chars = visible_text_length(html)
+    if _NOSCRIPT_RE.search(html) and text_chars < min_text_chars * 2:
+        return True, "noscript_shell"
+    if text_chars < min_text_chars:
+        return True, "near_empty_body"
+
+    if len(_LINK_RE.findall(html)) < min_links:
+        return True, "too_few_links"
+
+    return False, "static"
+
+
+async def fetch_html(session: aiohttp.ClientSession, url: str,
+                     headers: Optional[Dict[str, str]] = None, timeout: float = 30) -> FetchedPage:
+    """GET a page over the pooled aiohttp session"""
+    try:
+        async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            response_headers = dict(response.headers)
+            if response.status == 304:
+                # Answer to a conditional request: the caller still has the previous version
+                return FetchedPage(url, html=None, status_code=304, response_headers=response_headers)
+            if response.status != 200:
+                return FetchedPage(url, success=False, status_code=response.status,
+                                   error_message=f"HTTP {response.status}",
+                                   response_headers=response_headers)
+
+            mime_type = response.headers.get('content-type', '').split(';')[0].strip()
+            if mime_type and mime_type not in ('text/html', 'application/xhtml+xml'):
+                # Not a page; nothing to parse and nothing a browser would improve
+                return FetchedPage(url, html=None, status_code=response.status,
+                                   response_headers=response_headers)
+
+            html = await response.text(errors='replace')
+            return FetchedPage(url, html=html, status_code=response.status,
+                               response_headers=response_headers)
+    except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeDecodeError) as e:
+        return FetchedPage(url, success=False, error_message=f"Network error: {e!r}")
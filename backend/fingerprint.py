@@ -0,0 +1,150 @@
+"""
+Page content fingerprints (exact hash + SimHash) for duplicate detection
+"""
+
+import hashlib
+import html as html_lib
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+_INVISIBLE = re.compile(r"<(script|style|noscript|template|svg)\b.*?</\1\s*>|<!--.*?-->", re.S | re.I)
+_TAG = re.compile(r"<[^>]+>")
+_WORD = re.compile(r"\w+")
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3
+_LANE = 32  # Bits per counter lane in the bit-sliced accumulator
+
+
+def visible_text(html: str) -> str:
+    """Lowercased words of the text a reader sees: no scripts, styles, comments or markup"""
+    text = _TAG.sub(" ", _INVISIBLE.sub(" ", html))
+    return " ".join(_WORD.findall(html_lib.unescape(text).lower()))
+
+
+def _spread_table(byte_index: int) -> List[int]:
+    """For each byte value, its bits placed one per counter lane at the byte's position"""
+    table = []
+    for value in range(256):
+        spread = 0
+        for bit in range(8):
+            if value >> bit & 1:
+                spread |= 1 << ((byte_index * 8 + bit) * _LANE)
+        table.append(spread)
+    return table
+
+
+_SPREAD = [_spread_table(i) for i in range(SIMHASH_BITS // 8)]
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over word 3-shingles weighted by frequency.
+
+    Instead of looping over 64 bits per shingle, each hash is turned into a
+    big integer with one 32-bit counter lane per bit (eight table lookups)
+    and the lanes are summed with ordinary integer addition.
+    """
+    words = text.split()
+    if len(words) < SHINGLE_SIZE:
+        shingles = Counter([" ".join(words)]) if words else Counter()
+    else:
+        shingles = Counter(" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1))
+    if not shingles:
+        return 0
+
+    t0, t1, t2, t3, t4, t5, t6, t7 = _SPREAD
+    lanes = 0
+    total = 0
+    for shingle, weight in shingles.items():
+        d = hashlib.blake2b(shingle.encode(), digest_size=8).digest()
+        lanes += weight * (t0[d[0]] + t1[d[1]] + t2[d[2]] + t3[d[3]] +
+                           t4[d[4]] + t5[d[5]] + t6[d[6]] + t7[d[7]])
+        total += weight
+
+    mask = (1 << _LANE) - 1
+    fingerprint = 0
+    for bit in range(SIMHASH_BITS):
+        if 2 * (lanes >> (bit * _LANE) & mask) > total:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def page_fingerprint(html: str) -> Tuple[int, bytes, int]:
+    """(word count, blake2b digest, SimHash) of a page's visible text.
+
+    Pure and picklable, so the extraction pool can compute it in a worker
+    process; ``ContentFingerprints.match`` then only does the index lookup.
+    """
+    text = visible_text(html)
+    words = text.count(" ") + 1 if text else 0
+    return words, hashlib.blake2b(text.encode(), digest_size=16).digest(), simhash(text)
+
+
+class ContentFingerprints:
+    """Seen-page index answering "is this page a copy of one already crawled?".
+
+    Exact copies are found by a blake2b hash of the visible text. Near copies
+    are pages whose SimHash differs in at most ``max_distance`` bits; the
+    64-bit fingerprint is split into ``max_distance + 1`` bands, and by the
+    pigeonhole principle any such neighbour shares at least one band exactly,
+    so only pages in matching band buckets are compared.
+    """
+
+    def __init__(self, max_distance: int = 3, min_words: int = 20):
+        self.max_distance = max_distance
+        self.min_words = min_words
+        self.bands = max_distance + 1
+        self.band_bits = SIMHASH_BITS // self.bands
+        self._exact: Dict[bytes, str] = {}
+        self._buckets: List[Dict[int, List[Tuple[int, str]]]] = [{} for _ in range(self.bands)]
+
+        self.pages = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+        self.too_short = 0
+
+    def _band_keys(self, fingerprint: int):
+        mask = (1 << self.band_bits) - 1
+        for band in range(self.bands):
+            yield band, fingerprint >> (band * self.band_bits) & mask
+
+    def match(self, url: str, fingerprint: Tuple[int, bytes, int]) -> Tuple[Optional[str], Optional[str]]:
+        """Look up a page's ``page_fingerprint`` and remember it if new.
+
+        Returns ``(kind, original_url)`` where kind is 'exact' or 'near' for a
+        duplicate, or ``(None, None)`` for a new page. Pages with fewer than
+        ``min_words`` words are never treated as duplicates (empty shells and
+        JavaScript apps all look alike).
+        """
+        self.pages += 1
+        words, digest, simhash_value = fingerprint
+        if words < self.min_words:
+            self.too_short += 1
+            return None, None
+
+        original = self._exact.get(digest)
+        if original is not None:
+            self.exact_duplicates += 1
+            return "exact", original
+
+        for band, key in self._band_keys(simhash_value):
+            for other, other_url in self._buckets[band].get(key, ()):
+                if bin(simhash_value ^ other).count("1") <= self.max_distance:
+                    self.near_duplicates += 1
+                    self._exact[digest] = other_url
+                    return "near", other_url
+
+        self._exact[digest] = url
+        for band, key in self._band_keys(simhash_value):
+            self._buckets[band].setdefault(key, []).append((simhash_value, url))
+        return None, None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pages_fingerprinted": self.pages,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "too_short": self.too_short,
+            "max_distance": self.max_distance,
+        }
@@ -0,0 +1,130 @@
+"""
+Crawl frontier shared by the scraper backends
+"""
+
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class CrawlFrontier:
+    """Queue of URLs waiting to be crawled, kept as one FIFO per host.
+
+    Deques give O(1) enqueue/dequeue and a companion set gives O(1)
+    membership checks, so admitting links stays constant-time no matter how
+    deep the queue grows. A URL can only be queued once at a time. Hosts are
+    served round-robin, and ``pop_ready`` skips hosts that are still inside
+    their politeness window. Deferred URLs wait in a low-priority tier that
+    is only served once every host queue has drained.
+    """
+
+    def __init__(self, seeds: Iterable[str] = ()):
+        self._hosts: "OrderedDict[str, deque]" = OrderedDict()
+        self._deferred: deque = deque()
+        self._queued = set()
+        self._size = 0
+
+        self.enqueued_total = 0
+        self.dequeued_total = 0
+        self.duplicates_skipped = 0
+        self.deferred_total = 0
+        self.peak_depth = 0
+
+        for url in seeds:
+            self.push(url)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._queued
+
+    def push(self, url: str, deferred: bool = False) -> bool:
+        """Queue a URL; returns False if it is already waiting in the frontier"""
+        if url in self._queued:
+            self.duplicates_skipped += 1
+            return False
+
+        if deferred:
+            self._deferred.append(url)
+            self._queued.add(url)
+            self._size += 1
+            self.deferred_total += 1
+            self.peak_depth = max(self.peak_depth, self._size)
+            return True
+
+        self._enqueue(url)
+        self.enqueued_total += 1
+        return True
+
+    def _enqueue(self, url: str):
+        host = urlsplit(url).netloc
+        queue = self._hosts.get(host)
+        if queue is None:
+            queue = self._hosts[host] = deque()
+        queue.append(url)
+        self._queued.add(url)
+        self._size += 1
+        if self._size > self.peak_depth:
+            self.peak_depth = self._size
+
+    def _promote_deferred(self):
+        """Move the deferred tier into the host queues once they are empty"""
+        if self._hosts or not self._deferred:
+            return
+        deferred, self._deferred = self._deferred, deque()
+        for url in deferred:
+            self._queued.discard(url)
+            self._size -= 1
+            self._enqueue(url)
+
+    def _take(self, host: str) -> str:
+        queue = self._hosts[host]
+        url = queue.popleft()
+        if queue:
+            self._hosts.move_to_end(host)
+        else:
+            del self._hosts[host]
+        self._queued.discard(url)
+        self._size -= 1
+        self.dequeued_total += 1
+        return url
+
+    def pop(self) -> Optional[str]:
+        """Dequeue the next URL in host round-robin order, or None when empty"""
+        self._promote_deferred()
+        if not self._hosts:
+            return None
+        return self._take(next(iter(self._hosts)))
+
+    def pop_ready(self, ready_in: Callable[[str], float]) -> Tuple[Optional[str], float]:
+        """Dequeue a URL from the first host whose ``ready_in(host)`` is zero.
+
+        Returns ``(url, 0.0)`` on success, or ``(None, wait)`` where ``wait``
+        is the time until the soonest host becomes ready.
+        """
+        self._promote_deferred()
+        soonest = None
+        for host in self._hosts:
+            wait = ready_in(host)
+            if wait <= 0:
+                return self._take(host), 0.0
+            if soonest is None or wait < soonest:
+                soonest = wait
+        return None, soonest or 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue-depth counters for status updates"""
+        return {
+            "queue_depth": self._size,
+            "queued_hosts": len(self._hosts),
+            "peak_queue_depth": self.peak_depth,
+            "enqueued_total": self.enqueued_total,
+            "dequeued_total": self.dequeued_total,
+            "duplicates_skipped": self.duplicates_skipped,
+            "deferred_depth": len(self._deferred),
+            "deferred_total": self.deferred_total,
+        }
@@ -0,0 +1,184 @@
+"""
+Adaptive (AIMD) per-host concurrency for page fetches and downloads
+"""
+
+import asyncio
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, Optional
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_congestion(status_code: Optional[int], error: Optional[str]) -> bool:
+    """429/5xx responses, timeouts and connection failures"""
+    if status_code is not None:
+        return status_code == 429 or status_code >= 500
+    return bool(error)
+
+
+class HostWindow:
+    """Concurrency limit and recent latency/error samples for one host"""
+
+    def __init__(self, limit: float, window: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.errors: Deque[bool] = deque(maxlen=window)
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        self.increases = 0
+        self.decreases = 0
+        self.retry_after_hits = 0
+
+    def p95(self) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def error_rate(self) -> float:
+        return sum(self.errors) / len(self.errors) if self.errors else 0.0
+
+
+class AdaptiveConcurrency:
+    """Additive-increase / multiplicative-decrease concurrency limit per host.
+
+    Every healthy response grows a host's limit by ``1 / limit`` (about +1
+    per round of requests) while the recent p95 latency is under
+    ``latency_target`` and the error rate under ``error_threshold``. A 429,
+    5xx, timeout or connection failure multiplies it by ``backoff`` (at most
+    once per ``cooldown`` seconds, so one burst of failures counts once), and
+    a Retry-After header also holds the host back for that long.
+    """
+
+    def __init__(self, initial: float = 2, min_limit: float = 1, max_limit: float = 16,
+                 latency_target: float = 2.0, error_threshold: float = 0.05,
+                 backoff: float = 0.5, window: int = 20, cooldown: float = 1.0,
+                 max_retry_after: float = 120):
+        self.initial = initial
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.latency_target = latency_target
+        self.error_threshold = error_threshold
+        self.backoff = backoff
+        self.window = window
+        self.cooldown = cooldown
+        self.max_retry_after = max_retry_after
+        self._hosts: Dict[str, HostWindow] = {}
+        self._released = asyncio.Condition()
+
+    def _host(self, host: str) -> HostWindow:
+        state = self._hosts.get(host)
+        if state is None:
+            state = HostWindow(min(max(self.initial, self.min_limit), self.max_limit), self.window)
+            self._hosts[host] = state
+        return state
+
+    def ready_in(self, host: str) -> float:
+        """0 if a request to ``host`` may start now, else a wait hint in seconds"""
+        state = self._host(host)
+        blocked = state.blocked_until - time.monotonic()
+        if blocked > 0:
+            return blocked
+        if state.in_flight >= int(state.limit):
+            return 1.0  # Woken earlier when a request to the host finishes
+        return 0.0
+
+    def start(self, host: str):
+        self._host(host).in_flight += 1
+
+    async def release(self, host: str):
+        state = self._host(host)
+        state.in_flight = max(0, state.in_flight - 1)
+        async with self._released:
+            self._released.notify_all()
+
+    async def acquire(self, host: str):
+        """Wait for a free slot on ``host`` (used by downloads, which have no frontier)"""
+        async with self._released:
+            while True:
+                wait = self.ready_in(host)
+                if wait <= 0:
+                    self.start(host)
+                    return
+                try:
+                    await asyncio.wait_for(self._released.wait(), timeout=min(wait, 1.0))
+                except asyncio.TimeoutError:
+                    pass
+
+    def observe(self, host: str, latency: Optional[float], status_code: Optional[int] = None,
+                error: Optional[str] = None, retry_after: Optional[str] = None):
+        """Feed one response (or failure) into the host's controller"""
+        state = self._host(host)
+        now = time.monotonic()
+        congested = is_congestion(status_code, error)
+        state.errors.append(congested)
+        if latency is not None and not congested:
+            state.latencies.append(latency)
+
+        delay = parse_retry_after(retry_after) if status_code in (429, 503) else None
+        if delay:
+            state.retry_after_hits += 1
+            state.blocked_until = max(state.blocked_until, now + min(delay, self.max_retry_after))
+
+        if congested or delay:
+            if now - state.last_decrease >= self.cooldown:
+                state.limit = max(self.min_limit, state.limit * self.backoff)
+                state.last_decrease = now
+                state.decreases += 1
+            return
+
+        p95 = state.p95()
+        healthy = (p95 is None or p95 <= self.latency_target) and state.error_rate() <= self.error_threshold
+        if healthy and state.limit < self.max_limit:
+            before = int(state.limit)
+            state.limit = min(self.max_limit, state.limit + 1.0 / state.limit)
+            if int(state.limit) > before:
+                state.increases += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-host controller state for status updates"""
+        now = time.monotonic()
+        hosts = {}
+        for host, state in self._hosts.items():
+            p95 = state.p95()
+            hosts[host] = {
+                "limit": int(state.limit),
+                "in_flight": state.in_flight,
+                "p95_latency_ms": round(p95 * 1000, 1) if p95 is not None else None,
+                "error_rate": round(state.error_rate(), 3),
+                "blocked_for": round(max(0.0, state.blocked_until - now), 1),
+            }
+        return hosts
+
+    def stats(self) -> Dict[str, Any]:
+        hosts = self.snapshot()
+        for host, state in self._hosts.items():
+            hosts[host].update(
+                increases=state.increases,
+                decreases=state.decreases,
+                retry_after_hits=state.retry_after_hits,
+            )
+        return {
+            "initial_limit": self.initial,
+            "max_limit": self.max_limit,
+            "latency_target_ms": self.latency_target * 1000,
+            "hosts": hosts,
+        }
@@ -0,0 +1,122 @@
+"""
+App-wide pooled aiohttp client for downloads and plain page fetches
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class SharedHttpClient:
+    """One ClientSession with a tuned TCPConnector, shared by every scrape session.
+
+    Keep-alive connections and cached DNS lookups are reused across sessions
+    instead of being thrown away when each session's own ClientSession
+    closes, and the per-host limit stops one crawl from opening unbounded
+    sockets to a single origin.
+    """
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 8,
+                 dns_cache_ttl: int = 300, keepalive_timeout: float = 30,
+                 timeout: float = 30):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.dns_cache_hits = 0
+        self.dns_cache_misses = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+
+    @property
+    def session(self) -> Optional[aiohttp.ClientSession]:
+        return self._session
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self.requests += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            self.connections_created += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self.connections_reused += 1
+
+        async def on_dns_cache_hit(session, ctx, params):
+            self.dns_cache_hits += 1
+
+        async def on_dns_cache_miss(session, ctx, params):
+            self.dns_cache_misses += 1
+
+        async def on_connection_queued_start(session, ctx, params):
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+
+        async def on_connection_queued_end(session, ctx, params):
+            self.waiting -= 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace.on_dns_cache_miss.append(on_dns_cache_miss)
+        trace.on_connection_queued_start.append(on_connection_queued_start)
+        trace.on_connection_queued_end.append(on_connection_queued_end)
+        return trace
+
+    async def start(self):
+        """Create the pooled session; called from the FastAPI lifespan"""
+        self._connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            use_dns_cache=True,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=self._connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            trace_configs=[self._trace_config()],
+        )
+        logger.info(f"Shared HTTP client started (limit={self.limit}, per host={self.limit_per_host})")
+
+    async def close(self):
+        if self._session:
+            await self._session.close()
+        self._session = None
+        self._connector = None
+
+    def stats(self) -> Dict[str, Any]:
+        in_use = None
+        if self._connector is not None:
+            # aiohttp does not expose this publicly; tolerate the attribute moving
+            acquired = getattr(self._connector, "_acquired", None)
+            in_use = len(acquired) if acquired is not None else None
+        connections = self.connections_created + self.connections_reused
+        return {
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "dns_cache_ttl": self.dns_cache_ttl,
+            "in_use": in_use,
+            "waiters": self.waiting,
+            "peak_waiters": self.peak_waiting,
+            "requests": self.requests,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "reuse_ratio": round(self.connections_reused / connections, 3) if connections else 0.0,
+            "dns_cache_hits": self.dns_cache_hits,
+            "dns_cache_misses": self.dns_cache_misses,
+        }
@@ -5,8 +5,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, HttpUrl
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any, Set, Tuple
 import asyncio
+import gc
 import json
 import time
 from datetime import datetime, timedelta
@@ -16,20 +17,53 @@ import aiohttp
 import aiofiles
 from pathlib import Path
 import mimetypes
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 
 # Crawl4AI imports
 try:
     from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
-    from bs4 import BeautifulSoup
     CRAWL4AI_AVAILABLE = True
 except ImportError as e:
     print(f"Warning: Crawl4AI not available: {e}")
     print("Please install Crawl4AI by running: pip install -U crawl4ai && crawl4ai-setup")
     CRAWL4AI_AVAILABLE = False
 
+# Batched multi-tab rendering needs a Crawl4AI release with dispatchers
+try:
+    from crawl4ai import MemoryAdaptiveDispatcher
+except ImportError:
+    MemoryAdaptiveDispatcher = None
+
 import logging
 
+from config import config
+from frontier import CrawlFrontier
+from politeness import HostScheduler
+from checkpoint import CheckpointStore, CrawlCheckpoint
+from fetcher import FetchedPage, fetch_html, needs_javascript
+from browser_pool import BrowserPool
+from http_client import SharedHttpClient
+from extraction import (
+    ExtractionStats, PageAnalysis, PageExtraction, analyze_crawler_result, analyze_page, analyze_urls,
+    classify_content, extract_page, wanted_content_types
+)
+from extraction_pool import ExtractionPool
+from canonicalize import build_query_policy, canonical_host, canonicalize_url
+from robots import RobotsCache, robots_agent
+from sitemaps import SitemapReader, default_sitemaps
+from host_concurrency import AdaptiveConcurrency
+from crawl_traps import TrapFilter
+from fingerprint import ContentFingerprints, page_fingerprint
+from memory_governor import HARD, SOFT, MemoryGovernor, ResultSpill
+from download_pipeline import DownloadPipeline, DownloadSlots
+from download_stream import GENERIC_MIME_TYPES, TEXT_HEAD_BYTES, StreamedDownload
+from response_cache import (
+    CacheSessionStats, ResponseCache, cache_key, cache_reads, cache_writes, split_headers
+)
+from validators import RevalidationStats, Validator, ValidatorStore, content_hash
+from url_sets import CompactUrlSet, UrlSet, make_url_set, remove_spill_dir
+from crawl_profiles import PageLoadStats, current_page_load_stats, get_profile, install_profile_hooks
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -55,6 +89,24 @@ class ScrapeRequest(BaseModel):
     scrape_whole_site: bool = False
     download_content: bool = False
     content_types: List[ContentType] = []
+    concurrency: int = 1  # Number of pages crawled in parallel
+    fetch_mode: Literal["browser", "hybrid", "http"] = "browser"  # 'browser', 'hybrid' (HTTP first, browser if needed) or 'http'
+    render_mode: Literal["page", "batch"] = "page"  # 'page' (one arun per worker) or 'batch' (arun_many over frontier batches)
+    batch_size: int = 20  # URLs handed to arun_many at once in batch render mode
+    crawl_profile: Literal["fast", "balanced", "full"] = "full"  # 'fast', 'balanced' or 'full': which browser resources to block
+    extraction_mode: Literal["crawler", "parser"] = "crawler"  # 'crawler' (reuse Crawl4AI links/media, parse as fallback) or 'parser'
+    allowed_query_params: List[str] = []  # If set, only these query parameters are kept on discovered URLs
+    denied_query_params: List[str] = []  # Dropped in addition to the built-in tracking/session parameters
+    download_concurrency: int = 4  # Files downloaded in parallel, alongside page crawling
+    cache_mode: Literal["bypass", "read-only", "read-write", "refresh"] = "bypass"  # Local response cache: 'bypass', 'read-only', 'read-write' or 'refresh' (refetch and store)
+    conditional_requests: bool = True  # Revalidate pages/downloads from earlier sessions (ETag, Last-Modified, content hash)
+    trap_detection: bool = True  # Reject over-long, over-deep, self-repeating and heavily faceted URLs
+    path_budgets: Dict[str, int] = {}  # Max URLs queued under a path prefix, e.g. {"/calendar/": 50}
+    duplicate_page_links: Literal["defer", "skip", "follow"] = "defer"  # Links on exact/near-duplicate pages: 'defer' (crawl last), 'skip' or 'follow'
+    adaptive_concurrency: bool = False  # Per-host AIMD limit driven by latency, errors and Retry-After, starting at concurrency
+    use_sitemaps: bool = False  # Seed the frontier from robots.txt / sitemap.xml sitemaps and size the crawl from them
+    respect_robots: bool = True  # Skip URLs disallowed by robots.txt and honor its Crawl-delay
+    compact_url_sets: bool = False  # Bloom/HyperLogLog URL sets with exact lists spilled to disk, for very large crawls
 
 class ScrapedContent(BaseModel):
     url: str
@@ -82,6 +134,12 @@ class ScrapeStatus(BaseModel):
     started_at: datetime
     ended_at: Optional[datetime] = None
     estimated_total_pages: Optional[int] = None
+    queue_depth: int = 0
+    frontier_stats: Dict[str, Any] = {}
+    fetch_engines: Dict[str, int] = {}
+    host_concurrency: Dict[str, Any] = {}  # Adaptive per-host limits, when enabled
+    memory_pressure: str = "normal"  # Memory governor level: 'normal', 'soft' or 'hard'
+    downloads: Dict[str, Any] = {}  # Download pipeline: queue depth, in flight and throughput
 
 class ScrapeResult(BaseModel):
     session_id: str
@@ -96,6 +154,23 @@ class ScrapeResult(BaseModel):
 active_sessions: Dict[str, Dict] = {}
 session_results: Dict[str, ScrapeResult] = {}
 websocket_connections: Dict[str, WebSocket] = {}
+running_scrapers: Dict[str, "EnhancedWebScraperManager"] = {}
+checkpoint_store: Optional[CheckpointStore] = None
+browser_pool: Optional[BrowserPool] = None
+http_client: Optional[SharedHttpClient] = None
+extraction_pool: Optional[ExtractionPool] = None
+robots_cache: Optional[RobotsCache] = None
+validator_store: Optional[ValidatorStore] = None
+response_cache: Optional[ResponseCache] = None
+download_slots: Optional[DownloadSlots] = None
+
+def create_browser_config():
+    """Browser settings shared by pooled and per-session crawlers"""
+    return BrowserConfig(
+        headless=True,
+        browser_type="chromium",
+        verbose=False  # Reduce noise
+    )
 
 # Session cleanup utility
 async def cleanup_old_sessions():
@@ -111,8 +186,19 @@ async def cleanup_old_sessions():
 
     for session_id in sessions_to_remove:
         session_results.pop(session_id, None)
+        remove_spill_dir(os.path.join(config.URL_SPILL_DIR, session_id))
+        if checkpoint_store:
+            await checkpoint_store.delete(session_id)
         logger.info(f"Cleaned up old session: {session_id}")
 
+    # Checkpoints of stopped/failed sessions are resumable until they expire
+    if checkpoint_store:
+        expired = await checkpoint_store.delete_older_than(
+            current_time - timedelta(hours=config.CHECKPOINT_RETENTION_HOURS), keep=set(running_scrapers)
+        )
+        if expired:
+            logger.info(f"Deleted {len(expired)} expired checkpoints")
+
     # Clean up orphaned active sessions (older than 1 hour)
     active_cutoff = current_time - timedelta(hours=1)
     active_to_remove = []
@@ -127,7 +213,7 @@ async def cleanup_old_sessions():
 
 # Schedule periodic cleanup
 import asyncio
-from contextlib import asynccontextmanager
+from contextlib import aclosing, asynccontextmanager
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -141,10 +227,113 @@ async def lifespan(app: FastAPI):
                 logger.error(f"Error in periodic cleanup: {e}")
                 await asyncio.sleep(3600)
 
+    global checkpoint_store, browser_pool, http_client, extraction_pool, robots_cache, validator_store, response_cache
+    global download_slots
+    client = SharedHttpClient(
+        limit=config.HTTP_POOL_LIMIT,
+        limit_per_host=config.HTTP_POOL_LIMIT_PER_HOST,
+        dns_cache_ttl=config.HTTP_DNS_CACHE_TTL,
+        keepalive_timeout=config.HTTP_KEEPALIVE_TIMEOUT,
+        timeout=config.DEFAULT_TIMEOUT
+    )
+    await client.start()
+    http_client = client
+
+    try:
+        store = CheckpointStore(
+            config.CHECKPOINT_DB_PATH,
+            batch_size=config.CHECKPOINT_BATCH_SIZE,
+            flush_interval=config.CHECKPOINT_FLUSH_INTERVAL
+        )
+        await store.open()
+        checkpoint_store = store
+    except Exception as e:
+        logger.error(f"Checkpoint store unavailable, sessions will not be resumable: {e}")
+
+    robots_cache = RobotsCache(
+        config.ROBOTS_CACHE_DB_PATH,
+        ttl=config.ROBOTS_CACHE_TTL,
+        error_ttl=config.ROBOTS_ERROR_TTL,
+        timeout=config.ROBOTS_FETCH_TIMEOUT
+    )
+    try:
+        await robots_cache.open()
+    except Exception as e:
+        logger.error(f"robots.txt disk cache unavailable, caching in memory only: {e}")
+
+    try:
+        store = ValidatorStore(
+            config.VALIDATOR_DB_PATH,
+            batch_size=config.VALIDATOR_BATCH_SIZE,
+            flush_interval=config.VALIDATOR_FLUSH_INTERVAL
+        )
+        await store.open()
+        validator_store = store
+    except Exception as e:
+        logger.error(f"Validator store unavailable, recrawls will not send conditional requests: {e}")
+
+    cache = ResponseCache(
+        config.RESPONSE_CACHE_DIR,
+        max_bytes=config.RESPONSE_CACHE_MAX_MB * 1024 * 1024,
+        level=config.RESPONSE_CACHE_COMPRESSION_LEVEL
+    )
+    try:
+        await cache.open()
+        response_cache = cache
+    except Exception as e:
+        logger.error(f"Response cache unavailable, cache_mode will behave like 'bypass': {e}")
+
+    download_slots = DownloadSlots(config.DOWNLOAD_GLOBAL_CONCURRENCY)
+
+    if CRAWL4AI_AVAILABLE and config.BROWSER_POOL_SIZE > 0:
+        pool = BrowserPool(
+            lambda: AsyncWebCrawler(config=create_browser_config()),
+            size=config.BROWSER_POOL_SIZE,
+            sessions_per_browser=config.BROWSER_POOL_SESSIONS_PER_BROWSER,
+            max_leases=config.BROWSER_POOL_MAX_LEASES,
+            max_age=config.BROWSER_POOL_MAX_AGE,
+            health_check_interval=config.BROWSER_POOL_HEALTH_INTERVAL
+        )
+        try:
+            await pool.start()
+            browser_pool = pool
+        except Exception as e:
+            logger.error(f"Browser pool unavailable, sessions will start their own browser: {e}")
+            await pool.close()
+
+    if config.EXTRACTION_PROCESSES > 0:
+        pool = ExtractionPool(config.EXTRACTION_PROCESSES, min_bytes=config.EXTRACTION_OFFLOAD_MIN_BYTES)
+        try:
+            await pool.start()
+            extraction_pool = pool
+        except Exception as e:
+            logger.error(f"Extraction pool unavailable, parsing inline: {e}")
+            await pool.close()
+
     cleanup_task = asyncio.create_task(periodic_cleanup())
     yield
     # Shutdown
     cleanup_task.cancel()
+    if browser_pool:
+        await browser_pool.close()
+        browser_pool = None
+    if http_client:
+        await http_client.close()
+        http_client = None
+    if extraction_pool:
+        await extraction_pool.close()
+        extraction_pool = None
+    if checkpoint_store:
+        await checkpoint_store.close()
+        checkpoint_store = None
+    if robots_cache:
+        await robots_cache.close()
+        robots_cache = None
+    if validator_store:
+        await validator_store.close()
+        validator_store = None
+    response_cache = None
+    download_slots = None
 
 # Update app initialization
 app = FastAPI(
@@ -171,85 +360,244 @@ app.add_middleware(
 # Serve downloaded files
 app.mount("/downloads", StaticFiles(directory="downloads"), name="downloads")
 
+class CrawlSessionState:
+    """Mutable state shared by the page workers of a single scrape session"""
+
+    def __init__(self, session_id: str, request: ScrapeRequest, websocket: Optional[WebSocket] = None,
+                 checkpoint: Optional[CrawlCheckpoint] = None):
+        self.session_id = session_id
+        self.request = request
+        self.websocket = websocket
+        # Every URL entering the frontier is canonicalized with this session's query policy
+        self.url_policy = build_query_policy(
+            request.allowed_query_params or config.CANONICAL_ALLOWED_QUERY_PARAMS,
+            [*config.CANONICAL_DENIED_QUERY_PARAMS, *request.denied_query_params],
+            config.CANONICAL_STRIP_TRAILING_SLASH
+        )
+        self.start_url = canonicalize_url(str(request.url), self.url_policy) or str(request.url)
+        self.domain = canonical_host(self.start_url)
+
+        # Plain sets, or Bloom filter + HyperLogLog sets whose exact lists live on disk
+        self.spill_dir = os.path.join(config.URL_SPILL_DIR, session_id)
+        compact = request.compact_url_sets
+        self.found_urls = self.make_url_set(compact, "found.txt")
+        self.external_urls = self.make_url_set(compact, "external.txt")
+        self.crawled_urls = self.make_url_set(compact, None)
+        self.in_progress = set()
+        self.scraped_content: List[ScrapedContent] = []
+        self.to_crawl = CrawlFrontier([self.start_url])
+        # Per-host politeness: request.delay applies to each host independently
+        self.scheduler = HostScheduler(request.delay)
+        # Optional AIMD per-host concurrency on top of the politeness delay
+        self.host_limits: Optional[AdaptiveConcurrency] = None
+        if request.adaptive_concurrency:
+            self.host_limits = AdaptiveConcurrency(
+                initial=max(1, request.concurrency),
+                max_limit=config.ADAPTIVE_MAX_CONCURRENCY_PER_HOST,
+                latency_target=config.ADAPTIVE_LATENCY_TARGET,
+                error_threshold=config.ADAPTIVE_ERROR_THRESHOLD,
+                backoff=config.ADAPTIVE_BACKOFF_FACTOR,
+                max_retry_after=config.ADAPTIVE_MAX_RETRY_AFTER
+            )
+
+        self.pages_scraped = 0
+        self.pages_dispatched = 0
+        self.max_pages = request.max_pages if request.max_pages > 0 else 1000
+
+        # Which engine served each page, and why hybrid mode fell back to the browser
+        self.fetch_engines = {"http": 0, "browser": 0, "cache": 0}
+        self.browser_fallbacks: Dict[str, int] = {}
+        # Resource blocking profile plus bytes saved / time-to-DOM per rendered page
+        self.page_loads = PageLoadStats(get_profile(request.crawl_profile), self.domain)
+        # robots.txt: product token matched against User-agent groups, and what it blocked
+        self.robots_agent = robots_agent(request.user_agent, config.ROBOTS_USER_AGENT)
+        self.robots_blocked = self.make_url_set(compact, None)  # Distinct URLs disallowed, each judged once
+        self.robots_crawl_delays: Dict[str, Optional[float]] = {}
+        # Sitemap seeding (use_sitemaps): reader stats and same-site URLs listed
+        self.sitemaps: Optional[SitemapReader] = None
+        self.sitemap_urls = 0
+        self.sitemap_partial = False  # The walk stopped early, so sitemap_urls is a lower bound
+        self.sitemap_seeded = 0
+        # Where page links came from and the CPU spent getting them
+        self.extraction = ExtractionStats(request.extraction_mode, config.EXTRACTION_CPU_SAMPLE_EVERY)
+        # Exact + SimHash fingerprints of visible text; links on duplicate pages are deferred or skipped
+        self.fingerprints: Optional[ContentFingerprints] = None
+        if request.duplicate_page_links != "follow":
+            self.fingerprints = ContentFingerprints(config.SIMHASH_MAX_DISTANCE, config.SIMHASH_MIN_WORDS)
+        self.duplicate_links_skipped = 0
+        # What conditional requests against the shared validator store saved
+        self.revalidation = RevalidationStats() if request.conditional_requests else None
+        # Local response cache (pages, rendered pages and downloads) under request.cache_mode
+        self.cache = CacheSessionStats(request.cache_mode) if request.cache_mode != "bypass" else None
+        # Crawl-trap heuristics and per-prefix budgets; rejected URLs are remembered so they are judged once
+        self.traps: Optional[TrapFilter] = None
+        if request.trap_detection or request.path_budgets:
+            self.traps = TrapFilter(
+                max_depth=config.TRAP_MAX_PATH_DEPTH if request.trap_detection else 0,
+                max_segment_repeats=config.TRAP_MAX_SEGMENT_REPEATS if request.trap_detection else 0,
+                max_url_length=config.TRAP_MAX_URL_LENGTH if request.trap_detection else 0,
+                max_query_params=config.TRAP_MAX_QUERY_PARAMS if request.trap_detection else 0,
+                prefix_budgets=request.path_budgets,
+                default_budget=config.TRAP_DEFAULT_PREFIX_BUDGET if request.trap_detection else 0
+            )
+        self.trap_rejected = self.make_url_set(compact, None)
+        # Memory governor: cap on pages in flight (None = no cap, 0 = paused) and results moved to disk
+        self.memory = MemoryGovernor(
+            config.MEMORY_SOFT_RSS_MB, config.MEMORY_HARD_RSS_MB,
+            config.MEMORY_SOFT_SYSTEM_PERCENT, config.MEMORY_HARD_SYSTEM_PERCENT
+        )
+        self.dispatch_limit: Optional[int] = None
+        # Download stage running alongside page crawling, created by the manager when downloads are on
+        self.downloads: Optional[DownloadPipeline] = None
+        self.result_spill = ResultSpill(os.path.join(self.spill_dir, "results.jsonl"))
+
+        # Restore a resumed session; already-crawled pages are never fetched again
+        if checkpoint:
+            self.found_urls.update(checkpoint.found)
+            self.external_urls.update(checkpoint.external)
+            self.crawled_urls.update(checkpoint.crawled)
+            self.to_crawl = CrawlFrontier(checkpoint.queued)
+            self.pages_scraped = self.pages_dispatched = len(checkpoint.crawled)
+
+        self.status = ScrapeStatus(
+            session_id=session_id,
+            status="running",
+            started_at=datetime.now(),
+            pages_scraped=self.pages_scraped,
+            urls_found=len(self.found_urls),
+            external_urls_found=len(self.external_urls),
+            content_downloaded=0
+        )
+
+        # Workers wait on this when the frontier is empty but pages are still in flight
+        self.frontier_changed = asyncio.Condition()
+        # Starlette WebSockets must not be written to concurrently
+        self.send_lock = asyncio.Lock()
+
+    def make_url_set(self, compact: bool, spill_name: Optional[str]) -> UrlSet:
+        return make_url_set(
+            compact,
+            os.path.join(self.spill_dir, spill_name) if spill_name else None,
+            config.URL_SET_CAPACITY, config.URL_SET_ERROR_RATE, config.URL_SET_HLL_PRECISION
+        )
+
+    def url_set_stats(self) -> Dict[str, Any]:
+        return {
+            name: urls.stats()
+            for name, urls in (("found", self.found_urls), ("external", self.external_urls),
+                               ("crawled", self.crawled_urls))
+            if isinstance(urls, CompactUrlSet)
+        }
+
+    def close_url_sets(self):
+        for urls in (self.found_urls, self.external_urls, self.crawled_urls, self.trap_rejected,
+                     self.robots_blocked):
+            if isinstance(urls, CompactUrlSet):
+                urls.close()
+        self.result_spill.close()
+
+    def content_count(self) -> int:
+        return self.result_spill.count + len(self.scraped_content)
+
+    def spill_results(self) -> int:
+        """Move downloaded-content records to disk; returns how many were moved"""
+        moved = len(self.scraped_content)
+        if moved:
+            self.result_spill.extend([c.model_dump(mode='json') for c in self.scraped_content])
+            self.scraped_content.clear()
+        return moved
+
+    def all_scraped_content(self) -> List[ScrapedContent]:
+        """Spilled records (read back from disk) followed by the in-memory ones"""
+        return [ScrapedContent(**record) for record in self.result_spill] + self.scraped_content
+
+
 class EnhancedWebScraperManager:
     def __init__(self):
         self.active_crawlers: Dict[str, bool] = {}
+        self.schedulers: Dict[str, HostScheduler] = {}
+        self.host_limits: Dict[str, AdaptiveConcurrency] = {}
+        self.revalidation: Dict[str, RevalidationStats] = {}
+        self.cache_stats: Dict[str, CacheSessionStats] = {}
         self.session = None
+        self.owns_session = False
     
     async def __aenter__(self):
         if not CRAWL4AI_AVAILABLE:
             raise RuntimeError("Crawl4AI is not available. Please install it first.")
-        self.session = aiohttp.ClientSession()
+        # Prefer the app-wide pooled client; a private session is only used outside the app lifespan
+        if http_client and http_client.session:
+            self.session = http_client.session
+        else:
+            self.session = aiohttp.ClientSession()
+            self.owns_session = True
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        if self.session and self.owns_session:
             await self.session.close()
     
     def get_content_type(self, url: str, mime_type: str = None) -> str:
         """Determine content type based on URL and MIME type"""
-        url_lower = url.lower()
-        
-        if mime_type:
-            if mime_type.startswith('image/'):
-                return 'image'
-            elif mime_type == 'application/pdf':
-                return 'pdf'
-            elif mime_type.startswith('video/'):
-                return 'video'
-            elif mime_type.startswith('audio/'):
-                return 'audio'
-            elif mime_type in ['application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document']:
-                return 'document'
-        
-        # Fallback to extension-based detection
-        if any(ext in url_lower for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.bmp']):
-            return 'image'
-        elif url_lower.endswith('.pdf'):
-            return 'pdf'
-        elif any(ext in url_lower for ext in ['.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm']):
-            return 'video'
-        elif any(ext in url_lower for ext in ['.mp3', '.wav', '.m4a', '.flac', '.ogg']):
-            return 'audio'
-        elif any(ext in url_lower for ext in ['.doc', '.docx', '.txt', '.rtf', '.odt']):
-            return 'document'
-        
-        return 'other'
+        return classify_content(url, mime_type)
     
     def should_download_content(self, url: str, content_types: List[ContentType]) -> bool:
         """Check if content should be downloaded based on enabled types"""
-        content_type = self.get_content_type(url)
-        
-        for ct in content_types:
-            if not ct.enabled:
-                continue
-                
-            # Map content type IDs to actual types
-            type_mapping = {
-                'images': 'image',
-                'pdfs': 'pdf',
-                'videos': 'video',
-                'audio': 'audio',
-                'documents': 'document'
-            }
-            
-            if type_mapping.get(ct.id) == content_type:
-                return True
-        
-        return False
+        return self.get_content_type(url) in self.wanted_content_types(content_types)
+
+    def wanted_content_types(self, content_types: List[ContentType]):
+        return wanted_content_types(ct.id for ct in content_types if ct.enabled)
     
     async def download_content(self, url: str, session_id: str) -> Optional[ScrapedContent]:
         """Download content from URL and save locally with security checks"""
+        host_limits = None
         try:
             # Security: Validate URL scheme
             if not url.startswith(('http://', 'https://')):
                 logger.warning(f"Invalid URL scheme for {url}")
                 return None
 
-            # Security: Set maximum file size (50MB)
-            MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
-
-            async with self.session.get(url, timeout=30) as response:
+            # Local response cache: a hit never contacts the host
+            cache = self.cache_stats.get(session_id)
+            cache_entry = cache_key("http", canonicalize_url(url) or url)
+            if cache and response_cache and cache_reads(cache.mode):
+                entry = await response_cache.get(cache_entry)
+                if entry is not None and entry.status == 200:
+                    cache.hit("download", len(entry.body))
+                    mime_type = entry.headers.get('content-type', '').split(';')[0]
+                    return await self.save_download(
+                        url, session_id, mime_type, self.get_content_type(url, mime_type), entry.body
+                    )
+                cache.misses += 1
+
+            # Politeness: downloads share the per-host token buckets of the session
+            host = urlparse(url).netloc
+            scheduler = self.schedulers.get(session_id)
+            if scheduler:
+                await scheduler.acquire(host)
+            # Adaptive concurrency: downloads count against the same per-host limit as pages
+            limits = self.host_limits.get(session_id)
+            if limits:
+                await limits.acquire(host)
+                host_limits = limits
+
+            # Revalidation: a file saved by an earlier session is reused if the server says it is unchanged
+            revalidation = self.revalidation.get(session_id)
+            validator = await self.download_validator(url) if revalidation else None
+            request_headers = validator.conditional_headers() if validator else None
+            if request_headers:
+                revalidation.conditional_requests += 1
+
+            started = time.monotonic()
+            async with self.session.get(url, timeout=30, headers=request_headers) as response:
+                latency = time.monotonic() - started
+                if host_limits:
+                    host_limits.observe(host, latency, response.status,
+                                        retry_after=response.headers.get('Retry-After'))
+                if response.status == 304 and validator:
+                    revalidation.downloads_reused += 1
+                    revalidation.not_modified_saved(validator, latency)
+                    return await self.reused_content(url, validator)
                 if response.status != 200:
                     return ScrapedContent(
                         url=url,
@@ -265,81 +613,80 @@ class EnhancedWebScraperManager:
                 content_type = self.get_content_type(url, mime_type)
 
                 # Security: Check file size before downloading
-                if content_length and int(content_length) > MAX_FILE_SIZE:
+                if content_length and int(content_length) > config.MAX_FILE_SIZE:
                     return ScrapedContent(
                         url=url,
                         content_type=content_type,
                         downloaded_at=datetime.now(),
                         success=False,
-                        error=f"File too large: {content_length} bytes (max: {MAX_FILE_SIZE})"
+                        error=f"File too large: {content_length} bytes (max: {config.MAX_FILE_SIZE})"
                     )
                 
-                # Create session download directory
+                # Stream the body to disk, enforcing the size limit as the bytes arrive
                 session_dir = DOWNLOADS_DIR / session_id
                 session_dir.mkdir(exist_ok=True)
+                async with StreamedDownload(str(session_dir / f".{uuid.uuid4().hex}.part"), config.MAX_FILE_SIZE) as body:
+                    async for chunk in response.content.iter_chunked(config.DOWNLOAD_CHUNK_SIZE):
+                        if not await body.write(chunk):
+                            return ScrapedContent(
+                                url=url,
+                                content_type=content_type,
+                                downloaded_at=datetime.now(),
+                                success=False,
+                                error=f"File too large: download stopped at the limit (max: {config.MAX_FILE_SIZE})"
+                            )
+                    await body.finish()
+                    fetch_ms = (time.monotonic() - started) * 1000
+
+                    # Servers often label files generically; trust the sniffed bytes then
+                    if mime_type in GENERIC_MIME_TYPES and body.sniffed_mime:
+                        mime_type = body.sniffed_mime
+                        content_type = self.get_content_type(url, mime_type)
+
+                    if cache and response_cache and cache_writes(cache.mode) and \
+                            body.size <= config.RESPONSE_CACHE_MAX_ENTRY_MB * 1024 * 1024:
+                        try:
+                            await response_cache.put_file(cache_entry, url, response.status,
+                                                          split_headers(response.headers), body.path)
+                            cache.stores += 1
+                        except OSError as e:
+                            logger.warning(f"Could not cache {url}: {e!r}")
+
+                    if validator and body.digest == validator.content_hash:
+                        # Same bytes as the file already on disk: keep that one instead of writing a copy
+                        revalidation.unchanged_reused(validator)
+                        revalidation.downloads_reused += 1
+                        validator_store.record(Validator.from_headers(
+                            url, "file", response.headers, body.digest, body.size, fetch_ms, validator.payload
+                        ))
+                        return await self.reused_content(url, validator)
+
+                    file_path, safe_filename = self.download_path(url, session_id, mime_type)
+                    body.commit(str(file_path))
+
+                content = self.downloaded_content(url, session_id, safe_filename, mime_type, content_type,
+                                                  body.size, body.head)
+                if revalidation and validator_store:
+                    validator_store.record(Validator.from_headers(
+                        url, "file", response.headers, body.digest, body.size, fetch_ms, {
+                            "file_path": content.file_path,
+                            "local_path": str(file_path),
+                            "mime_type": mime_type,
+                            "content_type": content_type,
+                        }
+                    ))
+                return content
                 
-                # Generate filename
-                parsed_url = urlparse(url)
-                filename = os.path.basename(parsed_url.path) or f"content_{int(time.time())}"
-                if not os.path.splitext(filename)[1] and mime_type:
-                    ext = mimetypes.guess_extension(mime_type)
-                    if ext:
-                        filename += ext
-                
-                file_path = session_dir / filename
-                
-                # Download content with size check
-                content_data = await response.read()
-
-                # Security: Double-check actual file size
-                if len(content_data) > MAX_FILE_SIZE:
-                    return ScrapedContent(
-                        url=url,
-                        content_type=content_type,
-                        downloaded_at=datetime.now(),
-                        success=False,
-                        error=f"File too large: {len(content_data)} bytes (max: {MAX_FILE_SIZE})"
-                    )
-
-                # Security: Validate filename to prevent path traversal
-                safe_filename = os.path.basename(filename).replace('..', '')
-                if not safe_filename:
-                    safe_filename = f"content_{int(time.time())}"
-
-                file_path = session_dir / safe_filename
-
-                async with aiofiles.open(file_path, 'wb') as f:
-                    await f.write(content_data)
-                
-                # Extract additional metadata
-                title = None
-                description = None
-                text_content = None
-                
-                if content_type == 'text' or (mime_type and mime_type.startswith('text/')):
-                    text_content = content_data.decode('utf-8', errors='ignore')[:5000]  # First 5000 chars
-                
-                return ScrapedContent(
-                    url=url,
-                    content_type=content_type,
-                    file_path=f"/downloads/{session_id}/{filename}",
-                    file_size=len(content_data),
-                    mime_type=mime_type,
-                    title=title,
-                    description=description,
-                    text_content=text_content,
-                    downloaded_at=datetime.now(),
-                    success=True
-                )
-                
-        except aiohttp.ClientError as e:
-            logger.error(f"Network error downloading {url}: {e}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Network error downloading {url}: {e!r}")
+            if host_limits:
+                host_limits.observe(host, None, error=repr(e))
             return ScrapedContent(
                 url=url,
                 content_type='other',
                 downloaded_at=datetime.now(),
                 success=False,
-                error=f"Network error: {str(e)}"
+                error=f"Network error: {e!r}"
             )
         except Exception as e:
             logger.error(f"Unexpected error downloading {url}: {e}")
@@ -352,81 +699,948 @@ class EnhancedWebScraperManager:
                 success=False,
                 error=f"Unexpected error: {str(e)}"
             )
+        finally:
+            if host_limits:
+                await host_limits.release(host)
     
+    def download_path(self, url: str, session_id: str, mime_type: str) -> Tuple[Path, str]:
+        """Where a download is saved in the session's download directory, and its file name"""
+        # Create session download directory
+        session_dir = DOWNLOADS_DIR / session_id
+        session_dir.mkdir(exist_ok=True)
+
+        # Generate filename
+        parsed_url = urlparse(url)
+        filename = os.path.basename(parsed_url.path) or f"content_{int(time.time())}"
+        if not os.path.splitext(filename)[1] and mime_type:
+            ext = mimetypes.guess_extension(mime_type)
+            if ext:
+                filename += ext
+
+        # Security: Validate filename to prevent path traversal
+        safe_filename = os.path.basename(filename).replace('..', '')
+        if not safe_filename:
+            safe_filename = f"content_{int(time.time())}"
+
+        return session_dir / safe_filename, safe_filename
+
+    def downloaded_content(self, url: str, session_id: str, safe_filename: str, mime_type: str,
+                           content_type: str, size: int, head: bytes) -> ScrapedContent:
+        """The ScrapedContent of a saved file; ``head`` holds its first bytes"""
+        # Extract additional metadata
+        title = None
+        description = None
+        text_content = None
+
+        if content_type == 'text' or (mime_type and mime_type.startswith('text/')):
+            text_content = head.decode('utf-8', errors='ignore')[:5000]  # First 5000 chars
+
+        return ScrapedContent(
+            url=url,
+            content_type=content_type,
+            file_path=f"/downloads/{session_id}/{safe_filename}",
+            file_size=size,
+            mime_type=mime_type,
+            title=title,
+            description=description,
+            text_content=text_content,
+            downloaded_at=datetime.now(),
+            success=True
+        )
+
+    async def save_download(self, url: str, session_id: str, mime_type: str, content_type: str,
+                            content_data: bytes) -> ScrapedContent:
+        """Write a body already in memory (a response cache hit) into the session's download directory"""
+        file_path, safe_filename = self.download_path(url, session_id, mime_type)
+        async with aiofiles.open(file_path, 'wb') as f:
+            await f.write(content_data)
+        return self.downloaded_content(url, session_id, safe_filename, mime_type, content_type,
+                                       len(content_data), content_data[:TEXT_HEAD_BYTES])
+
+    async def download_validator(self, url: str) -> Optional[Validator]:
+        """The stored validator of a file an earlier session saved, if that file is still on disk"""
+        if not validator_store:
+            return None
+        try:
+            validator = await validator_store.get(url)
+        except Exception as e:
+            logger.warning(f"Validator lookup failed for {url}: {e}")
+            return None
+        if (validator is None or validator.kind != "file" or not validator.payload or
+                not os.path.exists(validator.payload["local_path"])):
+            return None
+        return validator
+
+    async def reused_content(self, url: str, validator: Validator) -> ScrapedContent:
+        """A ScrapedContent for a previously saved file that has not changed"""
+        payload = validator.payload
+        mime_type = payload.get("mime_type")
+        text_content = None
+        if payload.get("content_type") == 'text' or (mime_type and mime_type.startswith('text/')):
+            async with aiofiles.open(payload["local_path"], 'rb') as f:
+                text_content = (await f.read(20000)).decode('utf-8', errors='ignore')[:5000]
+        return ScrapedContent(
+            url=url,
+            content_type=payload.get("content_type") or 'other',
+            file_path=payload["file_path"],
+            file_size=validator.size,
+            mime_type=mime_type,
+            text_content=text_content,
+            downloaded_at=datetime.now(),
+            success=True
+        )
+
+    def select_content_urls(self, extraction: PageExtraction, content_types: List[ContentType]) -> List[str]:
+        """Pick the downloadable URLs (media sources and links) of an extracted page"""
+        return [
+            url for url in extraction.candidate_content_urls()
+            if self.should_download_content(url, content_types)
+        ]
+
     async def extract_content_urls(self, html: str, base_url: str, content_types: List[ContentType]) -> List[str]:
         """Extract downloadable content URLs from HTML"""
-        content_urls = []
-        
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Find images
-            for img in soup.find_all('img', src=True):
-                img_url = urljoin(base_url, img['src'])
-                if self.should_download_content(img_url, content_types):
-                    content_urls.append(img_url)
-            
-            # Find links to downloadable content
-            for link in soup.find_all('a', href=True):
-                link_url = urljoin(base_url, link['href'])
-                if self.should_download_content(link_url, content_types):
-                    content_urls.append(link_url)
-            
-            # Find video sources
-            for video in soup.find_all(['video', 'source'], src=True):
-                video_url = urljoin(base_url, video['src'])
-                if self.should_download_content(video_url, content_types):
-                    content_urls.append(video_url)
-            
-            # Find audio sources
-            for audio in soup.find_all(['audio', 'source'], src=True):
-                audio_url = urljoin(base_url, audio['src'])
-                if self.should_download_content(audio_url, content_types):
-                    content_urls.append(audio_url)
-            
+            return self.select_content_urls(extract_page(html, base_url), content_types)
         except Exception as e:
             logger.error(f"Error extracting content URLs: {e}")
-        
-        return list(set(content_urls))  # Remove duplicates
+            return []
     
-    async def scrape_website(self, session_id: str, request: ScrapeRequest, websocket: Optional[WebSocket] = None):
-        """Enhanced scraping with content downloading"""
-        
-        domain = urlparse(str(request.url)).netloc
-        self.active_crawlers[session_id] = True
-        
-        found_urls = set()
-        external_urls = set()
-        crawled_urls = set()
-        scraped_content = []
-        to_crawl = [str(request.url)]
-        
-        status = ScrapeStatus(
-            session_id=session_id,
-            status="running",
-            started_at=datetime.now(),
-            pages_scraped=0,
-            urls_found=0,
-            external_urls_found=0,
-            content_downloaded=0
+    def stop(self, session_id: str):
+        """Signal the page workers of a session to stop after their current page"""
+        if session_id in self.active_crawlers:
+            self.active_crawlers[session_id] = False
+
+    def is_active(self, session_id: str) -> bool:
+        return self.active_crawlers.get(session_id, False)
+
+    async def send_message(self, state: "CrawlSessionState", message: Dict[str, Any]):
+        """Send a message over the session WebSocket, serialized across workers"""
+        if not state.websocket:
+            return
+        try:
+            async with state.send_lock:
+                await state.websocket.send_text(json.dumps(message))
+        except Exception:
+            pass
+
+    async def content_downloaded(self, state: "CrawlSessionState", content: ScrapedContent):
+        """Record a finished download of the session's pipeline"""
+        state.scraped_content.append(content)
+        state.status.content_downloaded = state.content_count()
+
+        # Send content update
+        await self.send_message(state, {
+            "type": "content_downloaded",
+            "data": content.model_dump(mode='json')
+        })
+
+    async def drain_downloads(self, state: "CrawlSessionState"):
+        """Wait for downloads still queued after the last page, reporting progress meanwhile"""
+        while not state.downloads.idle:
+            await self.send_status(state)
+            await state.downloads.join(timeout=config.DOWNLOAD_STATUS_INTERVAL)
+
+    async def send_status(self, state: "CrawlSessionState"):
+        state.status.queue_depth = len(state.to_crawl)
+        state.status.frontier_stats = state.to_crawl.stats()
+        state.status.fetch_engines = dict(state.fetch_engines)
+        if state.host_limits:
+            state.status.host_concurrency = state.host_limits.snapshot()
+        state.status.memory_pressure = state.memory.level
+        if state.downloads:
+            state.status.downloads = state.downloads.snapshot()
+        await self.send_message(state, {
+            "type": "status_update",
+            "data": state.status.model_dump(mode='json')
+        })
+
+    async def next_url(self, state: "CrawlSessionState", wait_for_work: bool = True) -> Optional[str]:
+        """Claim the next URL from the shared frontier.
+
+        Returns None once the session is stopped, the page budget is spent, or
+        the frontier is empty with no page left in flight that could refill it.
+        With ``wait_for_work=False`` it also returns None instead of waiting
+        for a host to become ready or for other workers to add links.
+        """
+        ready_in = state.scheduler.ready_in
+        if state.host_limits:
+            limits = state.host_limits
+            # A host is ready once its politeness window has passed and it is under its adaptive limit
+            ready_in = lambda host: max(state.scheduler.ready_in(host), limits.ready_in(host))
+
+        async with state.frontier_changed:
+            while self.is_active(state.session_id):
+                if state.pages_dispatched >= state.max_pages:
+                    return None
+
+                if state.to_crawl:
+                    if state.dispatch_limit is not None and len(state.in_progress) >= state.dispatch_limit:
+                        if not wait_for_work:
+                            return None
+                        # Memory governor cap: wait for pages in flight to finish or for the cap to lift
+                        try:
+                            await asyncio.wait_for(state.frontier_changed.wait(), timeout=1.0)
+                        except asyncio.TimeoutError:
+                            pass
+                        continue
+                    url, wait = state.to_crawl.pop_ready(ready_in)
+                    if url is None:
+                        if not wait_for_work:
+                            return None
+                        # Every queued host is still inside its politeness window
+                        try:
+                            await asyncio.wait_for(state.frontier_changed.wait(), timeout=min(wait, 1.0))
+                        except asyncio.TimeoutError:
+                            pass
+                        continue
+                    if url in state.crawled_urls or url in state.in_progress:
+                        continue
+                    host = urlparse(url).netloc
+                    state.scheduler.consume(host)
+                    if state.host_limits:
+                        state.host_limits.start(host)
+                    state.in_progress.add(url)
+                    state.pages_dispatched += 1
+                    return url
+
+                if not state.in_progress or not wait_for_work:
+                    return None
+
+                # Another worker may still add links; re-check the stop flag periodically
+                try:
+                    await asyncio.wait_for(state.frontier_changed.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+            return None
+
+    async def govern_memory(self, state: "CrawlSessionState", workers: int):
+        """Sample memory while the session runs and throttle page dispatch at the watermarks.
+
+        'soft' halves the number of pages in flight (again after each cooldown
+        while it persists) and spills downloaded-content records to disk;
+        'hard' pauses dispatch until usage falls, resuming one page at a time
+        after MEMORY_MAX_PAUSE so a crawl cannot stall forever. Back below the
+        watermarks the full worker count is restored.
+        """
+        governor = state.memory
+        last_change = 0.0
+        single_page = False
+        while self.is_active(state.session_id):
+            level = await governor.sample_async()
+            now = time.monotonic()
+            limit = state.dispatch_limit
+            event = None
+
+            if level == HARD:
+                if limit == 0:
+                    if now - last_change >= config.MEMORY_MAX_PAUSE:
+                        single_page = True
+                        state.dispatch_limit = 1
+                        event = governor.record("resume_single_page", dispatch_limit=1)
+                elif not single_page:
+                    gc.collect()
+                    state.dispatch_limit = 0
+                    event = governor.record("pause_dispatch", dispatch_limit=0,
+                                            results_spilled=state.spill_results())
+            elif level == SOFT:
+                single_page = False
+                current = workers if limit is None else limit
+                if limit == 0 or (current > 1 and now - last_change >= config.MEMORY_THROTTLE_COOLDOWN):
+                    state.dispatch_limit = max(1, (workers if limit == 0 else current) // 2)
+                    event = governor.record("shrink_concurrency", dispatch_limit=state.dispatch_limit,
+                                            results_spilled=state.spill_results())
+            elif limit is not None:
+                single_page = False
+                state.dispatch_limit = None
+                event = governor.record("restore_concurrency", dispatch_limit=workers)
+
+            if event:
+                last_change = now
+                async with state.frontier_changed:
+                    state.frontier_changed.notify_all()
+                await self.send_message(state, {"type": "memory_throttle", "data": event})
+            await asyncio.sleep(config.MEMORY_SAMPLE_INTERVAL)
+
+    async def finish_url(self, state: "CrawlSessionState", url: str):
+        if state.host_limits:
+            await state.host_limits.release(urlparse(url).netloc)
+        async with state.frontier_changed:
+            state.in_progress.discard(url)
+            state.frontier_changed.notify_all()
+
+    async def enqueue_urls(self, state: "CrawlSessionState", urls: List[str], deferred: bool = False):
+        """Add newly discovered same-domain URLs to the frontier and wake idle workers.
+
+        ``deferred`` URLs go to the frontier's low-priority tier.
+        """
+        request = state.request
+        queued = []
+        traps = state.traps
+        candidates = [
+            url for url in urls
+            if url not in state.crawled_urls and url not in state.in_progress and url not in state.to_crawl
+            and url not in state.trap_rejected
+        ]
+        if traps:
+            trapped = [url for url in candidates if traps.check(url)]
+            if trapped:
+                state.trap_rejected.update(trapped)
+                candidates = [url for url in candidates if url not in state.trap_rejected]
+        allowed = [url for url in candidates if await self.robots_allowed(state, url)]
+        async with state.frontier_changed:
+            for url in allowed:
+                if (url not in state.crawled_urls and
+                    url not in state.in_progress and
+                    url not in state.to_crawl and
+                    (request.scrape_whole_site or len(state.to_crawl) < 50)):
+                    if traps and not traps.take_budget(url):
+                        state.trap_rejected.add(url)
+                        continue
+                    state.to_crawl.push(url, deferred=deferred)
+                    queued.append(url)
+            state.frontier_changed.notify_all()
+
+        if checkpoint_store and queued:
+            checkpoint_store.record_queued(state.session_id, queued)
+
+    async def robots_allowed(self, state: "CrawlSessionState", url: str) -> bool:
+        """Check a URL against robots.txt, applying the host's Crawl-delay on first contact"""
+        if not state.request.respect_robots or robots_cache is None or self.session is None:
+            return True
+        if url in state.robots_blocked:
+            return False
+        try:
+            rules = await robots_cache.get(self.session, url, state.request.user_agent)
+        except Exception as e:
+            logger.warning(f"robots.txt check failed for {url}: {e}")
+            return True
+
+        host = urlparse(url).netloc
+        if host not in state.robots_crawl_delays:
+            delay = rules.crawl_delay(state.robots_agent)
+            if delay is not None:
+                delay = min(delay, config.ROBOTS_MAX_CRAWL_DELAY)
+                if delay > state.scheduler.get_delay(host):
+                    state.scheduler.set_delay(host, delay)
+            state.robots_crawl_delays[host] = delay
+
+        if rules.allowed(url, state.robots_agent):
+            return True
+        state.robots_blocked.add(url)
+        return False
+
+    async def seed_from_sitemaps(self, state: "CrawlSessionState"):
+        """Bulk-seed the frontier from the site's sitemaps and size the crawl from them.
+
+        The walk stops as soon as the frontier holds as many URLs as the crawl
+        can take, so a large sitemap index does not delay the first page. The
+        site size is then only known to be at least that, and is reported as
+        partial.
+        """
+        request = state.request
+        status = state.status
+        robots_sitemaps: List[str] = []
+        if robots_cache is not None:
+            try:
+                rules = await robots_cache.get(self.session, state.start_url, request.user_agent)
+                robots_sitemaps = rules.sitemaps
+            except Exception as e:
+                logger.warning(f"Could not read robots.txt sitemaps for {state.start_url}: {e}")
+
+        reader = SitemapReader(
+            self.session,
+            headers={'User-Agent': request.user_agent} if request.user_agent else None,
+            max_sitemaps=config.SITEMAP_MAX_FILES,
+            timeout=config.SITEMAP_FETCH_TIMEOUT
         )
-        
+        state.sitemaps = reader
+        batch: List[str] = []
+        # enqueue_urls keeps at most 50 URLs queued unless the whole site is crawled
+        target = state.max_pages if request.scrape_whole_site else min(state.max_pages, 50)
+
+        async def flush_batch():
+            if not batch:
+                return
+            before = len(state.to_crawl)
+            if checkpoint_store:
+                checkpoint_store.record_discovered(state.session_id, batch)
+            await self.enqueue_urls(state, batch)
+            state.sitemap_seeded += len(state.to_crawl) - before
+            batch.clear()
+
+        async with aclosing(reader.urls(default_sitemaps(state.start_url, robots_sitemaps))) as locs:
+            async for loc in locs:
+                url = canonicalize_url(loc, state.url_policy)
+                if url is None or urlparse(url).netloc != state.domain:
+                    continue
+                state.sitemap_urls += 1
+                if url not in state.found_urls:
+                    state.found_urls.add(url)
+                    batch.append(url)
+                    if len(batch) >= 1000 or len(state.to_crawl) + len(batch) >= target:
+                        await flush_batch()
+                # URLs past the page budget would never be crawled, so stop reading once it is queued
+                if (len(state.to_crawl) >= target or state.sitemap_urls >= config.SITEMAP_MAX_URLS or
+                        not self.is_active(state.session_id)):
+                    state.sitemap_partial = True
+                    break
+        await flush_batch()
+
+        if state.sitemap_partial:
+            # sitemap_urls is only a lower bound; the site has at least a full budget of pages
+            status.estimated_total_pages = state.max_pages
+        elif state.sitemap_urls:
+            status.estimated_total_pages = min(state.max_pages, state.sitemap_urls)
+        status.urls_found = len(state.found_urls)
+        logger.info(f"Sitemaps listed {'at least ' if state.sitemap_partial else ''}{state.sitemap_urls} "
+                    f"page(s) for {state.domain}, {state.sitemap_seeded} queued")
+        await self.send_status(state)
+
+    async def page_worker(self, state: "CrawlSessionState", crawler, crawler_config):
+        """Pull URLs from the shared frontier until it is exhausted or the session stops"""
+        current_page_load_stats.set(state.page_loads)
+        while True:
+            current_url = await self.next_url(state)
+            if current_url is None:
+                return
+
+            try:
+                await self.crawl_page(state, crawler, crawler_config, current_url)
+            except Exception as e:
+                logger.error(f"Error in crawling loop {current_url}: {e}")
+            finally:
+                await self.finish_url(state, current_url)
+
+            await self.flush_stores(state)
+
+    async def flush_stores(self, state: "CrawlSessionState"):
+        """Write out buffered checkpoint events and validators once their batch is due"""
+        if checkpoint_store:
+            try:
+                await checkpoint_store.maybe_flush()
+            except Exception as e:
+                logger.error(f"Error writing checkpoint for session {state.session_id}: {e}")
+        if validator_store and state.revalidation:
+            try:
+                await validator_store.maybe_flush()
+            except Exception as e:
+                logger.error(f"Error writing validators for session {state.session_id}: {e}")
+
+    async def next_batch(self, state: "CrawlSessionState", batch_size: int) -> List[str]:
+        """Claim up to ``batch_size`` URLs, waiting only for the first one"""
+        first = await self.next_url(state)
+        if first is None:
+            return []
+        batch = [first]
+        while len(batch) < batch_size:
+            url = await self.next_url(state, wait_for_work=False)
+            if url is None:
+                break
+            batch.append(url)
+        return batch
+
+    async def batch_worker(self, state: "CrawlSessionState", crawler, crawler_config, workers: int):
+        """Render frontier batches through ``arun_many`` with a memory-aware dispatcher.
+
+        The dispatcher opens up to ``workers`` tabs at once and holds new ones
+        back while system memory is above BATCH_MEMORY_THRESHOLD_PERCENT.
+        Results are streamed, so each page's links reach the frontier as soon
+        as that page finishes rather than when the whole batch does.
+        """
+        stream_config = crawler_config.clone(stream=True)
+        batch_size = max(state.request.batch_size, workers)
+        current_page_load_stats.set(state.page_loads)
+
+        while True:
+            batch = await self.next_batch(state, batch_size)
+            if not batch:
+                return
+
+            for url in batch:
+                await self.begin_page(state, url)
+
+            # Pages in the local response cache are served without opening a tab
+            uncached = []
+            for url in batch:
+                cached = await self.cached_page(state, url, "browser")
+                if cached is None:
+                    uncached.append(url)
+                    continue
+                state.scheduler.refund(urlparse(url).netloc)
+                state.fetch_engines["cache"] += 1
+                try:
+                    await self.process_page_result(state, url, cached, None, await self.page_validator(state, url))
+                except Exception as e:
+                    logger.error(f"Error processing {url}: {e}")
+                finally:
+                    await self.finish_url(state, url)
+            batch = uncached
+            if not batch:
+                await self.flush_stores(state)
+                continue
+
+            pending = set(batch)
+            # Crawl4AI may report a normalized or redirected URL; map those forms back to the request
+            aliases = {canonicalize_url(url, state.url_policy) or url: url for url in batch}
+            dispatcher = MemoryAdaptiveDispatcher(
+                memory_threshold_percent=config.BATCH_MEMORY_THRESHOLD_PERCENT,
+                max_session_permit=workers
+            )
+            try:
+                async for result in await crawler.arun_many(urls=batch, config=stream_config, dispatcher=dispatcher):
+                    current_url = self.batch_request_url(state, result, pending, aliases)
+                    if current_url is None:
+                        logger.warning(f"Skipping batch result for {result.url}: no matching requested URL")
+                        continue
+                    pending.discard(current_url)
+                    state.fetch_engines["browser"] += 1
+                    await self.store_page(state, current_url, "browser", result)
+                    # Streamed results have no per-page latency; status codes and errors still count
+                    self.observe_page(state, current_url, result, None)
+                    try:
+                        # Browser renders cannot be conditional, but an unchanged body still skips parsing
+                        validator = await self.page_validator(state, current_url)
+                        await self.process_page_result(state, current_url, result, None, validator)
+                    except Exception as e:
+                        logger.error(f"Error processing {current_url}: {e}")
+                    finally:
+                        await self.finish_url(state, current_url)
+                    await self.flush_stores(state)
+                    if not self.is_active(state.session_id):
+                        break
+            except Exception as e:
+                logger.error(f"Error rendering batch of {len(batch)} URLs: {e}")
+            finally:
+                for url in pending:
+                    await self.finish_url(state, url)
+
+    def batch_request_url(self, state: "CrawlSessionState", result, pending: Set[str],
+                          aliases: Dict[str, str]) -> Optional[str]:
+        """The still pending batch URL an ``arun_many`` result belongs to, or None"""
+        for reported in (result.url, getattr(result, "redirected_url", None)):
+            if not reported:
+                continue
+            if reported in pending:
+                return reported
+            url = aliases.get(canonicalize_url(reported, state.url_policy) or reported)
+            if url in pending:
+                return url
+        return None
+
+    async def fetch_page(self, state: "CrawlSessionState", crawler, crawler_config, url: str,
+                         validator: Optional[Validator] = None):
+        """Fetch a page with the engine selected by ``request.fetch_mode``.
+
+        In hybrid mode a pooled HTTP GET is tried first and the browser is only
+        used when the response looks like it needs JavaScript to render. With a
+        ``validator`` the HTTP GET is conditional and may come back as a 304.
+        """
+        mode = state.request.fetch_mode
+        if mode in ("http", "hybrid") or crawler is None:
+            page = await self.cached_page(state, url, "http")
+            if page is None:
+                headers = {'User-Agent': state.request.user_agent} if state.request.user_agent else None
+                if validator:
+                    conditional = validator.conditional_headers()
+                    if conditional:
+                        headers = {**(headers or {}), **conditional}
+                        state.revalidation.conditional_requests += 1
+                page = await fetch_html(self.session, url, headers=headers, timeout=config.DEFAULT_TIMEOUT)
+                await self.store_page(state, url, "http", page)
+
+            if page.success and page.html is not None and crawler is not None and mode == "hybrid":
+                needs_browser, reason = needs_javascript(
+                    page.html, config.HYBRID_MIN_TEXT_CHARS, config.HYBRID_MIN_LINKS
+                )
+            else:
+                needs_browser = crawler is not None and mode == "hybrid" and not page.success
+                reason = "http_error"
+
+            if not needs_browser:
+                state.fetch_engines["cache" if page.from_cache else "http"] += 1
+                return page
+
+            state.browser_fallbacks[reason] = state.browser_fallbacks.get(reason, 0) + 1
+            logger.info(f"Falling back to browser for {url}: {reason}")
+
+        result = await self.cached_page(state, url, "browser")
+        if result is None:
+            result = await crawler.arun(url=url, config=crawler_config)
+            await self.store_page(state, url, "browser", result)
+            state.fetch_engines["browser"] += 1
+        else:
+            state.fetch_engines["cache"] += 1
+        return result
+
+    async def cached_page(self, state: "CrawlSessionState", url: str, variant: str) -> Optional[FetchedPage]:
+        """A page from the local response cache, if the session's cache_mode reads it"""
+        if not state.cache or not response_cache or not cache_reads(state.request.cache_mode):
+            return None
+        entry = await response_cache.get(cache_key(variant, url))
+        if entry is None:
+            state.cache.misses += 1
+            return None
+        page = FetchedPage(url, html=entry.text, status_code=entry.status, response_headers=entry.headers)
+        # Rendered pages keep Crawl4AI's links/media so extraction works the same on a hit
+        page.links = entry.meta.get("links")
+        page.media = entry.meta.get("media")
+        page.from_cache = True
+        state.cache.hit(variant, len(entry.body))
+        return page
+
+    async def store_page(self, state: "CrawlSessionState", url: str, variant: str, result):
+        """Save a successful page fetch if the session's cache_mode writes"""
+        if (not state.cache or not response_cache or not cache_writes(state.request.cache_mode) or
+                result is None or not result.success or not result.html or
+                getattr(result, "status_code", None) == 304):
+            return
+        body = result.html.encode("utf-8")
+        if len(body) > config.RESPONSE_CACHE_MAX_ENTRY_MB * 1024 * 1024:
+            return
+        links = getattr(result, "links", None)
+        media = getattr(result, "media", None)
+        try:
+            await response_cache.put(
+                cache_key(variant, url), url, getattr(result, "status_code", None) or 200,
+                split_headers(getattr(result, "response_headers", None)), body,
+                {"links": links if isinstance(links, dict) else None,
+                 "media": media if isinstance(media, dict) else None}
+            )
+            state.cache.stores += 1
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not cache {url}: {e!r}")
+
+    @asynccontextmanager
+    async def lease_crawler(self, browser_config):
+        """Lease a warm browser from the shared pool, or start a private one"""
+        if browser_pool and browser_pool.stats()["browsers"]:
+            async with browser_pool.lease() as crawler:
+                install_profile_hooks(crawler)
+                yield crawler
+            return
+
+        logger.info("Initializing AsyncWebCrawler...")
+        async with AsyncWebCrawler(config=browser_config) as crawler:
+            logger.info("AsyncWebCrawler initialized successfully")
+            install_profile_hooks(crawler)
+            yield crawler
+
+    async def run_page_workers(self, state: "CrawlSessionState", crawler, crawler_config, workers: int):
+        if state.request.render_mode == "batch" and crawler is not None:
+            if state.request.fetch_mode == "browser" and MemoryAdaptiveDispatcher is not None:
+                await self.batch_worker(state, crawler, crawler_config, workers)
+                return
+            logger.warning("Batch render mode needs fetch_mode 'browser' and Crawl4AI dispatchers; using page workers")
+
+        await asyncio.gather(*[
+            self.page_worker(state, crawler, crawler_config)
+            for _ in range(workers)
+        ])
+
+    async def begin_page(self, state: "CrawlSessionState", current_url: str):
+        status = state.status
+
+        # Update status
+        status.current_url = current_url
+        status.pages_scraped = state.pages_scraped
+        if status.estimated_total_pages:
+            status.progress = min((state.pages_scraped / status.estimated_total_pages) * 100, 99)
+        else:
+            status.progress = min(50 + (state.pages_scraped / 100) * 50, 99)
+
+        # Send real-time update
+        await self.send_status(state)
+
+    async def crawl_page(self, state: "CrawlSessionState", crawler, crawler_config, current_url: str):
+        """Render a single page, collect its links and download its content"""
+        await self.begin_page(state, current_url)
+
+        # Crawl the page
+        logger.info(f"Starting crawl for: {current_url}")
+        validator = await self.page_validator(state, current_url)
+        started = time.monotonic()
+        try:
+            result = await self.fetch_page(state, crawler, crawler_config, current_url, validator)
+        except Exception as e:
+            self.observe_page(state, current_url, None, None, error=repr(e))
+            raise
+        latency = time.monotonic() - started
+        if getattr(result, "from_cache", False):
+            # The host was never contacted: give back its politeness token
+            state.scheduler.refund(urlparse(current_url).netloc)
+        self.observe_page(state, current_url, result, latency)
+        await self.process_page_result(state, current_url, result, latency, validator)
+
+    async def page_validator(self, state: "CrawlSessionState", url: str) -> Optional[Validator]:
+        """The stored validator of a page crawled by an earlier session, if revalidation is on"""
+        if not state.revalidation or not validator_store:
+            return None
+        try:
+            validator = await validator_store.get(url)
+        except Exception as e:
+            logger.warning(f"Validator lookup failed for {url}: {e}")
+            return None
+        if validator is None or validator.kind != "page" or not validator.payload:
+            return None
+        return validator
+
+    def reuse_analysis(self, state: "CrawlSessionState", result, validator: Validator,
+                       latency: Optional[float]) -> Optional[PageAnalysis]:
+        """Rebuild an unchanged page's analysis from its stored links instead of parsing it.
+
+        Applies to a 304 answer to a conditional request and to a full response
+        whose body hashes the same as last time (browser fetches, or servers
+        without validators). Returns None when the page has changed.
+        """
+        stats = state.revalidation
+        if getattr(result, "status_code", None) == 304:
+            stats.not_modified_saved(validator, latency)
+        elif result.html and content_hash(result.html) == validator.content_hash:
+            stats.unchanged_reused(validator)
+            # Refresh ETag / Last-Modified, which may change without the content changing
+            validator_store.record(Validator.from_response(
+                validator.url, "page", getattr(result, "response_headers", None), result.html,
+                latency * 1000 if latency is not None else validator.fetch_ms, validator.payload
+            ))
+        else:
+            return None
+
+        stats.parses_skipped += 1
+        request = state.request
+        wanted = self.wanted_content_types(request.content_types) if request.download_content else frozenset()
+        return analyze_urls(validator.payload["links"], validator.payload["candidates"], state.domain,
+                            request.include_external, wanted, state.url_policy)
+
+    def record_page_validator(self, state: "CrawlSessionState", url: str, result, analysis: PageAnalysis,
+                              latency: Optional[float]):
+        if not state.revalidation or not validator_store or not result.html:
+            return
+        validator_store.record(Validator.from_response(
+            url, "page", getattr(result, "response_headers", None), result.html,
+            latency * 1000 if latency is not None else None,
+            {"links": analysis.source_links, "candidates": analysis.source_candidates}
+        ))
+
+    def observe_page(self, state: "CrawlSessionState", url: str, result, latency: Optional[float],
+                     error: Optional[str] = None):
+        """Feed a page fetch into the adaptive per-host concurrency controller"""
+        if not state.host_limits or getattr(result, "from_cache", False):
+            return
+        retry_after = None
+        status_code = None
+        if result is not None:
+            status_code = getattr(result, "status_code", None)
+            if not result.success:
+                error = result.error_message or "failed"
+            headers = getattr(result, "response_headers", None) or {}
+            retry_after = next((v for k, v in headers.items() if k.lower() == "retry-after"), None)
+        state.host_limits.observe(urlparse(url).netloc, latency, status_code,
+                                  error=error, retry_after=retry_after)
+
+    async def analyze_page(self, state: "CrawlSessionState", result, page_url: str) -> PageAnalysis:
+        request = state.request
+        stats = state.extraction
+        html = result.html
+        wanted = self.wanted_content_types(request.content_types) if request.download_content else frozenset()
+
+        if request.extraction_mode == "crawler":
+            # Crawl4AI already walked the DOM; plain HTTP fetches carry no links and fall through
+            started = time.thread_time()
+            analysis = analyze_crawler_result(
+                getattr(result, "links", None), getattr(result, "media", None),
+                page_url, state.domain, request.include_external, wanted, state.url_policy
+            )
+            if analysis is not None:
+                stats.record_crawler(time.thread_time() - started, len(html))
+                if stats.should_sample():
+                    # Keep the parser's cost per byte current so the savings estimate stays honest
+                    sampled, cpu = await self.parse_page(state, html, page_url, wanted)
+                    stats.record_parser(cpu, len(html), sampled=True)
+                    analysis.fingerprint = sampled.fingerprint
+                return analysis
+            stats.fallbacks += 1
+
+        analysis, cpu = await self.parse_page(state, html, page_url, wanted)
+        stats.record_parser(cpu, len(html))
+        return analysis
+
+    async def parse_page(self, state: "CrawlSessionState", html: str, page_url: str,
+                         wanted) -> Tuple[PageAnalysis, float]:
+        """Run the HTML parser, in the extraction pool when one is configured; returns its CPU seconds.
+
+        Sessions with duplicate detection get the page fingerprint from the same task.
+        """
+        request = state.request
+        with_fingerprint = state.fingerprints is not None
+        if extraction_pool:
+            return await extraction_pool.analyze_timed(
+                html, page_url, state.domain, request.include_external, wanted, state.url_policy, with_fingerprint
+            )
+        started = time.thread_time()
+        analysis = analyze_page(html, page_url, state.domain, request.include_external, wanted, state.url_policy)
+        cpu = time.thread_time() - started
+        if with_fingerprint:
+            analysis.fingerprint = page_fingerprint(html)
+        return analysis, cpu
+
+    async def fingerprint_page(self, html: str) -> Tuple[int, bytes, int]:
+        """Duplicate-detection fingerprint for a page that was not parsed, in the extraction pool when configured"""
+        if extraction_pool:
+            return await extraction_pool.fingerprint(html)
+        return page_fingerprint(html)
+
+    async def process_page_result(self, state: "CrawlSessionState", current_url: str, result,
+                                  latency: Optional[float] = None, validator: Optional[Validator] = None):
+        """Collect links from a fetched page and download its content"""
+        request = state.request
+        status = state.status
+
+        logger.info(f"Crawl result - Success: {result.success if result else 'No result'}, HTML present: {result.html is not None if result else 'No result'}")
+
+        # Debug: Check result attributes
+        if result:
+            logger.info(f"Result attributes: success={result.success}, html_type={type(result.html)}, html_length={len(result.html) if result.html else 0}")
+
+        analysis = None
+        if validator and result and result.success:
+            analysis = self.reuse_analysis(state, result, validator, latency)
+
+        if analysis is not None or (result and result.success and result.html):
+            if analysis is None:
+                # Links and media come from Crawl4AI's result when available, otherwise
+                # from one pass over the HTML (in a worker process for large pages)
+                analysis = await self.analyze_page(state, result, current_url)
+                self.record_page_validator(state, current_url, result, analysis, latency)
+
+            # A page that repeats one already crawled (session IDs, print views, ...) adds nothing new
+            duplicate_of = None
+            if state.fingerprints and result.html:
+                fingerprint = analysis.fingerprint or await self.fingerprint_page(result.html)
+                kind, duplicate_of = state.fingerprints.match(current_url, fingerprint)
+                if duplicate_of:
+                    logger.info(f"{current_url} is an {kind} duplicate of {duplicate_of}")
+
+            # Extract URLs
+            new_urls = analysis.internal_links
+            discovered = []
+            discovered_external = []
+            for clean_url in analysis.internal_links:
+                if clean_url not in state.found_urls:
+                    state.found_urls.add(clean_url)
+                    discovered.append(clean_url)
+            for clean_url in analysis.external_links:
+                if clean_url not in state.external_urls:
+                    state.external_urls.add(clean_url)
+                    discovered_external.append(clean_url)
+
+            if checkpoint_store:
+                checkpoint_store.record_discovered(state.session_id, discovered)
+                checkpoint_store.record_discovered(state.session_id, discovered_external, external=True)
+
+            if duplicate_of and request.duplicate_page_links == "skip":
+                state.duplicate_links_skipped += sum(
+                    1 for url in new_urls
+                    if url not in state.crawled_urls and url not in state.in_progress and url not in state.to_crawl
+                )
+            else:
+                await self.enqueue_urls(state, new_urls, deferred=duplicate_of is not None)
+
+            # Hand content to the download stage; crawling goes on while it downloads
+            if state.downloads:
+                content_urls = analysis.content_urls
+
+                for content_url in content_urls[:config.MAX_CONTENT_PER_PAGE]:
+                    if self.is_active(state.session_id):
+                        await state.downloads.submit(content_url)
+        else:
+            error_msg = f"Failed to crawl {current_url}"
+            if result:
+                error_msg += f": success={result.success}, html_present={result.html is not None}"
+                if hasattr(result, 'error_message') and result.error_message:
+                    error_msg += f", error={result.error_message}"
+                # Try to get any available content
+                if hasattr(result, 'markdown') and result.markdown:
+                    logger.info(f"Found markdown content instead: {len(result.markdown)} chars")
+                if hasattr(result, 'cleaned_html') and result.cleaned_html:
+                    logger.info(f"Found cleaned_html content instead: {len(result.cleaned_html)} chars")
+            else:
+                error_msg += ": No result returned from crawler"
+            logger.warning(error_msg)
+
+        state.crawled_urls.add(current_url)
+        state.pages_scraped += 1
+        if checkpoint_store:
+            checkpoint_store.record_crawled(state.session_id, current_url)
+
+        # Update counts
+        status.urls_found = len(state.found_urls)
+        status.external_urls_found = len(state.external_urls)
+
+    async def save_checkpoint(self, state: "CrawlSessionState", status: str):
+        if not checkpoint_store:
+            return
+        try:
+            await checkpoint_store.save_session(
+                state.session_id, state.request.model_dump(mode='json'), state.domain,
+                status, state.pages_scraped
+            )
+            await checkpoint_store.flush()
+        except Exception as e:
+            logger.error(f"Error saving checkpoint for session {state.session_id}: {e}")
+
+    async def scrape_website(self, session_id: str, request: ScrapeRequest, websocket: Optional[WebSocket] = None,
+                             checkpoint: Optional[CrawlCheckpoint] = None):
+        """Enhanced scraping with content downloading.
+
+        Pages are crawled by ``request.concurrency`` workers sharing one frontier;
+        a concurrency of 1 reproduces the original one-page-at-a-time crawl.
+        With ``adaptive_concurrency`` the pool is sized for the per-host ceiling
+        and ``request.concurrency`` is only each host's initial window.
+        Passing a ``checkpoint`` resumes a previous session where it left off.
+        """
+
+        self.active_crawlers[session_id] = True
+        state = CrawlSessionState(session_id, request, websocket, checkpoint)
+        self.schedulers[session_id] = state.scheduler
+        if state.host_limits:
+            self.host_limits[session_id] = state.host_limits
+        if state.revalidation:
+            self.revalidation[session_id] = state.revalidation
+        if state.cache:
+            self.cache_stats[session_id] = state.cache
+        if request.download_content and request.content_types:
+            state.downloads = DownloadPipeline(
+                lambda url: self.download_content(url, session_id),
+                lambda content: self.content_downloaded(state, content),
+                workers=max(1, min(request.download_concurrency, config.DOWNLOAD_MAX_SESSION_CONCURRENCY)),
+                queue_size=config.DOWNLOAD_QUEUE_SIZE,
+                global_slots=download_slots,
+                should_run=lambda: self.is_active(session_id)
+            )
+        domain = state.domain
+        status = state.status
+
         # Estimate total pages for whole site scraping
         if request.scrape_whole_site and request.max_pages > 0:
             status.estimated_total_pages = request.max_pages
         elif not request.scrape_whole_site:
-            status.estimated_total_pages = min(request.max_pages, len(to_crawl) + 50)
-        
+            status.estimated_total_pages = min(request.max_pages, len(state.to_crawl) + 50)
+
+        if not checkpoint and not await self.robots_allowed(state, state.start_url):
+            logger.warning(f"robots.txt disallows {state.start_url}; nothing to crawl")
+            state.to_crawl = CrawlFrontier([])
+        elif checkpoint_store and not checkpoint:
+            checkpoint_store.record_queued(session_id, [state.start_url])
+        if request.use_sitemaps and not checkpoint and state.to_crawl:
+            await self.seed_from_sitemaps(state)
+        await self.save_checkpoint(state, "running")
+
         try:
             logger.info(f"Starting scrape session {session_id} for URL: {request.url}")
 
             # Configure browser - using simpler, more reliable settings
             try:
-                browser_config = BrowserConfig(
-                    headless=True,
-                    browser_type="chromium",
-                    verbose=False  # Reduce noise
-                )
+                browser_config = create_browser_config()
                 logger.info("Browser config created successfully")
             except Exception as e:
                 logger.error(f"Error creating browser config: {e}")
@@ -445,166 +1659,108 @@ class EnhancedWebScraperManager:
                 raise
 
             try:
-                logger.info("Initializing AsyncWebCrawler...")
-                async with AsyncWebCrawler(config=browser_config) as crawler:
-                    logger.info("AsyncWebCrawler initialized successfully")
-                    pages_scraped = 0
-                    max_pages = request.max_pages if request.max_pages > 0 else 1000
-
-                    while (to_crawl and pages_scraped < max_pages and
-                           self.active_crawlers.get(session_id, False)):
-
-                        current_url = to_crawl.pop(0)
-
-                        if current_url in crawled_urls:
-                            continue
-
-                        # Update status
-                        status.current_url = current_url
-                        status.pages_scraped = pages_scraped
-                        if status.estimated_total_pages:
-                            status.progress = min((pages_scraped / status.estimated_total_pages) * 100, 99)
-                        else:
-                            status.progress = min(50 + (pages_scraped / 100) * 50, 99)
-
-                        # Send real-time update
-                        if websocket:
-                            try:
-                                await websocket.send_text(json.dumps({
-                                    "type": "status_update",
-                                    "data": status.model_dump(mode='json')
-                                }))
-                            except:
-                                pass
-
-                        # Crawl the page
-                        try:
-                            logger.info(f"Starting crawl for: {current_url}")
-                            result = await crawler.arun(url=current_url, config=crawler_config)
-
-                            logger.info(f"Crawl result - Success: {result.success if result else 'No result'}, HTML present: {result.html is not None if result else 'No result'}")
-
-                            # Debug: Check result attributes
-                            if result:
-                                logger.info(f"Result attributes: success={result.success}, html_type={type(result.html)}, html_length={len(result.html) if result.html else 0}")
-
-                            if result and result.success and result.html:
-                                soup = BeautifulSoup(result.html, 'html.parser')
-
-                                # Extract URLs
-                                for link in soup.find_all('a', href=True):
-                                    href = link['href']
-                                    full_url = urljoin(current_url, href)
-
-                                    parsed = urlparse(full_url)
-                                    if parsed.scheme in ['http', 'https']:
-                                        clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-
-                                        if parsed.netloc == domain:
-                                            found_urls.add(clean_url)
-                                            if (clean_url not in crawled_urls and
-                                                clean_url not in to_crawl and
-                                                (request.scrape_whole_site or len(to_crawl) < 50)):
-                                                to_crawl.append(clean_url)
-                                        elif request.include_external:
-                                            external_urls.add(clean_url)
-
-                                # Download content if enabled
-                                if request.download_content and request.content_types:
-                                    content_urls = await self.extract_content_urls(
-                                        result.html, current_url, request.content_types
-                                    )
-
-                                    for content_url in content_urls[:10]:  # Limit per page
-                                        if self.active_crawlers.get(session_id, False):
-                                            content = await self.download_content(content_url, session_id)
-                                            if content and content.success:
-                                                scraped_content.append(content)
-                                                status.content_downloaded = len(scraped_content)
-
-                                                # Send content update
-                                                if websocket:
-                                                    try:
-                                                        await websocket.send_text(json.dumps({
-                                                            "type": "content_downloaded",
-                                                            "data": content.dict(default=str)
-                                                        }))
-                                                    except:
-                                                        pass
-                            else:
-                                error_msg = f"Failed to crawl {current_url}"
-                                if result:
-                                    error_msg += f": success={result.success}, html_present={result.html is not None}"
-                                    if hasattr(result, 'error_message') and result.error_message:
-                                        error_msg += f", error={result.error_message}"
-                                    # Try to get any available content
-                                    if hasattr(result, 'markdown') and result.markdown:
-                                        logger.info(f"Found markdown content instead: {len(result.markdown)} chars")
-                                    if hasattr(result, 'cleaned_html') and result.cleaned_html:
-                                        logger.info(f"Found cleaned_html content instead: {len(result.cleaned_html)} chars")
-                                else:
-                                    error_msg += ": No result returned from crawler"
-                                logger.warning(error_msg)
-
-                            crawled_urls.add(current_url)
-                            pages_scraped += 1
-
-                            # Update counts
-                            status.urls_found = len(found_urls)
-                            status.external_urls_found = len(external_urls)
-
-                            # Rate limiting
-                            if request.delay > 0:
-                                await asyncio.sleep(request.delay)
-
-                        except Exception as e:
-                            logger.error(f"Error in crawling loop {current_url}: {e}")
-                            continue
-                
+                workers = max(1, min(request.concurrency, config.MAX_CRAWL_CONCURRENCY))
+                if state.host_limits:
+                    # request.concurrency is only the starting window; spare workers wait in
+                    # next_url until additive increase opens a host up to its ceiling
+                    workers = max(workers, min(int(state.host_limits.max_limit), config.MAX_CRAWL_CONCURRENCY))
+                logger.info(f"Crawling session {session_id} with {workers} page worker(s), fetch mode {request.fetch_mode}")
+
+                governor = asyncio.create_task(self.govern_memory(state, workers))
+                if state.downloads:
+                    state.downloads.start()
+                try:
+                    if request.fetch_mode == "http":
+                        # Plain HTTP only: no browser needs to be started at all
+                        await self.run_page_workers(state, None, crawler_config, workers)
+                    else:
+                        async with self.lease_crawler(browser_config) as crawler:
+                            await self.run_page_workers(state, crawler, crawler_config, workers)
+                    if state.downloads:
+                        await self.drain_downloads(state)
+                finally:
+                    governor.cancel()
+                    if state.downloads:
+                        await state.downloads.close()
+
                 # Complete the scraping
-                status.status = "completed"
+                status.status = "completed" if self.is_active(session_id) else "stopped"
                 status.ended_at = datetime.now()
                 status.progress = 100
-                
-                # Calculate statistics
+                status.pages_scraped = state.pages_scraped
+
+                # Calculate statistics (spilled content records are read back from disk here)
+                scraped_content = state.all_scraped_content()
                 statistics = {
-                    "total_pages_scraped": pages_scraped,
-                    "total_urls_found": len(found_urls),
-                    "external_urls_found": len(external_urls),
+                    "total_pages_scraped": state.pages_scraped,
+                    "total_urls_found": len(state.found_urls),
+                    "external_urls_found": len(state.external_urls),
                     "content_downloaded": len(scraped_content),
                     "total_file_size": sum(c.file_size or 0 for c in scraped_content),
                     "duration_seconds": (status.ended_at - status.started_at).total_seconds(),
+                    "page_workers": workers,
+                    "downloads": state.downloads.stats() if state.downloads else None,
+                    "frontier": state.to_crawl.stats(),
+                    "politeness": state.scheduler.stats(),
+                    "adaptive_concurrency": state.host_limits.stats() if state.host_limits else None,
+                    "crawl_traps": state.traps.stats() if state.traps else None,
+                    "revalidation": state.revalidation.summary() if state.revalidation else None,
+                    "response_cache": state.cache.summary() if state.cache else None,
+                    "duplicates": {
+                        **state.fingerprints.stats(),
+                        "link_policy": request.duplicate_page_links,
+                        "links_deferred": state.to_crawl.deferred_total,
+                        "links_skipped": state.duplicate_links_skipped,
+                    } if state.fingerprints else None,
+                    "memory": {**state.memory.stats(), "results_spilled": state.result_spill.count},
+                    "fetch_engines": dict(state.fetch_engines),
+                    "browser_fallback_reasons": dict(state.browser_fallbacks),
+                    "page_load": state.page_loads.summary(),
+                    "extraction": state.extraction.summary(),
+                    "url_sets": state.url_set_stats(),
+                    "sitemaps": {
+                        **(state.sitemaps.stats() if state.sitemaps else {}),
+                        "site_urls": state.sitemap_urls,
+                        "site_urls_partial": state.sitemap_partial,
+                        "urls_seeded": state.sitemap_seeded,
+                    } if request.use_sitemaps else None,
+                    "robots": {
+                        "respected": request.respect_robots,
+                        "agent": state.robots_agent,
+                        "urls_blocked": len(state.robots_blocked),
+                        "crawl_delays": dict(state.robots_crawl_delays),
+                    },
                     "content_by_type": {}
                 }
-                
+
                 # Count content by type
                 for content in scraped_content:
                     content_type = content.content_type
                     statistics["content_by_type"][content_type] = statistics["content_by_type"].get(content_type, 0) + 1
-                
-                # Create final result
+
+                # Create final result (compact sets read their exact lists back from disk)
                 result = ScrapeResult(
                     session_id=session_id,
                     domain=domain,
-                    urls=list(found_urls),
-                    external_urls=list(external_urls),
+                    urls=list(state.found_urls),
+                    external_urls=list(state.external_urls),
                     scraped_content=scraped_content,
                     statistics=statistics,
                     status=status
                 )
-                
-                # Store result
+
+                # Store result; a completed crawl has nothing left to resume
                 session_results[session_id] = result
-                
+                if status.status == "completed" and checkpoint_store:
+                    await checkpoint_store.delete(session_id)
+                else:
+                    await self.save_checkpoint(state, status.status)
+
                 # Send final result
-                if websocket:
-                    try:
-                        await websocket.send_text(json.dumps({
-                            "type": "scrape_complete",
-                            "data": result.model_dump(mode='json')
-                        }))
-                    except:
-                        pass
+                await self.send_message(state, {
+                    "type": "scrape_complete",
+                    "data": result.model_dump(mode='json')
+                })
 
                 return result
             except Exception as crawler_error:
@@ -618,20 +1774,27 @@ class EnhancedWebScraperManager:
             logger.error(f"Full traceback: {error_details}")
             status.status = "error"
             status.ended_at = datetime.now()
+            await self.save_checkpoint(state, "error")
+
+            await self.send_message(state, {
+                "type": "error",
+                "message": str(e),
+                "details": error_details
+            })
 
-            if websocket:
-                try:
-                    await websocket.send_text(json.dumps({
-                        "type": "error",
-                        "message": str(e),
-                        "details": error_details
-                    }))
-                except:
-                    pass
-        
         finally:
             # Clean up session data
+            if validator_store and state.revalidation:
+                try:
+                    await validator_store.flush()
+                except Exception as e:
+                    logger.error(f"Error writing validators for session {session_id}: {e}")
+            state.close_url_sets()
             self.active_crawlers.pop(session_id, None)
+            self.schedulers.pop(session_id, None)
+            self.host_limits.pop(session_id, None)
+            self.revalidation.pop(session_id, None)
+            self.cache_stats.pop(session_id, None)
             active_sessions.pop(session_id, None)
             websocket_connections.pop(session_id, None)
 
@@ -646,7 +1809,14 @@ async def health_check():
         "status": "healthy",
         "crawl4ai_available": CRAWL4AI_AVAILABLE,
         "active_sessions": len(active_sessions),
-        "completed_sessions": len(session_results)
+        "completed_sessions": len(session_results),
+        "browser_pool": browser_pool.stats() if browser_pool else None,
+        "http_pool": http_client.stats() if http_client else None,
+        "extraction_pool": extraction_pool.stats() if extraction_pool else None,
+        "robots_cache": robots_cache.stats() if robots_cache else None,
+        "validator_store": validator_store.stats() if validator_store else None,
+        "response_cache": response_cache.stats() if response_cache else None,
+        "download_slots": download_slots.stats() if download_slots else None
     }
 
 @app.post("/api/scrape/start")
@@ -689,12 +1859,25 @@ async def websocket_scrape(websocket: WebSocket, session_id: str):
         logger.info(f"Received data for session {session_id}")
         
         request_data = json.loads(data)
+
+        # A {"resume": true} message continues a checkpointed session instead
+        checkpoint = None
+        if request_data.get("resume"):
+            checkpoint = await checkpoint_store.load(session_id) if checkpoint_store else None
+            if not checkpoint:
+                await websocket.send_text(json.dumps({
+                    "type": "error",
+                    "message": f"No checkpoint found for session {session_id}"
+                }))
+                return
+            request_data = checkpoint.request
         request = ScrapeRequest(**request_data)
         
         # Start scraping
-        logger.info(f"Starting scrape for {request.url} in session {session_id}")
+        logger.info(f"{'Resuming' if checkpoint else 'Starting'} scrape for {request.url} in session {session_id}")
         async with EnhancedWebScraperManager() as manager:
-            await manager.scrape_website(session_id, request, websocket)
+            running_scrapers[session_id] = manager
+            await manager.scrape_website(session_id, request, websocket, checkpoint)
             
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for session {session_id}")
@@ -719,17 +1902,21 @@ async def websocket_scrape(websocket: WebSocket, session_id: str):
     finally:
         websocket_connections.pop(session_id, None)
         active_sessions.pop(session_id, None)
+        running_scrapers.pop(session_id, None)
         logger.info(f"WebSocket connection closed for session {session_id}")
 
 
 @app.post("/api/scrape/stop/{session_id}")
 async def stop_scraping(session_id: str):
-    if session_id in active_sessions:
+    if session_id in active_sessions or session_id in running_scrapers:
         # Signal to stop the crawler by setting flag to False
         # Note: We don't create a new manager instance here, just update the flag
-        # The actual manager instance will check this flag during scraping
+        # The page workers of the running manager check this flag between pages
         if session_id in active_sessions:
             active_sessions[session_id]["status"] = "stopping"
+        manager = running_scrapers.get(session_id)
+        if manager:
+            manager.stop(session_id)
 
         # Close WebSocket connection
         if session_id in websocket_connections:
@@ -747,6 +1934,42 @@ async def stop_scraping(session_id: str):
     else:
         raise HTTPException(status_code=404, detail="Session not found")
 
+@app.get("/api/scrape/checkpoints")
+async def list_checkpoints():
+    if not checkpoint_store:
+        return {"checkpoints": []}
+    return {"checkpoints": await checkpoint_store.list_sessions()}
+
+@app.post("/api/scrape/resume/{session_id}")
+async def resume_scraping(session_id: str):
+    """Prepare a checkpointed session for resumption.
+
+    The client then connects to /ws/scrape/{session_id} and sends
+    {"resume": true} to continue crawling from the last checkpoint.
+    """
+    if not CRAWL4AI_AVAILABLE:
+        raise HTTPException(status_code=500, detail="Crawl4AI is not available. Please install it first.")
+    if session_id in running_scrapers:
+        raise HTTPException(status_code=409, detail="Session is already running")
+
+    checkpoint = await checkpoint_store.load(session_id) if checkpoint_store else None
+    if not checkpoint:
+        raise HTTPException(status_code=404, detail="Checkpoint not found")
+
+    active_sessions[session_id] = {
+        "request": checkpoint.request,
+        "started_at": datetime.now(),
+        "status": "resuming"
+    }
+
+    return {
+        "session_id": session_id,
+        "status": "resuming",
+        "pages_scraped": len(checkpoint.crawled),
+        "queued_urls": len(checkpoint.queued),
+        "checkpoint_updated_at": checkpoint.updated_at
+    }
+
 @app.get("/api/scrape/sessions")
 async def list_sessions():
     return {
@@ -6,23 +6,85 @@ import json
 import uuid
 import asyncio
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, List, Optional, Set
-from collections import deque
+from typing import Dict, List, Literal, Optional, Set
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+import aiohttp
+from urllib.parse import urlparse
+
+from frontier import CrawlFrontier
+from politeness import HostScheduler
+from fetcher import FetchedPage, fetch_html
+from http_client import SharedHttpClient
+from extraction import analyze_page
+from extraction_pool import ExtractionPool
+from robots import RobotsCache, robots_agent
+from response_cache import CacheSessionStats, ResponseCache, cache_key, cache_reads, cache_writes, split_headers
+from canonicalize import build_query_policy, canonical_host, canonicalize_url
+from config import config
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Pooled HTTP client shared by every session, managed by the app lifespan
+http_client: Optional[SharedHttpClient] = None
+# Optional worker processes for parsing large pages off the event loop
+extraction_pool: Optional[ExtractionPool] = None
+# robots.txt rules shared by every session
+robots_cache: Optional[RobotsCache] = None
+# On-disk compressed response bodies shared by every session
+response_cache: Optional[ResponseCache] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global http_client, extraction_pool, robots_cache, response_cache
+    client = SharedHttpClient(
+        limit=config.HTTP_POOL_LIMIT,
+        limit_per_host=config.HTTP_POOL_LIMIT_PER_HOST,
+        dns_cache_ttl=config.HTTP_DNS_CACHE_TTL,
+        keepalive_timeout=config.HTTP_KEEPALIVE_TIMEOUT,
+        timeout=config.DEFAULT_TIMEOUT
+    )
+    await client.start()
+    http_client = client
+    robots_cache = RobotsCache(config.ROBOTS_CACHE_DB_PATH, ttl=config.ROBOTS_CACHE_TTL,
+                               error_ttl=config.ROBOTS_ERROR_TTL, timeout=config.ROBOTS_FETCH_TIMEOUT)
+    try:
+        await robots_cache.open()
+    except Exception as e:
+        logger.error(f"robots.txt disk cache unavailable, caching in memory only: {e}")
+    cache = ResponseCache(config.RESPONSE_CACHE_DIR, max_bytes=config.RESPONSE_CACHE_MAX_MB * 1024 * 1024,
+                          level=config.RESPONSE_CACHE_COMPRESSION_LEVEL)
+    try:
+        await cache.open()
+        response_cache = cache
+    except Exception as e:
+        logger.error(f"Response cache unavailable, cache_mode will behave like 'bypass': {e}")
+    if config.EXTRACTION_PROCESSES > 0:
+        pool = ExtractionPool(config.EXTRACTION_PROCESSES, min_bytes=config.EXTRACTION_OFFLOAD_MIN_BYTES)
+        try:
+            await pool.start()
+            extraction_pool = pool
+        except Exception as e:
+            logger.error(f"Extraction pool unavailable, parsing inline: {e}")
+            await pool.close()
+    yield
+    await client.close()
+    http_client = None
+    if extraction_pool:
+        await extraction_pool.close()
+        extraction_pool = None
+    await robots_cache.close()
+    robots_cache = None
+    response_cache = None
+
 # FastAPI app
-app = FastAPI(title="Enhanced Web Scraper API", version="2.0.0")
+app = FastAPI(title="Enhanced Web Scraper API", version="2.0.0", lifespan=lifespan)
 
 # CORS middleware - Allow specific origins with credentials
 app.add_middleware(
@@ -48,6 +110,11 @@ class ScrapeRequest(BaseModel):
     download_content: bool = False
     content_types: List[str] = []
     user_agent: Optional[str] = None
+    concurrency: int = 1  # Number of pages fetched in parallel
+    allowed_query_params: List[str] = []  # If set, only these query parameters are kept on discovered URLs
+    denied_query_params: List[str] = []  # Dropped in addition to the built-in tracking/session parameters
+    respect_robots: bool = True  # Skip URLs disallowed by robots.txt and honor its Crawl-delay
+    cache_mode: Literal["bypass", "read-only", "read-write", "refresh"] = "bypass"  # Local response cache: 'bypass', 'read-only', 'read-write' or 'refresh'
 
 class ScrapeStatus(BaseModel):
     status: str = "starting"
@@ -58,6 +125,8 @@ class ScrapeStatus(BaseModel):
     content_downloaded: int = 0
     progress: float = 0.0
     estimated_total_pages: Optional[int] = None
+    queue_depth: int = 0
+    frontier_stats: Dict = {}
     started_at: datetime = datetime.now()
     ended_at: Optional[datetime] = None
 
@@ -77,112 +146,241 @@ websocket_connections: Dict[str, WebSocket] = {}
 class SimpleWebScraperManager:
     def __init__(self):
         self.active_crawlers: Dict[str, bool] = {}
+        self.session = None
+        self.owns_session = False
 
     async def __aenter__(self):
+        if http_client and http_client.session:
+            self.session = http_client.session
+        else:
+            self.session = aiohttp.ClientSession()
+            self.owns_session = True
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        pass
+        if self.session and self.owns_session:
+            await self.session.close()
 
     async def scrape_website(self, session_id: str, request: ScrapeRequest, websocket: Optional[WebSocket] = None):
-        """Simple web scraping using requests and BeautifulSoup"""
+        """Simple web scraping using pooled aiohttp fetches and the shared link extractor.
+
+        Fetches never block the event loop, so one slow site does not stall
+        other sessions; ``request.concurrency`` workers share the frontier.
+        """
         
         # Initialize tracking
         self.active_crawlers[session_id] = True
         status = ScrapeStatus()
         status.started_at = datetime.now()
         
-        # Parse domain
-        parsed_url = urlparse(request.url)
-        domain = parsed_url.netloc
+        # Canonicalize the start URL; discovered links get the same query policy
+        url_policy = build_query_policy(
+            request.allowed_query_params or config.CANONICAL_ALLOWED_QUERY_PARAMS,
+            [*config.CANONICAL_DENIED_QUERY_PARAMS, *request.denied_query_params],
+            config.CANONICAL_STRIP_TRAILING_SLASH
+        )
+        start_url = canonicalize_url(request.url, url_policy) or request.url
+        domain = canonical_host(start_url)
         
         # Initialize collections
-        to_crawl = deque([request.url])
+        to_crawl = CrawlFrontier([start_url])
+        scheduler = HostScheduler(request.delay)
         crawled_urls: Set[str] = set()
+        in_progress: Set[str] = set()
         found_urls: Set[str] = set()
         external_urls: Set[str] = set()
+        send_lock = asyncio.Lock()
+        # Signalled whenever URLs are queued or a page finishes, so idle workers wake without polling
+        frontier_changed = asyncio.Condition()
+        agent = robots_agent(request.user_agent, config.ROBOTS_USER_AGENT)
+        crawl_delays: Dict[str, Optional[float]] = {}
+        robots_blocked: Set[str] = set()  # Distinct URLs disallowed, each judged once
+        cache = CacheSessionStats(request.cache_mode)
+        
+        headers = {
+            'User-Agent': request.user_agent or 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        }
         
         try:
             pages_scraped = 0
+            pages_dispatched = 0
             max_pages = request.max_pages if request.max_pages > 0 else 10
             
             # Estimate total pages
             status.estimated_total_pages = min(max_pages, 50)
             
-            while (to_crawl and pages_scraped < max_pages and 
-                   self.active_crawlers.get(session_id, False)):
-                
-                current_url = to_crawl.popleft()
-                
-                if current_url in crawled_urls:
-                    continue
-                
-                # Update status
-                status.current_url = current_url
-                status.pages_scraped = pages_scraped
-                status.progress = min((pages_scraped / max_pages) * 100, 99)
-                
-                # Send real-time update
+            async def send_status():
                 if websocket:
                     try:
-                        await websocket.send_text(json.dumps({
-                            "type": "status_update",
-                            "data": status.dict(default=str)
-                        }))
+                        async with send_lock:
+                            await websocket.send_text(json.dumps({
+                                "type": "status_update",
+                                "data": status.model_dump(mode='json')
+                            }))
                     except:
                         pass
-                
-                # Scrape the page using requests
+            
+            async def robots_allowed(url: str) -> bool:
+                if not request.respect_robots or robots_cache is None:
+                    return True
+                if url in robots_blocked:
+                    return False
                 try:
-                    logger.info(f"Scraping: {current_url}")
-                    
-                    headers = {
-                        'User-Agent': request.user_agent or 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                    }
+                    rules = await robots_cache.get(self.session, url, request.user_agent)
+                except Exception as e:
+                    logger.warning(f"robots.txt check failed for {url}: {e}")
+                    return True
+                host = urlparse(url).netloc
+                if host not in crawl_delays:
+                    delay = rules.crawl_delay(agent)
+                    if delay is not None:
+                        delay = min(delay, config.ROBOTS_MAX_CRAWL_DELAY)
+                        if delay > scheduler.get_delay(host):
+                            scheduler.set_delay(host, delay)
+                    crawl_delays[host] = delay
+                if rules.allowed(url, agent):
+                    return True
+                robots_blocked.add(url)
+                return False
+            
+            if not await robots_allowed(start_url):
+                logger.warning(f"robots.txt disallows {start_url}; nothing to crawl")
+                to_crawl = CrawlFrontier([])
+            
+            async def fetch_page(url: str) -> FetchedPage:
+                # Served from the local response cache when cache_mode allows it
+                key = cache_key("http", url)
+                if response_cache and cache_reads(request.cache_mode):
+                    entry = await response_cache.get(key)
+                    if entry is not None:
+                        cache.hit("http", len(entry.body))
+                        page = FetchedPage(url, html=entry.text, status_code=entry.status,
+                                           response_headers=entry.headers)
+                        page.from_cache = True
+                        return page
+                    cache.misses += 1
+                page = await fetch_html(self.session, url, headers=headers, timeout=10)
+                if (response_cache and cache_writes(request.cache_mode) and page.success and page.html and
+                        len(page.html) <= config.RESPONSE_CACHE_MAX_ENTRY_MB * 1024 * 1024):
+                    try:
+                        await response_cache.put(key, url, page.status_code or 200,
+                                                 split_headers(page.response_headers), page.html.encode("utf-8"))
+                        cache.stores += 1
+                    except OSError as e:
+                        logger.warning(f"Could not cache {url}: {e!r}")
+                return page
+            
+            async def next_url() -> Optional[str]:
+                """Claim the next URL whose host is out of its politeness window.
+
+                Returns None once the session is stopped, the page budget is spent,
+                or the frontier is empty with no page in flight that could refill it.
+                """
+                nonlocal pages_dispatched
+                async with frontier_changed:
+                    while self.active_crawlers.get(session_id, False):
+                        if pages_dispatched >= max_pages:
+                            return None
+                        if to_crawl:
+                            url, wait = to_crawl.pop_ready(scheduler.ready_in)
+                            if url is None:
+                                # Every queued host is still inside its politeness window
+                                try:
+                                    await asyncio.wait_for(frontier_changed.wait(), timeout=min(wait, 1.0))
+                                except asyncio.TimeoutError:
+                                    pass
+                                continue
+                            if url in crawled_urls or url in in_progress:
+                                continue
+                            scheduler.consume(urlparse(url).netloc)
+                            in_progress.add(url)
+                            pages_dispatched += 1
+                            return url
+                        if not in_progress:
+                            return None
+                        # Another worker may still add links; re-check the stop flag periodically
+                        try:
+                            await asyncio.wait_for(frontier_changed.wait(), timeout=1.0)
+                        except asyncio.TimeoutError:
+                            pass
+                    return None
+            
+            async def worker():
+                nonlocal pages_scraped
+                
+                while True:
+                    current_url = await next_url()
+                    if current_url is None:
+                        return
                     
-                    response = requests.get(current_url, headers=headers, timeout=10)
-                    response.raise_for_status()
+                    # Update status
+                    status.current_url = current_url
+                    status.pages_scraped = pages_scraped
+                    status.progress = min((pages_scraped / max_pages) * 100, 99)
+                    status.queue_depth = len(to_crawl)
+                    status.frontier_stats = to_crawl.stats()
                     
-                    soup = BeautifulSoup(response.content, 'html.parser')
+                    # Send real-time update
+                    await send_status()
                     
-                    # Extract URLs
-                    for link in soup.find_all('a', href=True):
-                        href = link['href']
-                        full_url = urljoin(current_url, href)
+                    # Scrape the page over the pooled, non-blocking client
+                    discovered: List[str] = []
+                    try:
+                        logger.info(f"Scraping: {current_url}")
                         
-                        parsed = urlparse(full_url)
-                        if parsed.scheme in ['http', 'https']:
-                            clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+                        page = await fetch_page(current_url)
+                        if page.from_cache:
+                            # Nothing was sent to the host, so its politeness token is not spent
+                            scheduler.refund(urlparse(current_url).netloc)
+                        if not page.success:
+                            logger.error(f"Error scraping {current_url}: {page.error_message}")
+                        elif page.html:
+                            if extraction_pool:
+                                analysis = await extraction_pool.analyze(
+                                    page.html, current_url, domain, request.include_external, policy=url_policy
+                                )
+                            else:
+                                analysis = analyze_page(page.html, current_url, domain, request.include_external, policy=url_policy)
+                            links = analysis.internal_links + analysis.external_links
                             
-                            if parsed.netloc == domain:
+                            # Extract URLs
+                            for clean_url in analysis.internal_links:
                                 found_urls.add(clean_url)
                                 if (clean_url not in crawled_urls and 
+                                    clean_url not in in_progress and
                                     clean_url not in to_crawl and
-                                    (request.scrape_whole_site or len(to_crawl) < 20)):
-                                    to_crawl.append(clean_url)
-                            elif request.include_external:
-                                external_urls.add(clean_url)
-                    
-                    logger.info(f"Successfully scraped {current_url}, found {len(soup.find_all('a', href=True))} links")
+                                    (request.scrape_whole_site or len(to_crawl) + len(discovered) < 20) and
+                                    await robots_allowed(clean_url)):
+                                    discovered.append(clean_url)
+                            external_urls.update(analysis.external_links)
+                            
+                            logger.info(f"Successfully scraped {current_url}, found {len(links)} links")
+                        
+                    except Exception as e:
+                        logger.error(f"Error scraping {current_url}: {e}")
+                    finally:
+                        # Queue the new links and wake idle workers
+                        async with frontier_changed:
+                            for clean_url in discovered:
+                                if clean_url not in to_crawl:
+                                    to_crawl.push(clean_url)
+                            in_progress.discard(current_url)
+                            crawled_urls.add(current_url)
+                            pages_scraped += 1
+                            frontier_changed.notify_all()
                     
-                except Exception as e:
-                    logger.error(f"Error scraping {current_url}: {e}")
-                
-                crawled_urls.add(current_url)
-                pages_scraped += 1
-                
-                # Update counts
-                status.urls_found = len(found_urls)
-                status.external_urls_found = len(external_urls)
-                
-                # Rate limiting
-                if request.delay > 0:
-                    await asyncio.sleep(request.delay)
+                    # Update counts
+                    status.urls_found = len(found_urls)
+                    status.external_urls_found = len(external_urls)
+            
+            workers = max(1, min(request.concurrency, config.MAX_CRAWL_CONCURRENCY))
+            await asyncio.gather(*[worker() for _ in range(workers)])
             
             # Complete the scraping
-            status.status = "completed"
+            status.status = "completed" if self.active_crawlers.get(session_id, False) else "stopped"
             status.ended_at = datetime.now()
             status.progress = 100
+            status.pages_scraped = pages_scraped
             
             # Calculate statistics
             statistics = {
@@ -190,6 +388,15 @@ class SimpleWebScraperManager:
                 "total_urls_found": len(found_urls),
                 "external_urls_found": len(external_urls),
                 "duration_seconds": (status.ended_at - status.started_at).total_seconds(),
+                "frontier": to_crawl.stats(),
+                "politeness": scheduler.stats(),
+                "robots": {
+                    "respected": request.respect_robots,
+                    "agent": agent,
+                    "urls_blocked": len(robots_blocked),
+                    "crawl_delays": crawl_delays,
+                },
+                "response_cache": cache.summary(),
             }
             
             # Create final result
@@ -210,7 +417,7 @@ class SimpleWebScraperManager:
                 try:
                     await websocket.send_text(json.dumps({
                         "type": "scrape_complete",
-                        "data": result.dict(default=str)
+                        "data": result.model_dump(mode='json')
                     }))
                     # Give time for the message to be sent
                     await asyncio.sleep(0.5)
@@ -250,7 +457,10 @@ async def health_check():
         "status": "healthy",
         "mode": "simple",
         "active_sessions": len(active_sessions),
-        "completed_sessions": len(session_results)
+        "completed_sessions": len(session_results),
+        "http_pool": http_client.stats() if http_client else None,
+        "robots_cache": robots_cache.stats() if robots_cache else None,
+        "response_cache": response_cache.stats() if response_cache else None
     }
 
 @app.websocket("/ws/scrape/{session_id}")
@@ -0,0 +1,202 @@
+"""
+Memory watermarks for crawl sessions: RSS sampling and throttling decisions
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import psutil
+except ImportError:  # Listed in requirements.txt; /proc (Linux only) is used without it
+    psutil = None
+
+logger = logging.getLogger(__name__)
+_fallback_logged = False
+
+NORMAL = "normal"
+SOFT = "soft"
+HARD = "hard"
+
+
+def _proc_rss_bytes(pid: str = "self") -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _proc_system_percent() -> Optional[float]:
+    try:
+        info = {}
+        with open("/proc/meminfo") as f:
+            for line in f:
+                name, value = line.split(":", 1)
+                info[name] = int(value.split()[0])
+        return 100.0 * (1 - info["MemAvailable"] / info["MemTotal"])
+    except (OSError, ValueError, KeyError, ZeroDivisionError):
+        return None
+
+
+def sample_memory() -> Tuple[Optional[int], Optional[float]]:
+    """(RSS of this process and its children in bytes, system memory used in percent).
+
+    With psutil the RSS includes child processes, i.e. locally launched
+    Chromium; the /proc fallback only sees the API process itself, and
+    without /proc (anything but Linux) both values are None and the
+    watermarks never trigger. This does blocking reads: call it off the
+    event loop.
+    """
+    global _fallback_logged
+    if psutil is not None:
+        try:
+            process = psutil.Process()
+            rss = process.memory_info().rss
+            for child in process.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+            return rss, psutil.virtual_memory().percent
+        except psutil.Error as e:
+            logger.debug(f"psutil memory sample failed: {e!r}")
+    rss, system_percent = _proc_rss_bytes(), _proc_system_percent()
+    if not _fallback_logged:
+        _fallback_logged = True
+        if rss is None and system_percent is None:
+            logger.warning("psutil is not installed and /proc is unavailable: memory watermarks are disabled")
+        else:
+            logger.warning("psutil is not installed: sampling memory from /proc, without browser child processes")
+    return rss, system_percent
+
+
+class MemoryGovernor:
+    """Maps memory samples onto normal / soft / hard pressure levels.
+
+    A level is entered when process RSS or system memory use crosses its
+    watermark (0 disables a watermark) and left only once usage falls below
+    ``resume_ratio`` of the soft watermarks, so the crawl does not flap
+    around a threshold. The session decides what each level means: the crawl
+    manager shrinks page dispatch at 'soft' and pauses it at 'hard'.
+    """
+
+    def __init__(self, soft_rss_mb: float = 0, hard_rss_mb: float = 0,
+                 soft_system_percent: float = 80, hard_system_percent: float = 90,
+                 resume_ratio: float = 0.9, sampler=sample_memory):
+        self.soft_rss = soft_rss_mb * 1024 * 1024
+        self.hard_rss = hard_rss_mb * 1024 * 1024
+        self.soft_system = soft_system_percent
+        self.hard_system = hard_system_percent
+        self.resume_ratio = resume_ratio
+        self.sampler = sampler
+
+        self.level = NORMAL
+        self.rss: Optional[int] = None
+        self.system_percent: Optional[float] = None
+        self.peak_rss = 0
+        self.peak_system_percent = 0.0
+        self.samples = 0
+        self.events: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def _over(value: Optional[float], limit: float, ratio: float = 1.0) -> bool:
+        return bool(limit) and value is not None and value >= limit * ratio
+
+    def sample(self) -> str:
+        """Take a sample and return the (possibly unchanged) pressure level"""
+        return self.update(*self.sampler())
+
+    async def sample_async(self) -> str:
+        """``sample`` with the blocking memory reads done in a worker thread"""
+        return self.update(*await asyncio.to_thread(self.sampler))
+
+    def update(self, rss: Optional[int], system_percent: Optional[float]) -> str:
+        self.rss, self.system_percent = rss, system_percent
+        self.samples += 1
+        self.peak_rss = max(self.peak_rss, self.rss or 0)
+        self.peak_system_percent = max(self.peak_system_percent, self.system_percent or 0.0)
+
+        if self._over(self.rss, self.hard_rss) or self._over(self.system_percent, self.hard_system):
+            self.level = HARD
+        elif self._over(self.rss, self.soft_rss) or self._over(self.system_percent, self.soft_system):
+            # Coming down from 'hard' goes through 'soft' before 'normal'
+            self.level = SOFT
+        elif self.level != NORMAL and (
+            self._over(self.rss, self.soft_rss, self.resume_ratio) or
+            self._over(self.system_percent, self.soft_system, self.resume_ratio)
+        ):
+            pass  # Inside the hysteresis band: keep throttling
+        else:
+            self.level = NORMAL
+        return self.level
+
+    def record(self, action: str, **details) -> Dict[str, Any]:
+        """Log a throttle event and return it for the WebSocket"""
+        event = {
+            "at": time.time(),
+            "level": self.level,
+            "action": action,
+            "process_rss_mb": round(self.rss / 1048576, 1) if self.rss is not None else None,
+            "system_percent": round(self.system_percent, 1) if self.system_percent is not None else None,
+            **details,
+        }
+        self.events.append(event)
+        logger.warning(f"Memory {self.level}: {action} {details}")
+        return event
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sampler": "psutil" if psutil is not None else "proc",
+            "samples": self.samples,
+            "level": self.level,
+            "peak_process_rss_mb": round(self.peak_rss / 1048576, 1),
+            "peak_system_percent": round(self.peak_system_percent, 1),
+            "watermarks": {
+                "soft_rss_mb": self.soft_rss / 1048576 or None,
+                "hard_rss_mb": self.hard_rss / 1048576 or None,
+                "soft_system_percent": self.soft_system or None,
+                "hard_system_percent": self.hard_system or None,
+            },
+            "throttle_events": list(self.events),
+        }
+
+
+class ResultSpill:
+    """Append-only JSON-lines file for result records moved out of memory.
+
+    Records keep their order and are read back once, when the final result
+    is assembled after the crawl (and its browsers) have finished.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._file = None
+
+    def extend(self, records: List[Dict[str, Any]]):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "w", encoding="utf-8")
+        for record in records:
+            self._file.write(json.dumps(record, default=str) + "\n")
+        self._file.flush()
+        self.count += len(records)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if self._file is None:
+            return
+        self._file.flush()
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
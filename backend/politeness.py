@@ -0,0 +1,105 @@
+"""
+Per-host politeness scheduling for crawl and download requests
+"""
+
+import asyncio
+import time
+from typing import Any, Dict
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        if self.rate <= 0:
+            self.tokens = self.capacity
+        else:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def ready_in(self) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        self._refill(time.monotonic())
+        if self.tokens >= 1 or self.rate <= 0:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self._refill(time.monotonic())
+        self.tokens -= 1
+
+    def refund(self):
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class HostScheduler:
+    """Keeps one token bucket per netloc.
+
+    Each host may receive one request every ``delay`` seconds, but different
+    hosts are throttled independently, so total throughput grows with the
+    number of hosts being crawled instead of being serialized by one global
+    sleep.
+    """
+
+    def __init__(self, delay: float = 0.0, burst: float = 1.0):
+        self.default_delay = max(delay, 0.0)
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._delays: Dict[str, float] = {}
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    def _bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            delay = self.get_delay(host)
+            bucket = TokenBucket(1.0 / delay if delay > 0 else 0.0, self.burst)
+            self._buckets[host] = bucket
+        return bucket
+
+    def get_delay(self, host: str) -> float:
+        return self._delays.get(host, self.default_delay)
+
+    def set_delay(self, host: str, delay: float):
+        """Override the politeness delay for a single host"""
+        delay = max(delay, 0.0)
+        self._delays[host] = delay
+        bucket = self._bucket(host)
+        bucket.rate = 1.0 / delay if delay > 0 else 0.0
+
+    def ready_in(self, host: str) -> float:
+        return self._bucket(host).ready_in()
+
+    def consume(self, host: str):
+        self._bucket(host).consume()
+
+    def refund(self, host: str):
+        """Return a token taken for a request that never reached the host (e.g. a cache hit)"""
+        self._bucket(host).refund()
+
+    async def acquire(self, host: str):
+        """Wait until ``host`` may be contacted again, then take its token"""
+        bucket = self._bucket(host)
+        wait = bucket.ready_in()
+        if wait > 0:
+            self.waits += 1
+            self.wait_seconds += wait
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = bucket.ready_in()
+        bucket.consume()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hosts": len(self._buckets),
+            "default_delay": self.default_delay,
+            "host_delays": dict(self._delays),
+            "waits": self.waits,
+            "wait_seconds": round(self.wait_seconds, 3),
+        }
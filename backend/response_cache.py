@@ -0,0 +1,227 @@
+"""
+On-disk compressed HTTP response cache with size-bounded LRU eviction
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import struct
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ("bypass", "read-only", "read-write", "refresh")
+_HEADER = struct.Struct("<I")  # Length of the compressed metadata block
+_CHUNK = 1024 * 1024  # Read size when compressing a body from a file
+
+
+def cache_reads(mode: str) -> bool:
+    return mode in ("read-only", "read-write")
+
+
+def cache_writes(mode: str) -> bool:
+    return mode in ("read-write", "refresh")
+
+
+class CachedResponse:
+    """A stored response: status, selected headers, body and caller metadata"""
+
+    def __init__(self, url: str, status: int, headers: Dict[str, str], body: bytes,
+                 meta: Optional[Dict[str, Any]] = None, stored_at: float = 0.0):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.meta = meta or {}
+        self.stored_at = stored_at
+
+    @property
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+
+class ResponseCache:
+    """Response bodies stored zlib-compressed in ``directory``, one file per key.
+
+    Keys are hashed to file names (two-level fan-out), so a lookup never
+    needs an index. The in-memory LRU order only drives eviction; it is
+    rebuilt from file mtimes on open, and hits touch the file, so recency
+    survives restarts. Compression and file I/O run in a thread.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1024 * 1024 * 1024, level: int = 6):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.level = level
+        self._lru: "OrderedDict[str, int]" = OrderedDict()  # file name -> size on disk
+        self._total = 0
+        self._lock = asyncio.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    async def open(self):
+        await asyncio.to_thread(self._scan)
+        logger.info(f"Response cache at {self.directory}: {len(self._lru)} entries, {self._total} bytes")
+
+    def _scan(self):
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, name, stat.st_size))
+        entries.sort()
+        self._lru = OrderedDict((name, size) for _, name, size in entries)
+        self._total = sum(size for _, _, size in entries)
+
+    @staticmethod
+    def key_name(key: str) -> str:
+        return hashlib.blake2b(key.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name[:2], name)
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        name = self.key_name(key)
+        if name not in self._lru:
+            self.misses += 1
+            return None
+        try:
+            entry = await asyncio.to_thread(self._read, self._path(name))
+        except (OSError, zlib.error, ValueError, struct.error) as e:
+            logger.warning(f"Dropping unreadable cache entry for {key}: {e!r}")
+            await self._remove(name)
+            self.misses += 1
+            return None
+        self._lru.move_to_end(name)
+        self.hits += 1
+        return entry
+
+    @staticmethod
+    def _read(path: str) -> CachedResponse:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)  # Recency for the LRU order rebuilt on the next open
+        (meta_len,) = _HEADER.unpack_from(data)
+        start = _HEADER.size
+        meta = json.loads(zlib.decompress(data[start:start + meta_len]))
+        body = zlib.decompress(data[start + meta_len:])
+        return CachedResponse(meta["url"], meta["status"], meta["headers"], body,
+                              meta.get("meta"), meta.get("stored_at", 0.0))
+
+    async def put(self, key: str, url: str, status: int, headers: Dict[str, str], body: bytes,
+                  meta: Optional[Dict[str, Any]] = None):
+        await self._store(key, {"url": url, "status": status, "headers": headers, "meta": meta}, body=body)
+
+    async def put_file(self, key: str, url: str, status: int, headers: Dict[str, str], source: str,
+                       meta: Optional[Dict[str, Any]] = None):
+        """Like ``put`` for a body already on disk; it is compressed in chunks, never loaded whole"""
+        await self._store(key, {"url": url, "status": status, "headers": headers, "meta": meta}, source=source)
+
+    async def _store(self, key: str, record: Dict[str, Any], body: Optional[bytes] = None,
+                     source: Optional[str] = None):
+        name = self.key_name(key)
+        record["stored_at"] = time.time()
+        size = await asyncio.to_thread(self._write, self._path(name), record, body, source)
+        async with self._lock:
+            self._total += size - self._lru.pop(name, 0)
+            self._lru[name] = size
+            self.writes += 1
+            while self._total > self.max_bytes and len(self._lru) > 1:
+                oldest = next(iter(self._lru))
+                await self._remove(oldest)
+                self.evictions += 1
+
+    def _write(self, path: str, record: Dict[str, Any], body: Optional[bytes], source: Optional[str]) -> int:
+        meta_block = zlib.compress(json.dumps(record).encode(), self.level)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique per write: the same key can be stored by two tasks at once
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(_HEADER.pack(len(meta_block)) + meta_block)
+                if source is None:
+                    f.write(zlib.compress(body, self.level))
+                else:
+                    compressor = zlib.compressobj(self.level)
+                    with open(source, "rb") as src:
+                        for chunk in iter(lambda: src.read(_CHUNK), b""):
+                            f.write(compressor.compress(chunk))
+                    f.write(compressor.flush())
+                size = f.tell()
+            os.replace(tmp, path)  # Readers never see a half-written entry
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        return size
+
+    async def _remove(self, name: str):
+        self._total -= self._lru.pop(name, 0)
+        try:
+            await asyncio.to_thread(os.remove, self._path(name))
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._lru),
+            "bytes": self._total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+
+class CacheSessionStats:
+    """What one session's cache policy did"""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.hits: Dict[str, int] = {}
+        self.misses = 0
+        self.stores = 0
+        self.bytes_served = 0
+
+    def hit(self, kind: str, size: int):
+        self.hits[kind] = self.hits.get(kind, 0) + 1
+        self.bytes_served += size
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "stores": self.stores,
+            "bytes_served_from_cache": self.bytes_served,
+        }
+
+
+def cache_key(variant: str, url: str) -> str:
+    """Browser-rendered DOM and raw HTTP bodies of the same URL are different entries"""
+    return f"{variant} {url}"
+
+
+def split_headers(headers: Any, keep: Tuple[str, ...] = ("content-type", "etag", "last-modified")) -> Dict[str, str]:
+    """The response headers worth storing with an entry, with lowercased names"""
+    if not headers:
+        return {}
+    return {k.lower(): v for k, v in headers.items() if k.lower() in keep}
@@ -0,0 +1,295 @@
+"""
+robots.txt fetching, parsing and an app-wide cache shared by all sessions
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS robots_cache (
+    origin TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    body TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+# RFC 9309: crawlers must parse at least 500 KiB
+MAX_ROBOTS_BYTES = 500 * 1024
+
+
+def _compile_pattern(pattern: str) -> "re.Pattern":
+    anchored = pattern.endswith("$")
+    if anchored:
+        pattern = pattern[:-1]
+    regex = ".*".join(re.escape(part) for part in pattern.split("*"))
+    return re.compile(regex + ("$" if anchored else ""))
+
+
+class _AgentRules:
+    """The merged rule groups that apply to one user agent"""
+
+    def __init__(self, rules: List[Tuple[bool, str]], crawl_delay: Optional[float]):
+        # Longest pattern first; on equal length Allow wins (RFC 9309)
+        ordered = sorted(rules, key=lambda r: (len(r[1]), r[0]), reverse=True)
+        self.rules = [(allow, _compile_pattern(pattern)) for allow, pattern in ordered]
+        self.crawl_delay = crawl_delay
+
+    def allowed(self, path: str) -> bool:
+        for allow, regex in self.rules:
+            if regex.match(path):
+                return allow
+        return True
+
+
+class RobotsRules:
+    """Parsed robots.txt for one origin.
+
+    ``status`` is 'ok' for a parsed file, 'missing' when the server answered
+    4xx (everything allowed) and 'unreachable' for 5xx or network errors
+    (everything disallowed until the entry expires, per RFC 9309).
+    """
+
+    def __init__(self, groups: List[Tuple[List[str], List[Tuple[bool, str]], Optional[float]]],
+                 sitemaps: List[str], status: str = "ok"):
+        self.groups = groups
+        self.sitemaps = sitemaps
+        self.status = status
+        self._by_agent: Dict[str, _AgentRules] = {}
+
+    @classmethod
+    def parse(cls, text: str, status: str = "ok") -> "RobotsRules":
+        groups = []
+        sitemaps = []
+        agents: List[str] = []
+        rules: List[Tuple[bool, str]] = []
+        delay: Optional[float] = None
+        in_rules = False
+
+        def close_group():
+            if agents:
+                groups.append((agents, rules, delay))
+
+        for raw_line in text[:MAX_ROBOTS_BYTES].splitlines():
+            line = raw_line.split("#", 1)[0].strip()
+            if ":" not in line:
+                continue
+            field, value = (part.strip() for part in line.split(":", 1))
+            field = field.lower()
+            if field == "user-agent":
+                if in_rules:
+                    close_group()
+                    agents, rules, delay, in_rules = [], [], None, False
+                agents.append(value.lower())
+            elif field in ("allow", "disallow"):
+                in_rules = True
+                if value:  # An empty Disallow allows everything
+                    rules.append((field == "allow", value))
+            elif field == "crawl-delay":
+                in_rules = True
+                try:
+                    delay = float(value)
+                except ValueError:
+                    pass
+            elif field == "sitemap" and value:
+                sitemaps.append(value)
+        close_group()
+        return cls(groups, sitemaps, status)
+
+    @classmethod
+    def allow_all(cls, status: str = "missing") -> "RobotsRules":
+        return cls([], [], status)
+
+    @classmethod
+    def disallow_all(cls) -> "RobotsRules":
+        return cls([(["*"], [(False, "/")], None)], [], "unreachable")
+
+    def for_agent(self, agent: str) -> _AgentRules:
+        """Rules of the most specific group naming ``agent``, else the '*' group"""
+        agent = agent.lower()
+        cached = self._by_agent.get(agent)
+        if cached is not None:
+            return cached
+
+        best_len = -1
+        rules: List[Tuple[bool, str]] = []
+        delay = None
+        for names, group_rules, group_delay in self.groups:
+            match_len = max(0 if name == "*" else (len(name) if name in agent else -1) for name in names)
+            if match_len < 0 or match_len < best_len:
+                continue
+            if match_len > best_len:
+                best_len, rules, delay = match_len, [], None
+            rules = rules + group_rules  # Groups for the same agent are merged
+            if group_delay is not None:
+                delay = group_delay
+
+        cached = _AgentRules(rules, delay)
+        self._by_agent[agent] = cached
+        return cached
+
+    def allowed(self, url: str, agent: str) -> bool:
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        return self.for_agent(agent).allowed(path)
+
+    def crawl_delay(self, agent: str) -> Optional[float]:
+        return self.for_agent(agent).crawl_delay
+
+
+class RobotsCache:
+    """robots.txt rules per origin, cached in memory and in SQLite with a TTL.
+
+    One instance lives for the whole app, so concurrent sessions crawling
+    the same site fetch its robots.txt once; concurrent lookups for an origin
+    that is not cached yet wait on a single fetch.
+    """
+
+    def __init__(self, db_path: str, ttl: float = 86400, error_ttl: float = 600, timeout: float = 10):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.timeout = timeout
+        self._db: Optional[aiosqlite.Connection] = None
+        self._memory: Dict[str, Tuple[RobotsRules, float]] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.fetches = 0
+        self.fetch_errors = 0
+
+    async def open(self):
+        self._db = await aiosqlite.connect(self.db_path)
+        await self._db.execute("PRAGMA journal_mode=WAL")
+        await self._db.executescript(SCHEMA)
+        await self._db.commit()
+        logger.info(f"robots.txt cache opened at {self.db_path}")
+
+    async def close(self):
+        if self._db:
+            await self._db.close()
+            self._db = None
+
+    @staticmethod
+    def origin(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    async def get(self, session: aiohttp.ClientSession, url: str, user_agent: Optional[str] = None) -> RobotsRules:
+        """Rules for the origin of ``url``, fetching robots.txt if not cached"""
+        origin = self.origin(url)
+        entry = self._memory.get(origin)
+        if entry and entry[1] > time.time():
+            self.memory_hits += 1
+            return entry[0]
+
+        pending = self._pending.get(origin)
+        if pending:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[origin] = future
+        try:
+            rules = await self._load(origin)
+            if rules is None:
+                rules, expires_at = await self._fetch(session, origin, user_agent)
+            else:
+                expires_at = self._memory[origin][1]
+            self._memory[origin] = (rules, expires_at)
+            future.set_result(rules)
+            return rules
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else was waiting
+            raise
+        finally:
+            self._pending.pop(origin, None)
+
+    async def _load(self, origin: str) -> Optional[RobotsRules]:
+        if not self._db:
+            return None
+        async with self._db.execute(
+            "SELECT status, body, expires_at FROM robots_cache WHERE origin = ?", (origin,)
+        ) as cursor:
+            row = await cursor.fetchone()
+        if not row or row[2] <= time.time():
+            return None
+        status, body, expires_at = row
+        self.disk_hits += 1
+        rules = self._rules_for(status, body)
+        self._memory[origin] = (rules, expires_at)
+        return rules
+
+    @staticmethod
+    def _rules_for(status: str, body: str) -> RobotsRules:
+        if status == "ok":
+            return RobotsRules.parse(body)
+        if status == "unreachable":
+            return RobotsRules.disallow_all()
+        return RobotsRules.allow_all()
+
+    async def _fetch(self, session: aiohttp.ClientSession, origin: str,
+                     user_agent: Optional[str]) -> Tuple[RobotsRules, float]:
+        self.fetches += 1
+        headers = {"User-Agent": user_agent} if user_agent else None
+        body = ""
+        try:
+            async with session.get(f"{origin}/robots.txt", headers=headers,
+                                   timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                if 200 <= response.status < 300:
+                    data = await response.content.read(MAX_ROBOTS_BYTES)
+                    body = data.decode("utf-8", errors="replace")
+                    status = "ok"
+                elif 400 <= response.status < 500:
+                    status = "missing"
+                else:
+                    status = "unreachable"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Could not fetch robots.txt for {origin}: {e!r}")
+            status = "unreachable"
+
+        if status == "unreachable":
+            self.fetch_errors += 1
+        fetched_at = time.time()
+        expires_at = fetched_at + (self.error_ttl if status == "unreachable" else self.ttl)
+        if self._db:
+            await self._db.execute(
+                "INSERT OR REPLACE INTO robots_cache (origin, status, body, fetched_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (origin, status, body, fetched_at, expires_at)
+            )
+            await self._db.commit()
+        return self._rules_for(status, body), expires_at
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "origins_cached": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "fetches": self.fetches,
+            "fetch_errors": self.fetch_errors,
+            "ttl": self.ttl,
+        }
+
+
+def robots_agent(user_agent: Optional[str], default: str) -> str:
+    """Product token matched against User-agent lines, e.g. 'Mozilla' for 'Mozilla/5.0 (...)'"""
+    if not user_agent:
+        return default
+    return user_agent.split("/", 1)[0].split()[0] if user_agent.strip() else default
@@ -0,0 +1,137 @@
+"""
+Streaming sitemap discovery and parsing for frontier seeding
+"""
+
+import asyncio
+import logging
+import zlib
+from collections import deque
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def default_sitemaps(url: str, robots_sitemaps: Iterable[str] = ()) -> List[str]:
+    """Sitemaps listed in robots.txt, or the conventional /sitemap.xml"""
+    listed = list(dict.fromkeys(robots_sitemaps))
+    if listed:
+        return listed
+    parts = urlsplit(url)
+    return [f"{parts.scheme}://{parts.netloc}/sitemap.xml"]
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+class SitemapReader:
+    """Walks sitemaps and sitemap indexes, yielding page URLs as they are parsed.
+
+    Each response is read in chunks, gunzipped incrementally with zlib when
+    compressed, and fed to an XMLPullParser; finished ``<url>`` and
+    ``<sitemap>`` elements are dropped immediately, so memory stays flat
+    regardless of sitemap size (the protocol allows 50k URLs / 50 MB each).
+    Callers that stop early should consume ``urls`` under
+    ``contextlib.aclosing`` so the open response is released right away.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, headers: Optional[Dict[str, str]] = None,
+                 max_sitemaps: int = 50, max_bytes: int = 50 * 1024 * 1024, timeout: float = 30):
+        self.session = session
+        self.headers = headers
+        self.max_sitemaps = max_sitemaps
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+
+        self.sitemaps_fetched = 0
+        self.sitemaps_failed = 0
+        self.urls_seen = 0
+        self.bytes_read = 0
+
+    async def urls(self, sitemaps: Iterable[str]) -> AsyncIterator[str]:
+        """Page URLs from the given sitemaps, following nested indexes breadth-first"""
+        pending = deque(sitemaps)
+        visited = set()
+        while pending and len(visited) < self.max_sitemaps:
+            sitemap_url = pending.popleft()
+            if sitemap_url in visited:
+                continue
+            visited.add(sitemap_url)
+            try:
+                # aclosing releases the response as soon as the caller stops iterating
+                async with aclosing(self._parse(sitemap_url)) as entries:
+                    async for kind, loc in entries:
+                        if kind == "sitemap":
+                            pending.append(loc)
+                        else:
+                            self.urls_seen += 1
+                            yield loc
+            except (aiohttp.ClientError, asyncio.TimeoutError, ParseError, zlib.error, ValueError) as e:
+                self.sitemaps_failed += 1
+                logger.warning(f"Could not read sitemap {sitemap_url}: {e!r}")
+
+    async def _parse(self, sitemap_url: str) -> AsyncIterator[tuple]:
+        async with self.session.get(sitemap_url, headers=self.headers,
+                                    timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+            if response.status != 200:
+                raise ValueError(f"HTTP {response.status}")
+            self.sitemaps_fetched += 1
+
+            parser = XMLPullParser(events=("start", "end"))
+            root: List = []
+            decompressor = None
+            first_chunk = True
+            uncompressed = 0
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                self.bytes_read += len(chunk)
+                if first_chunk:
+                    first_chunk = False
+                    # aiohttp already undoes Content-Encoding: gzip; this is a .xml.gz file
+                    if chunk.startswith(GZIP_MAGIC):
+                        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                if decompressor:
+                    chunk = decompressor.decompress(chunk)
+                uncompressed += len(chunk)
+                if uncompressed > self.max_bytes:
+                    raise ValueError(f"Sitemap larger than {self.max_bytes} bytes")
+                parser.feed(chunk)
+                for item in self._drain(parser, root):
+                    yield item
+            if decompressor:
+                parser.feed(decompressor.flush())
+            parser.close()
+            for item in self._drain(parser, root):
+                yield item
+
+    @staticmethod
+    def _drain(parser: XMLPullParser, root: List):
+        for event, element in parser.read_events():
+            if event == "start":
+                if not root:
+                    root.append(element)
+                continue
+            name = _local_name(element.tag)
+            if name not in ("url", "sitemap"):
+                continue
+            for child in element:
+                if _local_name(child.tag) == "loc" and child.text and child.text.strip():
+                    yield name, child.text.strip()
+                    break
+            # Drop finished entries from the root so the tree never grows
+            root[0].clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sitemaps_fetched": self.sitemaps_fetched,
+            "sitemaps_failed": self.sitemaps_failed,
+            "urls_listed": self.urls_seen,
+            "bytes_read": self.bytes_read,
+        }
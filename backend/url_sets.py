@@ -0,0 +1,234 @@
+"""
+Compact URL membership and cardinality structures for very large crawls
+"""
+
+import hashlib
+import logging
+import math
+import os
+import shutil
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+def _hash128(item: str) -> bytes:
+    return hashlib.blake2b(item.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over a ``bytearray``.
+
+    Sized for ``capacity`` items at ``error_rate`` false positives; the k bit
+    positions come from double hashing one 128-bit blake2b digest.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest: bytes) -> Iterator[int]:
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def contains_digest(self, digest: bytes) -> bool:
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(digest))
+
+    def add_digest(self, digest: bytes) -> bool:
+        """Set the item's bits; False if they were all set already"""
+        bits = self.bits
+        added = False
+        for p in self._positions(digest):
+            mask = 1 << (p & 7)
+            if not bits[p >> 3] & mask:
+                bits[p >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return self.contains_digest(_hash128(item))
+
+    def add(self, item: str) -> bool:
+        return self.add_digest(_hash128(item))
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.bits)
+
+
+class ScalableBloomFilter:
+    """Chain of Bloom filters that grows instead of degrading past capacity.
+
+    Each new slice doubles in size with a tighter error rate, so the overall
+    false-positive rate stays below ``error_rate`` however many items arrive.
+    """
+
+    def __init__(self, initial_capacity: int = 100_000, error_rate: float = 0.001):
+        self.error_rate = error_rate
+        self._filters: List[BloomFilter] = [BloomFilter(initial_capacity, error_rate / 2)]
+
+    def __contains__(self, item: str) -> bool:
+        digest = _hash128(item)
+        return any(f.contains_digest(digest) for f in self._filters)
+
+    def add(self, item: str) -> bool:
+        """Add an item; False if it was (probably) present already"""
+        digest = _hash128(item)
+        if any(f.contains_digest(digest) for f in self._filters):
+            return False
+        current = self._filters[-1]
+        if current.count >= current.capacity:
+            current = BloomFilter(current.capacity * 2, self.error_rate / 2 ** (len(self._filters) + 1))
+            self._filters.append(current)
+        current.add_digest(digest)
+        return True
+
+    def __len__(self) -> int:
+        return sum(f.count for f in self._filters)
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(f.size_bytes for f in self._filters)
+
+
+class HyperLogLog:
+    """Cardinality estimate in ``2 ** precision`` one-byte registers (~1% error at 14)"""
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.num_registers = 1 << precision
+        self.registers = bytearray(self.num_registers)
+        self._cached_count: Optional[int] = 0
+        if self.num_registers >= 128:
+            self._alpha = 0.7213 / (1 + 1.079 / self.num_registers)
+        else:
+            self._alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(self.num_registers, 0.7213)
+
+    def add(self, item: str):
+        self.add_digest(_hash128(item))
+
+    def add_digest(self, digest: bytes):
+        value = int.from_bytes(digest[:8], "little")
+        index = value & (self.num_registers - 1)
+        rest = value >> self.precision
+        width = 64 - self.precision
+        rank = width - rest.bit_length() + 1 if rest else width + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            self._cached_count = None
+
+    def count(self) -> int:
+        # Status updates ask for the count on every page; only recompute after a register changed
+        if self._cached_count is not None:
+            return self._cached_count
+        m = self.num_registers
+        estimate = self._alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        if estimate <= 2.5 * m:
+            zeros = self.registers.count(0)
+            if zeros:
+                estimate = m * math.log(m / zeros)  # Linear counting for small cardinalities
+        self._cached_count = int(round(estimate))
+        return self._cached_count
+
+
+class UrlSpillFile:
+    """Append-only newline-delimited URL file holding the exact list on disk.
+
+    Truncated on open: a resumed session rebuilds it from its checkpoint.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "w", encoding="utf-8")
+
+    def append(self, url: str):
+        self._file.write(url + "\n")
+
+    def __iter__(self) -> Iterator[str]:
+        if not self._file.closed:
+            self._file.flush()
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                yield line.rstrip("\n")
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class CompactUrlSet:
+    """Set-like URL container: Bloom membership, HLL count, exact list spilled to disk.
+
+    Supports the subset of the ``set`` interface the crawlers use (``in``,
+    ``add``, ``update``, ``len``, iteration), so it can replace a plain set.
+    A false positive makes a new URL look already seen, so it is neither
+    queued nor written to the spill file; the rate is bounded by
+    ``error_rate``.
+    """
+
+    def __init__(self, spill_path: Optional[str] = None, capacity: int = 100_000,
+                 error_rate: float = 0.001, hll_precision: int = 14):
+        self._bloom = ScalableBloomFilter(capacity, error_rate)
+        self._hll = HyperLogLog(hll_precision)
+        self._spill = UrlSpillFile(spill_path) if spill_path else None
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._bloom
+
+    def add(self, url: str) -> bool:
+        self._hll.add(url)
+        if not self._bloom.add(url):
+            return False
+        if self._spill:
+            self._spill.append(url)
+        return True
+
+    def update(self, urls: Iterable[str]):
+        for url in urls:
+            self.add(url)
+
+    def __len__(self) -> int:
+        return self._hll.count()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._spill) if self._spill else iter(())
+
+    def close(self):
+        if self._spill:
+            self._spill.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "estimated_count": len(self),
+            "bloom_items": len(self._bloom),
+            "bloom_bytes": self._bloom.size_bytes,
+            "hll_bytes": len(self._hll.registers),
+            "error_rate": self._bloom.error_rate,
+            "spill_file": self._spill.path if self._spill else None,
+        }
+
+
+UrlSet = Union[set, CompactUrlSet]
+
+
+def make_url_set(compact: bool, spill_path: Optional[str] = None, capacity: int = 100_000,
+                 error_rate: float = 0.001, hll_precision: int = 14) -> UrlSet:
+    """A plain set, or a CompactUrlSet when ``compact`` is requested"""
+    if not compact:
+        return set()
+    return CompactUrlSet(spill_path, capacity, error_rate, hll_precision)
+
+
+def remove_spill_dir(path: str):
+    """Delete a session's spill directory, ignoring errors"""
+    shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,222 @@
+"""
+Persistent HTTP validators (ETag / Last-Modified / content hash) for conditional recrawls
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Union
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS url_validators (
+    url TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    fetch_ms REAL,
+    payload BLOB,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def content_hash(data: Union[str, bytes]) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8", "surrogatepass")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _header(headers: Optional[Dict[str, str]], name: str) -> Optional[str]:
+    if not headers:
+        return None
+    value = headers.get(name)
+    if value is None:
+        lower = name.lower()
+        value = next((v for k, v in headers.items() if k.lower() == lower), None)
+    return value
+
+
+class Validator:
+    """What was known about a URL after its last successful fetch.
+
+    ``payload`` is whatever the caller needs to reuse the previous result
+    without the body: a page's raw link lists, or a download's saved file.
+    """
+
+    def __init__(self, url: str, kind: str, etag: Optional[str], last_modified: Optional[str],
+                 content_hash: str, size: int, fetch_ms: Optional[float] = None,
+                 payload: Optional[Dict[str, Any]] = None):
+        self.url = url
+        self.kind = kind
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_hash = content_hash
+        self.size = size
+        self.fetch_ms = fetch_ms
+        self.payload = payload
+
+    @classmethod
+    def from_response(cls, url: str, kind: str, headers: Optional[Dict[str, str]], body: Union[str, bytes],
+                      fetch_ms: Optional[float] = None, payload: Optional[Dict[str, Any]] = None) -> "Validator":
+        size = len(body.encode("utf-8", "surrogatepass")) if isinstance(body, str) else len(body)
+        return cls.from_headers(url, kind, headers, content_hash(body), size, fetch_ms, payload)
+
+    @classmethod
+    def from_headers(cls, url: str, kind: str, headers: Optional[Dict[str, str]], digest: str, size: int,
+                     fetch_ms: Optional[float] = None, payload: Optional[Dict[str, Any]] = None) -> "Validator":
+        """For a body that was hashed while streaming rather than held in memory"""
+        return cls(url, kind, _header(headers, "ETag"), _header(headers, "Last-Modified"),
+                   digest, size, fetch_ms, payload)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since for a revalidating GET"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ValidatorStore:
+    """url -> Validator, in SQLite, shared by all sessions.
+
+    Lookups hit the database (or the not-yet-flushed buffer); updates are
+    buffered and written in one transaction once ``batch_size`` are pending
+    or ``flush_interval`` seconds have passed, like the checkpoint store.
+    Payloads are stored as zlib-compressed JSON.
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 200, flush_interval: float = 5.0):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._db: Optional[aiosqlite.Connection] = None
+        self._lock = asyncio.Lock()
+        self._pending: Dict[str, Validator] = {}
+        self._last_flush = time.monotonic()
+
+        self.lookups = 0
+        self.hits = 0
+        self.writes = 0
+
+    async def open(self):
+        self._db = await aiosqlite.connect(self.db_path)
+        await self._db.execute("PRAGMA journal_mode=WAL")
+        await self._db.execute("PRAGMA synchronous=NORMAL")
+        await self._db.executescript(SCHEMA)
+        await self._db.commit()
+        logger.info(f"Validator store opened at {self.db_path}")
+
+    async def close(self):
+        if self._db:
+            await self.flush()
+            await self._db.close()
+            self._db = None
+
+    async def get(self, url: str) -> Optional[Validator]:
+        self.lookups += 1
+        validator = self._pending.get(url)
+        if validator is None and self._db:
+            async with self._db.execute(
+                "SELECT kind, etag, last_modified, content_hash, size, fetch_ms, payload "
+                "FROM url_validators WHERE url = ?", (url,)
+            ) as cursor:
+                row = await cursor.fetchone()
+            if row:
+                kind, etag, last_modified, digest, size, fetch_ms, payload = row
+                validator = Validator(url, kind, etag, last_modified, digest, size, fetch_ms,
+                                      json.loads(zlib.decompress(payload)) if payload else None)
+        if validator is not None:
+            self.hits += 1
+        return validator
+
+    def record(self, validator: Validator):
+        self._pending[validator.url] = validator
+
+    async def maybe_flush(self):
+        if (len(self._pending) >= self.batch_size or
+                (self._pending and time.monotonic() - self._last_flush >= self.flush_interval)):
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._db or not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            now = time.time()
+            rows: List[tuple] = [
+                (v.url, v.kind, v.etag, v.last_modified, v.content_hash, v.size, v.fetch_ms,
+                 zlib.compress(json.dumps(v.payload).encode()) if v.payload is not None else None, now)
+                for v in pending.values()
+            ]
+            await self._db.executemany(
+                "INSERT OR REPLACE INTO url_validators "
+                "(url, kind, etag, last_modified, content_hash, size, fetch_ms, payload, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            await self._db.commit()
+            self.writes += len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "writes": self.writes,
+            "pending": len(self._pending),
+        }
+
+
+class RevalidationStats:
+    """Per-session counters for what conditional requests saved.
+
+    Only 304 answers save the transfer (``bytes_not_transferred``). A body
+    that is downloaded again but hashes the same as before still costs the
+    transfer; what it saves is re-writing the file or re-parsing the page,
+    counted in ``unchanged_bytes_reused``.
+    """
+
+    def __init__(self):
+        self.conditional_requests = 0
+        self.not_modified = 0
+        self.unchanged_hash = 0
+        self.parses_skipped = 0
+        self.downloads_reused = 0
+        self.bytes_not_transferred = 0
+        self.transfer_time_saved = 0.0
+        self.unchanged_bytes_reused = 0
+
+    def not_modified_saved(self, validator: Validator, latency: Optional[float]):
+        """Account for a 304 answer instead of a full fetch that took ``validator.fetch_ms``"""
+        self.not_modified += 1
+        self.bytes_not_transferred += validator.size
+        if validator.fetch_ms is not None and latency is not None:
+            self.transfer_time_saved += max(0.0, validator.fetch_ms / 1000 - latency)
+
+    def unchanged_reused(self, validator: Validator):
+        """Account for a full body whose hash matched ``validator``, so its stored result was reused"""
+        self.unchanged_hash += 1
+        self.unchanged_bytes_reused += validator.size
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "conditional_requests": self.conditional_requests,
+            "not_modified": self.not_modified,
+            "unchanged_hash": self.unchanged_hash,
+            "parses_skipped": self.parses_skipped,
+            "downloads_reused": self.downloads_reused,
+            "bytes_not_transferred": self.bytes_not_transferred,
+            "transfer_time_saved_ms": round(self.transfer_time_saved * 1000, 1),
+            "unchanged_bytes_reused": self.unchanged_bytes_reused,
+        }
@@ -9,6 +9,24 @@ export interface ScrapeRequest {
   scrape_whole_site: boolean;
   download_content: boolean;
   content_types: ContentType[];
+  concurrency?: number;
+  fetch_mode?: 'browser' | 'hybrid' | 'http';
+  render_mode?: 'page' | 'batch';
+  batch_size?: number;
+  crawl_profile?: 'fast' | 'balanced' | 'full';
+  extraction_mode?: 'crawler' | 'parser';
+  allowed_query_params?: string[];
+  denied_query_params?: string[];
+  use_sitemaps?: boolean;
+  respect_robots?: boolean;
+  compact_url_sets?: boolean;
+  adaptive_concurrency?: boolean;
+  conditional_requests?: boolean;
+  trap_detection?: boolean;
+  path_budgets?: Record<string, number>;
+  duplicate_page_links?: 'defer' | 'skip' | 'follow';
+  download_concurrency?: number;
+  cache_mode?: 'bypass' | 'read-only' | 'read-write' | 'refresh';
 }
 
 export interface ContentType {
@@ -46,6 +64,26 @@ export interface ScrapeStatus {
   started_at: string;
   ended_at?: string;
   estimated_total_pages?: number;
+  queue_depth?: number;
+  frontier_stats?: Record<string, number>;
+  fetch_engines?: Record<string, number>;
+  host_concurrency?: Record<string, {
+    limit: number;
+    in_flight: number;
+    p95_latency_ms: number | null;
+    error_rate: number;
+    blocked_for: number;
+  }>;
+  memory_pressure?: 'normal' | 'soft' | 'hard';
+  downloads?: {
+    queue_depth: number;
+    in_flight: number;
+    workers: number;
+    completed: number;
+    failed: number;
+    files_per_second: number;
+    bytes_per_second: number;
+  };
 }
 
 export interface ScrapeResult {